@@ -19,7 +19,8 @@ setup(
     license = "Boost Software License - Version 1.0 - August 17th, 2003",
     keywords = "django rest data server client",
     packages = [
-        'slumber', 'slumber.connector', 'slumber.operations', 'slumber.server',
+        'slumber', 'slumber.changelog', 'slumber.connector',
+        'slumber.operations', 'slumber.replica', 'slumber.server',
         'slumber_examples', 'slumber_examples.no_models', 'slumber_examples.tests',
         'slumber_examples.nested1', 'slumber_examples.nested1.nested2',
         'slumber_ex_shop'],
@@ -0,0 +1,88 @@
+"""
+    An optional application that records the changes made to instances of
+    the models configured with `track_changes` so that other services can
+    fetch just the changes. It must be added to INSTALLED_APPS.
+"""
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+import time
+
+from slumber.changelog.operations import InstanceChanges
+
+
+# The number of seconds between the times that a process prunes the log
+PRUNE_INTERVAL = 60 * 60
+
+# When this process last pruned the log
+_PRUNED = 0
+
+
+def _retention():
+    """Return the number of seconds that changes are kept for, or None if
+    they are kept for ever.
+    """
+    return getattr(settings, 'SLUMBER_CHANGELOG_RETENTION', 7 * 24 * 60 * 60)
+
+
+def prune_changes():
+    """Remove the changes older than the retention time. The latest of them
+    is kept as the marker of where the log now starts, so that cursors from
+    before it can be told to start again.
+    """
+    from slumber.changelog.models import Change
+    retention = _retention()
+    if retention is None:
+        return
+    old = list(Change.objects.filter(
+            when__lt=datetime.now() - timedelta(seconds=retention))
+        .order_by('-pk').values_list('pk', flat=True)[:1])
+    if old:
+        Change.objects.filter(pk__lt=old[0]).delete()
+        Change.objects.filter(pk=old[0]).update(kind='pruned')
+
+
+def record_changes(model, kind, pks):
+    """Record a change of the kind given to each of the instances of the
+    Slumber model.
+    """
+    from slumber.changelog.models import Change
+    changes = [Change(model=model.path, instance=unicode(pk), kind=kind)
+        for pk in pks]
+    if hasattr(Change.objects, 'bulk_create'):
+        Change.objects.bulk_create(changes)
+    else:
+        for change in changes:
+            change.save()
+    # We need the global so that the log is only pruned now and again
+    # pylint: disable = global-statement
+    global _PRUNED
+    if time.time() - _PRUNED > PRUNE_INTERVAL:
+        _PRUNED = time.time()
+        prune_changes()
+
+
+def _saved(sender, instance, created, **_kwargs):
+    """Record the creation or update of an instance.
+    """
+    record_changes(sender.slumber_model,
+        'created' if created else 'updated', [instance.pk])
+
+
+def _deleted(sender, instance, **_kwargs):
+    """Record the deletion of an instance.
+    """
+    record_changes(sender.slumber_model, 'deleted', [instance.pk])
+
+
+def track_changes(model):
+    """Start recording the changes to the instances of the Slumber model
+    and add the `changes` operation that returns them.
+    """
+    assert 'slumber.changelog' in settings.INSTALLED_APPS, \
+        "slumber.changelog must be installed to track changes"
+    model.changes_tracked = True
+    model.operations['changes'] = InstanceChanges(model, 'changes')
+    uid = 'slumber.changelog.' + model.path
+    post_save.connect(_saved, sender=model.model, dispatch_uid=uid)
+    post_delete.connect(_deleted, sender=model.model, dispatch_uid=uid)
@@ -0,0 +1,26 @@
+"""
+    The change log table. The primary key gives the order of the changes.
+"""
+from datetime import datetime
+from django.db import models
+
+
+KINDS = (
+    ('created', 'Created'),
+    ('updated', 'Updated'),
+    ('deleted', 'Deleted'),
+    # Marks where the log was pruned. Changes before it have been removed
+    ('pruned', 'Pruned'),
+)
+
+
+class Change(models.Model):
+    """A change to an instance of a model whose changes are tracked.
+    """
+    model = models.CharField(max_length=200, db_index=True)
+    instance = models.CharField(max_length=200)
+    kind = models.CharField(max_length=7, choices=KINDS)
+    when = models.DateTimeField(default=datetime.now, db_index=True)
+
+    def __unicode__(self):
+        return u'%s %s%s' % (self.kind, self.model, self.instance)
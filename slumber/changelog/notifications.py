@@ -0,0 +1,77 @@
+"""
+    A long poll over the change log that lets clients find out which of the
+    instances they may have cached have changed.
+"""
+from django.conf import settings
+import time
+
+from slumber._caches import DJANGO_MODEL_TO_SLUMBER_MODEL
+from slumber.server import Forbidden
+from slumber.server.http import require_user
+
+
+# The most changes that are returned at once
+MAX_CHANGES = 500
+
+# A waiting poll holds a server worker, so by default it is kept short and
+# the change log is only checked once a second. Both can be changed with the
+# SLUMBER_NOTIFICATION_TIMEOUT and SLUMBER_NOTIFICATION_INTERVAL settings.
+TIMEOUT = 5
+INTERVAL = 1
+
+
+def _tracked_models():
+    """Return the models whose changes are tracked keyed by their path.
+    """
+    return dict([(model.path, model)
+        for model in DJANGO_MODEL_TO_SLUMBER_MODEL.values()
+            if model.changes_tracked])
+
+
+def _wait_for_changes(changes, after, timeout):
+    """Return the changes after the cursor, waiting up to timeout seconds
+    for there to be some.
+    """
+    interval = getattr(settings, 'SLUMBER_NOTIFICATION_INTERVAL', INTERVAL)
+    deadline = time.time() + timeout
+    while True:
+        found = list(
+            changes.filter(pk__gt=after).order_by('pk')[:MAX_CHANGES])
+        if found or time.time() >= deadline:
+            return found
+        time.sleep(interval)
+
+
+@require_user
+def _notifications(_cls, request, response):
+    """Implement the long poll for the current user.
+    """
+    from slumber.changelog.models import Change
+    models = _tracked_models()
+    changes = Change.objects.filter(model__in=models.keys())
+    if not request.GET.has_key('after'):
+        latest = list(changes.order_by('-pk')[:1])
+        response['cursor'] = latest[0].pk if latest else 0
+        response['urls'] = []
+        return
+    try:
+        after = int(request.GET['after'])
+        timeout = min(float(request.GET.get('timeout', 0)),
+            getattr(settings, 'SLUMBER_NOTIFICATION_TIMEOUT', TIMEOUT))
+    except ValueError:
+        raise Forbidden("The cursor and timeout must be numbers")
+    found = _wait_for_changes(changes, after, timeout)
+    response['cursor'] = found[-1].pk if found else after
+    response['urls'] = []
+    for change in found:
+        url = models[change.model].operations['data'](change.instance)
+        if url not in response['urls']:
+            response['urls'].append(url)
+
+
+def notifications(request, response):
+    """Return the data URLs of the instances that have changed after the
+    `after` cursor, waiting up to `timeout` seconds for a change. Without
+    a cursor the current cursor is returned straight away.
+    """
+    _notifications(None, request, response)
@@ -0,0 +1,66 @@
+"""
+    Implements the operation that returns the changes to a model's
+    instances.
+"""
+from slumber.operations import ModelOperation
+from slumber.operations.instancelist import requested_page_size
+from slumber.server import Forbidden
+from slumber.server.http import require_user
+
+
+def _collapse(changes):
+    """Return the latest kind of change for each instance, in the order
+    that the instances were last changed. An instance created and then
+    updated is still reported as created.
+    """
+    kinds, order = {}, []
+    for change in changes:
+        if kinds.has_key(change.instance):
+            order.remove(change.instance)
+            if change.kind == 'updated' and \
+                    kinds[change.instance] == 'created':
+                change.kind = 'created'
+        kinds[change.instance] = change.kind
+        order.append(change.instance)
+    return [(pk, kinds[pk]) for pk in order]
+
+
+class InstanceChanges(ModelOperation):
+    """Returns a page of the changes to the instances of the model made
+    after a cursor.
+    """
+    @require_user
+    def get(self, request, response, _appname, _modelname):
+        """Return the changes after the `after` cursor in the query string.
+        Each change gives the instance's pk, its data URL and whether it
+        was created, updated or deleted. If the log has been pruned past the
+        cursor then `expired` is set and the cursor is the end of the log.
+        """
+        from slumber.changelog.models import Change
+        try:
+            after = int(request.GET.get('after', 0))
+        except ValueError:
+            raise Forbidden("The cursor must be a number")
+        size = requested_page_size(request.GET.get('page_size', 100))
+        first = list(Change.objects.order_by('pk')[:1])
+        if first and first[0].kind == 'pruned' and after < first[0].pk:
+            # The changes after the cursor may have been pruned
+            latest = Change.objects.order_by('-pk')[0]
+            response['expired'] = True
+            response['cursor'] = latest.pk
+            response['changes'] = []
+            return
+        changes = list(Change.objects.filter(model=self.model.path,
+            pk__gt=after).order_by('pk')[:size + 1])
+        more, changes = len(changes) > size, changes[:size]
+        response['cursor'] = changes[-1].pk if changes else after
+        to_python = self.model.model._meta.pk.to_python
+        data = self.model.operations['data']
+        response['changes'] = [
+                dict(pk=to_python(pk), kind=kind, data=data(pk))
+            for pk, kind in _collapse(changes)]
+        if more:
+            qs = dict(after=response['cursor'])
+            if request.GET.has_key('page_size'):
+                qs['page_size'] = size
+            response['next_page'] = self(**qs)
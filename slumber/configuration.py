@@ -1,21 +1,35 @@
 """
     Implements configuration of the Slumber models available on the server.
 """
+from django.conf import settings
 from django.core.urlresolvers import reverse
 
 from slumber._caches import DJANGO_MODEL_TO_SLUMBER_MODEL, \
     OPERATION_URIS
-from slumber.connector.configuration import INSTANCE_PROXIES, MODEL_PROXIES
+from slumber.connector.configuration import INSTANCE_CACHE_TTL, \
+    INSTANCE_PROXIES, MODEL_PROXIES, REPLICAS
 from slumber.server.json import DATA_MAPPING
 from slumber.server.meta import get_application
 
 
+# The types of the fields that may be aggregated
+NUMERIC_FIELDS = ['AutoField', 'BigIntegerField', 'DecimalField',
+    'FloatField', 'IntegerField', 'PositiveIntegerField',
+    'PositiveSmallIntegerField', 'SmallIntegerField']
+
+
 def configure(arg,
         properties_ro = None,
         to_json = None,
         operations_extra = None,
         instance_proxy = None,
-        model_proxy = None):
+        model_proxy = None,
+        cache_ttl = None,
+        filters = None,
+        orderings = None,
+        aggregates = None,
+        track_changes = False,
+        replica_ttl = None):
     """Configure Slumber for the provided model.
 
     When configuring the server side the model is a model instance. When
@@ -31,6 +45,16 @@ def configure(arg,
         examples
     * operations_extra: A list of operations that are to be added to the
         model.
+    * filters: A list of the query lookups (e.g. `name__startswith`) that
+        clients may use to select instances. The lookups must be on indexed
+        columns.
+    * orderings: A list of the fields that clients may order instance lists
+        by. The fields must be indexed and not nullable.
+    * aggregates: A list of the numeric fields that clients may sum, average
+        and find the minimum and maximum of.
+    * track_changes: If True then the changes to the instances are recorded
+        and made available through the `changes` operation. This needs the
+        `slumber.changelog` application to be installed.
 
     Client configuration:
 
@@ -38,24 +62,40 @@ def configure(arg,
     of this model are created.
     * model_proxy: The proxy to be used on the client side when this model is
         encountered.
+    * cache_ttl: The number of seconds that instances of this model may be
+        kept in the process wide instance cache.
+    * replica_ttl: If given then the instances of this model are copied into
+        the local database when the model connector's `sync` method is
+        called, and are read from there for this many seconds after each
+        sync. This needs the `slumber.replica` application to be installed.
     """
     # We need all of these arguments as they are all used
     # pylint: disable=R0913
     if isinstance(arg, basestring):
-        _model_name(arg, instance_proxy, model_proxy)
+        _model_name(arg, instance_proxy, model_proxy, cache_ttl,
+            replica_ttl)
     elif isinstance(arg, dict):
         _configuration(arg)
     else:
-        _model(arg, to_json, properties_ro, operations_extra)
+        _model(arg, to_json, properties_ro, operations_extra,
+            dict(filters=filters, orderings=orderings, aggregates=aggregates,
+                track_changes=track_changes))
 
 
-def _model_name(model_name, instance_proxy, model_proxy):
+def _model_name(model_name, instance_proxy, model_proxy, cache_ttl,
+        replica_ttl):
     """Process configuration given by a Django model name.
     """
     if instance_proxy:
         INSTANCE_PROXIES[model_name] = instance_proxy
     if model_proxy:
         MODEL_PROXIES[model_name] = model_proxy
+    if cache_ttl is not None:
+        INSTANCE_CACHE_TTL[model_name] = cache_ttl
+    if replica_ttl is not None:
+        assert 'slumber.replica' in settings.INSTALLED_APPS, \
+            "slumber.replica must be installed to replicate models"
+        REPLICAS[model_name] = replica_ttl
 
 
 def _configuration(config):
@@ -67,12 +107,38 @@ def _configuration(config):
     app.configuration = config
 
 
-def _model(django_model, to_json, properties_ro, operations_extra):
+def _indexed_field(django_model, lookup):
+    """Return the field that the lookup is on, asserting that it is indexed.
+    """
+    field = django_model._meta.get_field(lookup.split('__')[0])
+    assert field.primary_key or field.unique or field.db_index, \
+        "%s.%s must be indexed" % (django_model.__name__, field.name)
+    return field
+
+
+def _model(django_model, to_json, properties_ro, operations_extra, queries):
     """Process configuration for a Django model
     """
     model = DJANGO_MODEL_TO_SLUMBER_MODEL[django_model]
 
     model.properties['r'] += properties_ro or []
+    for lookup in queries['filters'] or []:
+        _indexed_field(django_model, lookup)
+        model.filters.append(lookup)
+    for name in queries['orderings'] or []:
+        assert not _indexed_field(django_model, name).null, \
+            "%s.%s must not be nullable to be ordered by" % (
+                django_model.__name__, name)
+        model.orderings.append(name)
+    for name in queries['aggregates'] or []:
+        assert django_model._meta.get_field(name).get_internal_type() in \
+                NUMERIC_FIELDS, \
+            "%s.%s must be numeric to be aggregated" % (
+                django_model.__name__, name)
+        model.aggregates.append(name)
+    if queries['track_changes']:
+        from slumber.changelog import track_changes
+        track_changes(model)
     for type_name, function in (to_json or {}).items():
         DATA_MAPPING[type_name] = function
 
@@ -2,20 +2,34 @@
     Code for the Slumber client connector.
 """
 import logging
+import threading
+import time
 from urllib import urlencode
 from urlparse import urljoin
 
 from django.conf import settings
 
 from slumber._caches import MODEL_URL_TO_SLUMBER_MODEL, PER_THREAD
-from slumber.connector.api import get_model
+from slumber.connector.api import get_model, prefetch_instances, \
+    resolve_instances, revalidate_instances
+from slumber.connector.batch import Batch
 from slumber.connector.dictobject import DictObject
+from slumber.connector.identity import INSTANCES
 from slumber.connector.json import from_json_data
+from slumber.connector.notifications import Listener
+from slumber.connector.snapshot import read_snapshot, snapshot_path, \
+    write_snapshot
 from slumber.connector.ua import get
 from slumber.server import get_slumber_service, get_slumber_directory, \
     get_slumber_services, get_slumber_local_url_prefix, get_slumber_root
 
 
+# The threads that check the snapshot of each service directory against
+# the service. Each directory is only checked once by a process
+REVALIDATING = {}
+_REVALIDATING_LOCK = threading.Lock()
+
+
 def _get_slumber_authn_name():
     """Used in the implementation of get_auth_name so it can be easily
     patched.
@@ -32,54 +46,240 @@ def get_slumber_authn_name():
 class ServiceConnector(object):
     """Connects to a service.
     """
-    def __init__(self, directory):
+    # The number of seconds that the applications and models found in the
+    # directory are used for before it is fetched again
+    _TREE_TTL = 60
+
+    def __init__(self, directory, branches=None):
         self._directory = directory
+        # The connectors for the applications nested below this one
+        self._branches = branches or {}
+        # The expiry time, the connectors found in the directory and the
+        # service operation URLs. It is replaced, never changed
+        self._tree = None
+        self._lock = threading.Lock()
+        # Set when the tree was built from the snapshot and hasn't yet
+        # been checked against the service
+        self._from_snapshot = False
+        # Set once the tree has been built from the expanded directory, which
+        # is then what it is refreshed from
+        self._expanded = False
 
-    def __getattr__(self, attr_name):
-        """Fetch the application list from the Slumber directory on request.
+    def bootstrap(self):
+        """Build the connectors for all of the applications and models of
+        this service, along with the model meta data, from the expanded
+        directory in a single request. Returns the fingerprint of the
+        service's schema.
+        """
+        assert self._directory, "Only a single service can be bootstrapped"
+        self._populate(self._fetch_expanded())
+        return self._fingerprint
+
+    def _fetch_expanded(self):
+        """Fetch the expanded directory and save it in the snapshot.
+        """
+        _, json = get(self._directory + '?expand=1')
+        write_snapshot(self._directory, json)
+        return json
+
+    def _start_from_snapshot(self):
+        """Build the connectors from the snapshot, if it has this service.
+        The snapshot is checked against the service when the connectors
+        are first used. Returns False if the snapshot can't be used.
+        """
+        json = read_snapshot(self._directory)
+        if json is None:
+            return False
+        self._populate(json)
+        self._from_snapshot = True
+        return True
+
+    def _check_snapshot(self):
+        """Check the snapshot against the service in a background thread,
+        unless this process has already started checking it.
+        """
+        self._from_snapshot = False
+        with _REVALIDATING_LOCK:
+            if REVALIDATING.has_key(self._directory):
+                return
+            thread = threading.Thread(target=self._revalidate)
+            thread.daemon = True
+            REVALIDATING[self._directory] = thread
+            thread.start()
+
+    def _revalidate(self):
+        """Rebuild the connectors if the service's schema fingerprint no
+        longer matches the one that they were built from.
+        """
+        try:
+            _, json = get(self._directory + '?expand=1')
+        except Exception: # pylint: disable=W0703
+            logging.exception("Revalidating the snapshot of %s failed",
+                self._directory)
+            return
+        if json['fingerprint'] != self._fingerprint:
+            self._populate(json)
+            write_snapshot(self._directory, json)
+
+    def _refresh_expanded(self):
+        """Refresh the tree built from the expanded directory. The
+        fingerprint is asked for first, and only if it has changed is the
+        expanded directory fetched again and the snapshot rewritten.
+        Otherwise the connectors are kept for another period.
+        """
+        _, json = get(self._directory + '?fingerprint=1')
+        if json.get('fingerprint') == self._fingerprint:
+            self._extend(time.time() + self._TREE_TTL)
+        else:
+            self._populate(self._fetch_expanded())
+
+    def _extend(self, expires):
+        """Keep using the tree, and those of the applications below it,
+        until the new expiry time.
+        """
+        for child in self._tree[1].values() + self._branches.values():
+            if isinstance(child, ServiceConnector) and child._tree:
+                child._extend(expires)
+        self._tree = (expires,) + self._tree[1:]
+
+    def _populate(self, json):
+        """Build the connectors from the expanded directory.
+        """
+        expires = time.time() + self._TREE_TTL
+        children, operations = self._build_tree(dict(
+            operations=json['operations'],
+            apps=dict([(n, a['url']) for n, a in json['expanded'].items()])))
+        for app_name, app in json['expanded'].items():
+            names = app_name.split('.')
+            loc = children[names[0]]
+            for k in names[1:]:
+                loc = loc._branches[k]
+            models = {}
+            for model_name, meta in app['models'].items():
+                models[model_name] = get_model(
+                    urljoin(self._directory, meta['url']))
+                models[model_name]._set_metadata(meta)
+            loc._tree = (expires, models, {})
+        self._fingerprint = json['fingerprint']
+        self._expanded = True
+        self._tree = (expires, children, operations)
+
+    def _build_tree(self, json):
+        """Return the connectors for the applications and models in the
+        directory JSON, and the URLs of the service operations.
         """
-        logging.debug("Looking for attribute %s on %s for directory %s",
-            attr_name, self, self._directory)
-        if not self._directory:
-            logging.debug("Raising AttributeError as _directory is falsey")
-            raise AttributeError(attr_name)
-        _, json = get(self._directory)
-        logging.debug(
-            "Looking for attribute %s on %s resulted in these applications %s",
-            attr_name, self, json)
-        # Pylint gets confused by the JSON object
-        # pylint: disable=E1103
         json_apps = json.get('apps', {})
         apps = {}
         for app in json_apps.keys():
             root = apps
             for k in app.split('.'):
-                if not root.has_key(k):
-                    root[k] = {}
-                root = root[k]
-        def recurse_apps(loc, this_level, name):
+                root = root.setdefault(k, {})
+        def build_apps(this_level, name):
             """Recursively build the application connectors.
             """
-            current_appname = '.'.join(name)
-            if json_apps.has_key(current_appname):
-                loc._directory = urljoin(self._directory,
-                    json_apps[current_appname])
+            connectors = {}
             for k, v in this_level.items():
-                app_cnx = ServiceConnector(None)
-                setattr(loc, k, app_cnx)
-                recurse_apps(app_cnx, v, name + [k])
-        recurse_apps(self, apps, [])
-        models = json.get('models', {})
-        for model_name, url in models.items():
-            model_url = urljoin(self._directory, url)
-            model = get_model(model_url)
-            setattr(self, model_name, model)
-        if attr_name in models.keys():
-            return getattr(self, attr_name)
-        elif attr_name in apps.keys():
-            return getattr(self, attr_name)
-        else:
-            raise AttributeError(attr_name, json)
+                url = json_apps.get('.'.join(name + [k]))
+                connectors[k] = ServiceConnector(
+                    urljoin(self._directory, url) if url else None,
+                    build_apps(v, name + [k]))
+            return connectors
+        children = build_apps(apps, [])
+        for model_name, url in json.get('models', {}).items():
+            children[model_name] = get_model(urljoin(self._directory, url))
+        return children, dict([(n, urljoin(self._directory, u))
+            for n, u in json.get('operations', {}).items()])
+
+    def _current_tree(self):
+        """Return the tree built from the directory, fetching the directory
+        again if the tree has expired. Only one thread fetches it and the
+        new tree replaces the old one in a single step. A tree that was
+        built from the expanded directory is refreshed from it so that the
+        model meta data stays loaded.
+        """
+        if self._from_snapshot:
+            self._check_snapshot()
+        tree = self._tree
+        if tree is None or tree[0] < time.time():
+            with self._lock:
+                tree = self._tree
+                if tree is None or tree[0] < time.time():
+                    logging.debug("Fetching the directory %s",
+                        self._directory)
+                    if self._expanded:
+                        self._refresh_expanded()
+                        tree = self._tree
+                    else:
+                        _, json = get(self._directory)
+                        children, operations = self._build_tree(json)
+                        tree = (time.time() + self._TREE_TTL, children,
+                            operations)
+                        self._tree = tree
+        return tree
+
+    def batch(self, atomic=False):
+        """Return a context manager that queues the writes made through the
+        model connectors and sends them to this service in one request.
+        If atomic is True then they are all run in one transaction.
+        """
+        return Batch(self._service_operation('batch'), atomic)
+
+    def listen(self, timeout=5):
+        """Start listening for the notifications of changed instances from
+        this service in a background thread, which invalidates them in the
+        client caches. Returns the listener, which can be stopped.
+        """
+        return Listener(self._service_operation('notifications'),
+            timeout).start()
+
+    def prefetch(self, instances, attrs=None):
+        """Fetch the data for the instances, and their data arrays named in
+        attrs, that aren't already cached. Instances from remote services
+        are fetched in parallel.
+        """
+        prefetch_instances(instances, attrs)
+
+    def resolve(self, instances):
+        """Fetch the data for all of the instances from this service that
+        aren't already cached using a single request. Returns the instances
+        that no longer exist.
+        """
+        return resolve_instances(self._service_operation('resolve'),
+            instances)
+
+    def revalidate(self, instances=None):
+        """Check the cached data for the instances from this service in a
+        single request. If no instances are given then everything in the
+        instance caches is checked. Returns the URLs of the instances that
+        had changed or been deleted.
+        """
+        return revalidate_instances(self._service_operation('revalidate'),
+            self._directory, instances)
+
+    def _service_operation(self, name):
+        """Return the URL of one of the operations for the whole service.
+        """
+        assert self._directory, \
+            "Service operations must be sent to a single service"
+        return self._current_tree()[2][name]
+
+    def __getattr__(self, attr_name):
+        """Find the application or model in the tree built from the
+        directory. The tree lists everything that the directory has, so
+        names that aren't in it are answered without a request until it
+        expires.
+        """
+        if attr_name.startswith('_'):
+            raise AttributeError(attr_name)
+        if self._branches.has_key(attr_name):
+            return self._branches[attr_name]
+        if not self._directory:
+            logging.debug("Raising AttributeError as _directory is falsey")
+            raise AttributeError(attr_name)
+        children = self._current_tree()[1]
+        if children.has_key(attr_name):
+            return children[attr_name]
+        raise AttributeError(attr_name)
 
 
 class Client(ServiceConnector):
@@ -99,6 +299,26 @@ class Client(ServiceConnector):
             for k, v in services.items():
                 setattr(self, k, ServiceConnector(v))
             super(Client, self).__init__(None)
+        if snapshot_path():
+            for service in self._services().values():
+                service._start_from_snapshot()
+
+    def _services(self):
+        """Return the connectors for the configured services keyed by their
+        names, or just this one if there is only a directory.
+        """
+        if self._directory:
+            return {None: self}
+        return dict([(k, v) for k, v in self.__dict__.items()
+            if isinstance(v, ServiceConnector)])
+
+    def bootstrap(self):
+        """Bootstrap the directory, or each of the configured services.
+        Returns the fingerprint, or a dict of them keyed by service.
+        """
+        if self._directory:
+            return super(Client, self).bootstrap()
+        return dict([(k, v.bootstrap()) for k, v in self._services().items()])
 
     @classmethod
     def _flush_client_instance_cache(cls):
@@ -106,3 +326,4 @@ class Client(ServiceConnector):
         """
         if getattr(PER_THREAD, 'cache', None):
             PER_THREAD.cache.clear()
+        INSTANCES.clear()
@@ -1,18 +1,37 @@
 """
     Allow us to get an instance directly from the JSON data for an object.
 """
+from contextlib import contextmanager
 import logging
-from urllib import urlencode
+from urllib import quote, urlencode
 from urlparse import urljoin, urlparse
 
 from slumber._caches import MODEL_URL_TO_SLUMBER_MODEL, PER_THREAD
 from slumber.connector.configuration import INSTANCE_PROXIES, MODEL_PROXIES
+from slumber.connector.dataarray import DataArray, aggregate_json, \
+    first_page_url
 from slumber.connector.dictobject import DictObject
+from slumber.connector.httpcache import invalidate_response
+from slumber.connector.identity import INSTANCES
 from slumber.connector.json import from_json_data
-from slumber.connector.ua import get, post
+from slumber.connector.prefetch import fetch_all
+from slumber.connector.stream import ChangeStream, InstanceStream
+from slumber.connector.ua import get, post, flush_negative_cache, for_user
+from slumber.operations.instancedata import instance_etag
+from slumber.replica import find, forget, forget_model, repair, \
+    replica_ttl, sync
 from slumber.scheme import from_slumber_scheme
 
 
+# The number of seconds that instances fetched ahead of being used are held
+# in the identity map for when their model isn't cached and there is no
+# request cache
+FETCHED_AHEAD_TTL = 60
+
+# Asks the server to leave the operations out of the instance data
+_NO_OPERATIONS = '?operations=no'
+
+
 def _ensure_absolute(url):
     """Assert that a given URL is absolute.
     """
@@ -30,11 +49,236 @@ def get_instance(model, instance_url, display_name, fields = None):
         if model._url.endswith(type_url):
             bases.append(proxy)
     type_name = str(instance_url)
-    instance_type = type(type_name, tuple(bases), {})
+    instance_type = type(type_name, tuple(bases), {'_model_url': model._url})
     return instance_type(from_slumber_scheme(instance_url),
         display_name, fields)
 
 
+def _query_string(params):
+    """Return the query string, including the '?', for the parameters
+    whose values aren't None.
+    """
+    params = dict([(k, unicode(v).encode('utf-8'))
+        for k, v in params.items() if v is not None])
+    return '?' + urlencode(params) if params else ''
+
+
+def _request_cache():
+    """Return the per-request instance cache, or None if there isn't one.
+    """
+    return getattr(PER_THREAD, 'cache', None)
+
+
+def _cache_instance(url, model_url, json, connector=None,
+        fetched_ahead=False):
+    """Replace whatever is cached for the instance with a connector holding
+    the instance data that the server has just returned. Data fetched
+    ahead of being used, or written through a proxy, is kept for a while
+    even if the model isn't cached so that the proxies find it.
+    """
+    url = from_slumber_scheme(url)
+    _forget_instance(url)
+    if connector is None:
+        connector = _InstanceConnector(url)
+    connector._set_data(json)
+    request_cache = _request_cache()
+    INSTANCES.put(url, connector, model_url, FETCHED_AHEAD_TTL
+        if fetched_ahead and request_cache is None else None)
+    if request_cache is not None:
+        request_cache[url] = connector
+    return connector
+
+
+def _refresh_proxy(proxy, connector, _json):
+    """Make the proxy use the connector holding the instance data. The
+    field values that the proxy was made with are dropped so that it reads
+    them from the caches, where invalidations will reach them.
+    """
+    proxy._instance = connector
+    proxy._display = connector._display
+    proxy._fields = {}
+
+
+def _forget_instance(url):
+    """Remove the instance from all of the caches.
+    """
+    url = from_slumber_scheme(url)
+    request_cache = _request_cache()
+    if request_cache is not None:
+        request_cache.pop(url, None)
+    INSTANCES.invalidate(url)
+    invalidate_response(url)
+    invalidate_response(url + _NO_OPERATIONS)
+    forget(url)
+
+
+def invalidate_instances(urls):
+    """Remove the instances from the caches, along with any failed lookups
+    of them, so that they are fetched again when next used.
+    """
+    for url in urls:
+        _forget_instance(url)
+        flush_negative_cache(from_slumber_scheme(url))
+
+
+def _write(url, data, handler, headers=None):
+    """POST to a write operation and return what the handler makes of the
+    response. If a batch is being built the operation is queued instead
+    and a `BatchResult` is returned.
+    """
+    batch = getattr(PER_THREAD, 'batch', None)
+    if batch is not None:
+        return batch.queue(url, data, handler, headers=headers)
+    _, json = post(url, data, headers=headers)
+    return handler(json)
+
+
+def save_pending():
+    """Save the changes to all of the instances that have been changed
+    since the pending writes were last saved.
+    """
+    pending = getattr(PER_THREAD, 'pending_writes', None)
+    while pending:
+        pending.pop(0).save()
+
+
+@contextmanager
+def autosave():
+    """Save all of the changed instances at the end of the block. Changes
+    are not saved if the block raises an exception.
+    """
+    outer = getattr(PER_THREAD, 'pending_writes', None)
+    PER_THREAD.pending_writes = []
+    try:
+        yield
+        save_pending()
+    finally:
+        PER_THREAD.pending_writes = outer
+
+
+def _forget_model_instances(model_url):
+    """Remove all of the instances of the model from the instance caches.
+    """
+    request_cache = _request_cache()
+    for url in (request_cache or {}).keys():
+        if url.startswith(model_url):
+            del request_cache[url]
+    INSTANCES.invalidate_model(model_url)
+    forget_model(model_url)
+
+
+def resolve_instances(url, instances):
+    """Fetch the data for those instance proxies that don't have their data
+    cached using a single POST to the service's resolve operation at the
+    URL given. Returns the proxies for instances that no longer exist.
+    """
+    request_cache = _request_cache() or {}
+    unresolved = {}
+    for proxy in instances:
+        connector = request_cache.get(proxy._url) or \
+            INSTANCES.get(proxy._url)
+        loaded = connector is not None and \
+            connector.__dict__.has_key('_field_names')
+        if not proxy._fields and not loaded:
+            unresolved.setdefault(proxy._url, []).append(proxy)
+    if not unresolved:
+        return []
+    _, json = post(url, dict(urls=unresolved.keys()))
+    for instance_url, data in json['instances'].items():
+        model_url = urljoin(instance_url, data['type'])
+        connector = _cache_instance(instance_url, model_url, data,
+            fetched_ahead=True)
+        for proxy in unresolved[instance_url]:
+            _refresh_proxy(proxy, connector, data)
+    return [proxy for instance_url in json['missing']
+        for proxy in unresolved[instance_url]]
+
+
+def revalidate_instances(url, prefix, instances=None):
+    """Check the cached data for the instances with a single POST to the
+    service's revalidate operation at the URL given. Only instances whose
+    URLs start with the prefix are checked. If no instances are given then
+    all of the instances in the instance caches are checked.
+
+    Changed instances are updated in place, the cache lifetime of the
+    unchanged ones is renewed and deleted instances are removed from the
+    caches. Returns the URLs of the changed and deleted instances.
+    """
+    if instances is None:
+        connectors = dict(INSTANCES.connectors())
+        connectors.update(_request_cache() or {})
+    else:
+        connectors = dict([(from_slumber_scheme(i._url), i._fetch_instance())
+            for i in instances])
+    connectors = dict([(u, c) for u, c in connectors.items()
+        if u.startswith(prefix) and c.__dict__.has_key('_etag')])
+    if not connectors:
+        return []
+    _, json = post(url, dict(entries=[[u, c._etag]
+        for u, c in connectors.items()]))
+    for instance_url, connector in connectors.items():
+        if json['changed'].has_key(instance_url):
+            data = json['changed'][instance_url]
+            _cache_instance(instance_url, urljoin(instance_url, data['type']),
+                data, connector)
+        elif instance_url in json['deleted']:
+            _forget_instance(instance_url)
+        elif connector.__dict__.get('_model_url'):
+            INSTANCES.put(instance_url, connector, connector._model_url)
+    return json['changed'].keys() + json['deleted']
+
+
+def _prefetch_one(url, data_arrays, names):
+    """Fetch the instance data, unless the data array URLs are already
+    known, and then the first page of each of the named data arrays.
+    """
+    json = None
+    if data_arrays is None:
+        _, json = get(url, _InstanceConnector._CACHE_TTL)
+        data_arrays = json['data_arrays']
+    pages = {}
+    for name in names:
+        if data_arrays.has_key(name):
+            _, pages[name] = get(
+                first_page_url(urljoin(url, data_arrays[name])),
+                _InstanceConnector._CACHE_TTL)
+    return json, data_arrays, pages
+
+
+def prefetch_instances(instances, attrs=None):
+    """Fetch the data for the instance proxies, and the data arrays named
+    in attrs, that aren't already cached. Remote instances are fetched in
+    parallel. The data is placed in the instance caches, where the proxies
+    find it when their attributes are read.
+    """
+    attrs = attrs or []
+    request_cache = _request_cache() or {}
+    proxies, tasks = {}, []
+    for proxy in instances:
+        if proxy is not None:
+            proxies.setdefault(proxy._url, []).append(proxy)
+    for url, group in proxies.items():
+        connector = request_cache.get(url) or INSTANCES.get(url)
+        loaded = connector is not None and \
+            connector.__dict__.has_key('_field_names')
+        names = [n for n in attrs
+            if connector is None or not connector.__dict__.has_key(n)]
+        if not loaded or names:
+            tasks.append((url,
+                connector._data_arrays if loaded else None, names))
+    for (url, _, _), (json, data_arrays, pages) in zip(tasks,
+            fetch_all(_prefetch_one, tasks)):
+        connector = request_cache.get(url) or INSTANCES.get(url)
+        if json is not None:
+            connector = _cache_instance(url, urljoin(url, json['type']),
+                json, connector, fetched_ahead=True)
+            for proxy in proxies[url]:
+                _refresh_proxy(proxy, connector, json)
+        for name, page in pages.items():
+            setattr(connector, name, DataArray(url, data_arrays[name],
+                _InstanceConnector._CACHE_TTL, page))
+
+
 def get_model_type(url, bases):
     """Build and return a new type for the model.
     """
@@ -72,6 +316,9 @@ class ModelConnector(DictObject):
     """
     _CACHE_TTL = 2
 
+    # Asks the server to return the instance data from writes
+    _REPRESENTATION = {'Prefer': 'return=representation'}
+
     def __init__(self, url, **kwargs):
         _ensure_absolute(url)
         assert not MODEL_URL_TO_SLUMBER_MODEL.has_key(url), \
@@ -86,41 +333,214 @@ class ModelConnector(DictObject):
         return get_instance(self, url, display_name)
 
     def __getattr__(self, name):
-        attrs = ['name', 'module']
-        if name in attrs + ['_operations']:
+        if name in ['name', 'module', '_operations', '_instance_templates']:
             _, json = get(self._url, self._CACHE_TTL)
-            # We need to set this outside of __init__ for it to work correctly
-            # pylint: disable = W0201
-            self._operations = dict([(o, urljoin(self._url, u))
-                for o, u in json['operations'].items()])
-            for attr in attrs:
-                setattr(self, attr, json[attr])
+            self._set_metadata(json)
             return getattr(self, name)
         else:
             raise AttributeError(name)
 
+    def _set_metadata(self, json):
+        """Set the attributes from the model meta data.
+        """
+        # We need to set this outside of __init__ for it to work correctly
+        # pylint: disable = W0201
+        self._operations = dict([(o, urljoin(self._url, u))
+            for o, u in json['operations'].items()])
+        # Older servers don't publish the templates
+        self._instance_templates = json.get('instance_templates', {})
+        for attr in ['name', 'module']:
+            setattr(self, attr, json[attr])
+
+    def _instance_operations(self, url):
+        """Return the instance operations for the instance whose data is at
+        the URL, built from the templates in the model metadata, or None if
+        the URL doesn't fit the data template. The URLs are relative in the
+        same way as those in the instance data.
+        """
+        template = self._instance_templates.get('data')
+        if not template:
+            return None
+        prefix, suffix = template.split('{pk}', 1)
+        path = urlparse(url)[2]
+        pk = path[len(prefix):len(path) - len(suffix)]
+        if not pk or '/' in pk or path != prefix + pk + suffix:
+            return None
+        return dict([(o, t.replace('{pk}', pk))
+            for o, t in self._instance_templates.items()])
+
+    def proxy(self, pk):
+        """Return an instance proxy for the primary key without fetching
+        anything from the server. The instance data is only fetched when
+        an attribute that needs it is used.
+        """
+        template = self._instance_templates['data']
+        url = template.replace('{pk}', quote(unicode(pk).encode('utf-8')))
+        return get_instance(self, urljoin(self._url, url), None)
+
+    def instances(self, page_size=None, filters=None, proxies=True,
+            fields=None):
+        """Return an iterator over the instances of the model, optionally
+        restricted by the filters configured for the model on the server.
+        The items are instance proxies, or (pk, display, url) tuples if
+        proxies is False. The values of any fields named are sent with the
+        list so that the proxies don't need to fetch them.
+        """
+        return InstanceStream(self, page_size, filters, proxies,
+            fields=fields)
+
+    def changes(self, cursor=0, page_size=None):
+        """Return an iterator over the changes made to the instances after
+        the cursor. Its `cursor` attribute gives where the next sync should
+        start from once the changes have been used.
+        """
+        return ChangeStream(self, cursor, page_size)
+
+    def count(self, **filters):
+        """Return the number of instances that match the filters, which
+        must be configured for the model on the server.
+        """
+        url = urljoin(self._url, self._operations['count'])
+        _, json = get(url + _query_string(filters))
+        return json['count']
+
+    def aggregate(self, function, field, group_by=None, **filters):
+        """Return the aggregate (one of avg, max, min or sum) of the field
+        across the instances that match the filters. If group_by is given
+        then a dict of the aggregate for each value of that field is
+        returned.
+        """
+        url = urljoin(self._url, self._operations['aggregate'])
+        return aggregate_json(get(url + _query_string(dict(filters,
+            function=function, field=field, group_by=group_by)))[1])
+
+    def filter(self, **filters):
+        """Return an iterator over the instances that match the filters.
+        """
+        return self.instances(filters=filters)
+
+    def order_by(self, *names):
+        """Return an iterator over the instances in the order given.
+        """
+        return self.instances().order_by(*names)
+
     def create(self, **kwargs):
         """Implements the client side for the model `create` operator.
         """
         url = urljoin(self._url, self._operations['create'])
-        _, json = post(url, kwargs)
-        return get_instance_from_data(url, json)
+        def created(json):
+            """Build the instance and add it to the caches.
+            """
+            instance = get_instance_from_data(url, json)
+            # Earlier failed lookups may now succeed
+            flush_negative_cache(self._url, instance._url)
+            instance._instance = _cache_instance(
+                instance._url, self._url, json)
+            return instance
+        return _write(url, kwargs, created)
+
+    def create_many(self, objects):
+        """Implements the client side for the model `create-many` operator.
+        The objects are dicts of field values. Returns the number of
+        instances created.
+        """
+        url = urljoin(self._url, self._operations['create-many'])
+        def created(json):
+            """Return the number of instances created.
+            """
+            flush_negative_cache(self._url)
+            return json['created']
+        return _write(url, {'objects': list(objects)}, created)
 
     def get(self, **kwargs):
-        """Implements the client side for the model 'get' operator.
+        """Implements the client side for the model 'get' operator. For a
+        replicated model the instance is looked for in the replica first.
         """
         assert len(kwargs), \
             "You must supply kwargs to filter on to fetch the instance"
         url = urljoin(self._url, 'get/')
-        _, json = get(url + '?' + urlencode(kwargs), self._CACHE_TTL)
+        json = find(self._url, kwargs)
+        if json is None:
+            _, json = get(url + '?' + urlencode(kwargs), self._CACHE_TTL)
         return get_instance_from_data(url, json)
 
+    def sync(self):
+        """Bring the local replica of the model up to date. The model must
+        have been configured with a `replica_ttl`.
+        """
+        sync(self)
+
+    def repair(self):
+        """Compare the local replica of the model with the service using
+        checksums and fetch only the instances that differ. Returns the
+        number of instances that were fetched again or removed.
+        """
+        return repair(self)
+
     def update(self, instance_connector, **kwargs):
         """Implements the client side for the model 'update' operator.
         """
         url = urljoin(self._url, instance_connector._operations['update'])
-        _, json = post(url, kwargs)
-        return json
+        def updated(json):
+            """Write the new instance data through the caches.
+            """
+            flush_negative_cache(self._url, instance_connector._url)
+            if isinstance(instance_connector, _InstanceProxy):
+                instance_connector._saved(kwargs)
+            if not json.has_key('fields'):
+                # Older servers don't return the new instance data
+                _forget_instance(instance_connector._url)
+            elif isinstance(instance_connector, _InstanceProxy):
+                connector = _cache_instance(instance_connector._url,
+                    self._url, json, fetched_ahead=True)
+                _refresh_proxy(instance_connector, connector, json)
+            else:
+                _cache_instance(instance_connector._url, self._url, json,
+                    instance_connector)
+            return json
+        return _write(url, kwargs, updated, self._REPRESENTATION)
+
+    def update_many(self, values, pks=None, **filters):
+        """Implements the client side for the model 'update-many' operator.
+        The instances to update are given by a list of primary keys, by
+        filters that the server allows, or both. Returns the number of
+        instances updated.
+        """
+        url = urljoin(self._url, self._operations['update-many'])
+        def updated(json):
+            """Return the number of instances updated.
+            """
+            _forget_model_instances(self._url)
+            flush_negative_cache(self._url)
+            return json['updated']
+        return _write(url, dict(values=values, pks=pks, filter=filters),
+            updated)
+
+    def delete(self, instance_connector):
+        """Implements the client side for the model 'delete' operator.
+        """
+        url = urljoin(self._url, instance_connector._operations['delete'])
+        def deleted(json):
+            """Remove the instance from the caches.
+            """
+            _forget_instance(instance_connector._url)
+            flush_negative_cache(self._url)
+            return json
+        return _write(url, {}, deleted, self._REPRESENTATION)
+
+    def delete_many(self, pks=None, **filters):
+        """Implements the client side for the model 'delete-many' operator.
+        The instances are selected in the same way as for `update_many`.
+        Returns the number of instances deleted.
+        """
+        url = urljoin(self._url, self._operations['delete-many'])
+        def deleted(json):
+            """Return the number of instances deleted.
+            """
+            _forget_model_instances(self._url)
+            flush_negative_cache(self._url)
+            return json['deleted']
+        return _write(url, dict(pks=pks, filter=filters), deleted)
 
 
 class _InstanceProxy(object):
@@ -128,11 +548,21 @@ class _InstanceProxy(object):
     by the application code and the underlying object. This allows us to
     better handle the cache.
     """
+    _model_url = None
+
     def __init__(self, url, display, fields = None):
         super(_InstanceProxy, self).__init__()
         self._url = url
         self._display = display
         self._fields = fields or {}
+        # Changes are held here rather than in the connector, which may be
+        # shared with other requests and threads, until they're saved
+        self._dirty = {}
+        # Changed attributes that aren't fields of the remote model
+        self._local = {}
+        # The user that the changes are made for, so they are saved for
+        # the same user even if the save happens later
+        self._username = None
 
     def __deepcopy__(self, _memo):
         """Return a deep copy of the proxy. This isn't really deep.
@@ -148,14 +578,23 @@ class _InstanceProxy(object):
             self_url = from_slumber_scheme(self._url)
             if candidate_url == self_url:
                 return candidate
-        instance = getattr(PER_THREAD, 'cache', {}).get(self._url, None)
+        request_cache = _request_cache()
+        instance = (request_cache or {}).get(self._url, None)
         if not instance:
-            # We now have a cache miss so construct a new connector
-            instance = _InstanceConnector(self._url, **self._fields)
-            if hasattr(PER_THREAD, 'cache'):
-                PER_THREAD.cache[self._url] = instance
+            instance = INSTANCES.get(self._url)
+            if not instance:
+                # We now have a cache miss so construct a new connector
+                instance = _InstanceConnector(self._url, **self._fields)
+                instance._model_url = self._model_url
+                INSTANCES.put(self._url, instance, self._model_url)
+            if request_cache is not None:
+                request_cache[self._url] = instance
             else:
-                logging.info("No cache to write instance %s into", self._url)
+                logging.info("No request cache to write instance %s into",
+                    self._url)
+        # Holding the connector keeps it in the identity map whilst this
+        # proxy is alive
+        self._instance = instance
         return instance
 
     def __getattr__(self, name):
@@ -167,14 +606,75 @@ class _InstanceProxy(object):
                 'prepare_database_save', 'value_annotation']:
             # These are attributes that we will never have
             raise AttributeError(name)
+        for changes in ['_dirty', '_local']:
+            if self.__dict__.get(changes, {}).has_key(name):
+                return self.__dict__[changes][name]
         return getattr(self._fetch_instance(), name)
 
+    def _private_instance(self):
+        """Return the underlying instance if changes can be written to it
+        without other requests or threads seeing them, or None. A connector
+        from the process wide cache is copied into the request cache so
+        that other proxies for the instance in this request see the change.
+        """
+        instance = self._fetch_instance()
+        if instance is not INSTANCES.get(self._url):
+            return instance
+        request_cache = _request_cache()
+        if request_cache is None:
+            return None
+        private = _InstanceConnector(self._url)
+        private.__dict__.update(instance.__dict__)
+        request_cache[self._url] = private
+        self._instance = private
+        return private
+
     def __setattr__(self, name, value):
-        """Write the attribute through to the underlying instance.
+        """Remember the attribute value on the proxy until it is saved. It
+        is only written to the underlying instance if that isn't shared
+        outside of this request.
         """
         if name.startswith('_'):
             return super(_InstanceProxy, self).__setattr__(name, value)
-        return setattr(self._fetch_instance(), name, value)
+        if not self._dirty:
+            self._username = getattr(PER_THREAD, 'username', None)
+        pending = getattr(PER_THREAD, 'pending_writes', None)
+        if pending is not None and self not in pending:
+            pending.append(self)
+        self._dirty[name] = value
+        instance = self._private_instance()
+        if instance is not None:
+            setattr(instance, name, value)
+
+    def save(self):
+        """Send the fields that have been changed to the server in a single
+        update. Changed attributes that aren't fields of the remote model
+        are only kept locally. The changes are kept until the server has
+        accepted them, so a failed save can be tried again.
+        """
+        pending = getattr(PER_THREAD, 'pending_writes', None)
+        if pending and self in pending:
+            pending.remove(self)
+        names = self._fetch_instance()._field_names
+        for name in [k for k in self._dirty.keys() if k not in names]:
+            self._local[name] = self._dirty.pop(name)
+        changed = dict(self._dirty)
+        if changed:
+            model = get_model(self._model_url)
+            try:
+                return for_user(self._username)(model.update)(self, **changed)
+            except Exception:
+                # The cached instance can't be trusted to match the server
+                INSTANCES.invalidate(self._url)
+                raise
+
+    def _saved(self, values):
+        """Forget the changes that the server has accepted, unless they
+        have been changed again since.
+        """
+        for name, value in values.items():
+            if self._dirty.has_key(name) and self._dirty[name] == value:
+                del self._dirty[name]
 
     def __unicode__(self):
         """Allow us to take the unicode name of the instance
@@ -191,19 +691,7 @@ def _return_data_array(base_url, arrays, instance, name, cache_ttl):
     # Pylint makes a bad type deduction
     # pylint: disable=E1103
     if name in arrays.keys():
-        data_array = []
-        _, data = get(urljoin(base_url, arrays[name]), cache_ttl)
-        while True:
-            for obj in data['page']:
-                model_url = urljoin(base_url, obj['type'])
-                model = MODEL_URL_TO_SLUMBER_MODEL[model_url]
-                instance_url = urljoin(base_url, obj['data'])
-                data_array.append(
-                    get_instance(model, instance_url, obj['display']))
-            if data.has_key('next_page'):
-                _, data = get(urljoin(base_url, data['next_page']), cache_ttl)
-            else:
-                break
+        data_array = DataArray(base_url, arrays[name], cache_ttl)
         setattr(instance, name, data_array)
         return data_array
     else:
@@ -219,22 +707,58 @@ class _InstanceConnector(DictObject):
         self._url = url
         super(_InstanceConnector, self).__init__(**kwargs)
 
+    def _templated_operations(self):
+        """Return the instance operations built from the model's templates,
+        or None if the model metadata hasn't been loaded.
+        """
+        model = MODEL_URL_TO_SLUMBER_MODEL.get(
+            self.__dict__.get('_model_url'))
+        if model is None or not model.__dict__.has_key('_instance_templates'):
+            return None
+        return model._instance_operations(self._url)
+
     def _fetch_data(self):
-        """Force fetching the data for this instance.
+        """Force fetching the data for this instance. If the operations can
+        be built from the model's templates then the server is asked to
+        leave them out. Replicas hold the full instance data, so replicated
+        models always ask for it.
+        """
+        operations = self._templated_operations()
+        if operations is None or replica_ttl(self._model_url) is not None:
+            _, json = get(self._url, self._CACHE_TTL)
+        else:
+            _, json = get(self._url + _NO_OPERATIONS, self._CACHE_TTL)
+            # Put them back so that the entity tag matches the server's
+            json = dict(json, operations=operations)
+        return self._set_data(json)
+
+    def _set_data(self, json):
+        """Set the attributes from the instance data.
         """
-        _, json = get(self._url, self._CACHE_TTL)
         # We need to set this outside of __init__ for it to work correctly
         # pylint: disable = W0201
         self._operations = dict([(o, urljoin(self._url, u))
             for o, u in json['operations'].items()])
         for k, v in json['fields'].items():
             setattr(self, k, from_json_data(self._url, v))
+        self._field_names = json['fields'].keys()
         self._display = json['display']
+        self._data_arrays = json.get('data_arrays', {})
+        self._etag = instance_etag(json)
         return json
 
     def __getattr__(self, name):
+        if name == '_operations':
+            operations = self._templated_operations()
+            if operations is not None:
+                # pylint: disable = W0201
+                self._operations = dict([(o, urljoin(self._url, u))
+                    for o, u in operations.items()])
+                return self._operations
         json = self._fetch_data()
-        if name in json['fields'].keys() + ['_operations', '_display']:
+        if name in json['fields'].keys() + \
+                ['_operations', '_display', '_field_names', '_data_arrays',
+                    '_etag']:
             return getattr(self, name)
         else:
             return _return_data_array(
@@ -0,0 +1,95 @@
+"""
+    Allows the client to queue operations and send them to the server in
+    a single request.
+"""
+from slumber._caches import PER_THREAD
+from slumber.connector.ua import post
+
+
+class BatchError(Exception):
+    """Raised when the result of an operation in a batch is used, but the
+    operation failed or hasn't been run yet.
+    """
+    pass
+
+
+class BatchResult(object):
+    """The result of an operation that has been queued in a batch. The
+    value is available once the batch has been sent.
+    """
+    def __init__(self, handler):
+        self._handler = handler
+        self._value = None
+        self.status = None
+        self.json = None
+
+    def _complete(self, status, json):
+        """Record the response from the server. The handler is run straight
+        away as it also updates the client caches.
+        """
+        self.status, self.json = status, json
+        if status == 200:
+            self._value = self._handler(json)
+
+    @property
+    def value(self):
+        """The value the connector method would have returned if it had
+        not been batched.
+        """
+        if self.status is None:
+            raise BatchError("The batch has not been sent")
+        elif self.status != 200:
+            raise BatchError("The operation failed", self.status, self.json)
+        return self._value
+
+
+class Batch(object):
+    """A context manager that queues the write operations made through the
+    model connectors and sends them all when the block ends. Only writes
+    are queued. Reads made inside the block are still sent straight away.
+    """
+    def __init__(self, url, atomic=False):
+        self.url = url
+        self.atomic = atomic
+        self.committed = None
+        self._queue = []
+
+    def __enter__(self):
+        assert getattr(PER_THREAD, 'batch', None) is None, \
+            "Batches cannot be nested"
+        PER_THREAD.batch = self
+        return self
+
+    def __exit__(self, exc_type, _exc_value, _traceback):
+        PER_THREAD.batch = None
+        if exc_type is None:
+            self.send()
+
+    def queue(self, url, data, handler=lambda json: json,
+            method='POST', headers=None):
+        """Queue an operation and return its `BatchResult`. The handler is
+        given the response JSON to work out the result's value.
+        """
+        result = BatchResult(handler)
+        self._queue.append((dict(uri=url, method=method, body=data,
+            headers=headers or {}), result))
+        return result
+
+    def send(self):
+        """Send the queued operations to the server.
+        """
+        queued, self._queue = self._queue, []
+        if not queued:
+            return
+        _, json = post(self.url, dict(atomic=self.atomic,
+            operations=[invocation for invocation, _ in queued]))
+        self.committed = json.get('committed', True)
+        for (_, result), response in zip(queued, json['results']):
+            status = response['_meta']['status']
+            if not self.committed:
+                # Nothing was written so nothing that was returned holds
+                status = 409
+            result._complete(status, response)
+        for _, result in queued[len(json['results']):]:
+            # These weren't run because an earlier operation failed
+            result._complete(409, None)
@@ -10,3 +10,11 @@ MODEL_PROXIES = {
 INSTANCE_PROXIES = {
     }
 
+
+
+INSTANCE_CACHE_TTL = {
+    }
+
+
+REPLICAS = {
+    }
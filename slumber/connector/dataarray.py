@@ -0,0 +1,158 @@
+"""
+    Lazy sequences for the data arrays of remote instances.
+"""
+from urllib import urlencode
+from urlparse import urljoin
+
+from slumber._caches import MODEL_URL_TO_SLUMBER_MODEL
+from slumber.connector.json import page_items
+from slumber.connector.prefetch import fetch_json, fetch_later
+
+
+def aggregate_json(json):
+    """Return the value of an aggregate from the server's response. A
+    grouped aggregate is returned as a dict.
+    """
+    if json.has_key('groups'):
+        return dict([(key, value) for key, value in json['groups']])
+    return json['value']
+
+
+def first_page_url(url):
+    """Return the URL of the first page of the data array, which asks for
+    the compact column format.
+    """
+    return url + ('&' if '?' in url else '?') + 'format=columns'
+
+
+class DataArray(object):
+    """A data array whose pages are only fetched as the items on them are
+    needed. Whilst one page is being used the next one is fetched in the
+    background if it comes from a remote service.
+
+    Iterating streams the pages without keeping them. Only the items that
+    have been looked up by index are kept.
+    """
+    def __init__(self, base_url, url, cache_ttl, first_page=None):
+        self._base_url = base_url
+        self._url = urljoin(base_url, url)
+        self._cache_ttl = cache_ttl
+        # The first page may have been fetched along with the instance
+        self._first_page = first_page
+        self._count = None if first_page is None else first_page.get('count')
+        # The items fetched for indexing and the page that follows them
+        self._items = []
+        self._next_page = first_page_url(self._url)
+        self._pending = None
+
+    def _page(self, json):
+        """Return the items on the page, noting the count if it is given.
+        """
+        from slumber.connector.api import get_instance
+        if json.has_key('count'):
+            self._count = json['count']
+        return [get_instance(MODEL_URL_TO_SLUMBER_MODEL[type_url],
+                data, display, fields)
+            for type_url, _, display, data, fields in page_items(
+                self._base_url, json)]
+
+    def _fetch_page(self, url, pending):
+        """Return the page at the URL, which may already be being fetched.
+        """
+        if self._first_page is not None and url == first_page_url(self._url):
+            return self._first_page
+        return pending.get() if pending else fetch_json(url, self._cache_ttl)
+
+    def _read_ahead(self, json):
+        """Return the URL of the page after this one and the pending fetch
+        of it, or None for both if this is the last page.
+        """
+        if not json.has_key('next_page'):
+            return None, None
+        url = urljoin(self._base_url, json['next_page'])
+        return url, fetch_later(fetch_json, (url, self._cache_ttl))
+
+    def _pages(self):
+        """Yield the items on each of the pages in turn.
+        """
+        url, pending = first_page_url(self._url), None
+        while url:
+            json = self._fetch_page(url, pending)
+            url, pending = self._read_ahead(json)
+            yield self._page(json)
+
+    def _fetch_next(self):
+        """Add the next page of items. Returns False if there isn't one.
+        """
+        if self._next_page is None:
+            return False
+        json = self._fetch_page(self._next_page, self._pending)
+        self._next_page, self._pending = self._read_ahead(json)
+        self._items.extend(self._page(json))
+        return True
+
+    def _fetch_to(self, index):
+        """Make sure the items up to the index have been fetched.
+        """
+        while len(self._items) <= index and self._fetch_next():
+            pass
+
+    def __len__(self):
+        if self._count is None and self._first_page is None \
+                and not self._items:
+            # The server can give the count without any of the items
+            self._count = fetch_json(self._url + '?page_size=0',
+                self._cache_ttl).get('count')
+        if self._count is None and self._next_page is None:
+            self._count = len(self._items)
+        elif self._count is None:
+            # Older servers don't give the count, so we have to count all
+            # of the items
+            count = 0
+            for page in self._pages():
+                if self._count is not None:
+                    return self._count
+                count += len(page)
+            self._count = count
+        return self._count
+
+    def __iter__(self):
+        for page in self._pages():
+            for item in page:
+                yield item
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if (index.step or 1) > 0 and (index.start or 0) >= 0 and \
+                    (index.stop is None or index.stop >= 0):
+                # Only the pages up to the end of the slice are needed
+                if index.stop is None:
+                    while self._fetch_next():
+                        pass
+                else:
+                    self._fetch_to(index.stop - 1)
+                return self._items[index]
+            start, stop, step = index.indices(len(self))
+            self._fetch_to(max(start, stop))
+            return [self._items[i] for i in xrange(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        self._fetch_to(index)
+        if index < 0 or index >= len(self._items):
+            raise IndexError(index)
+        return self._items[index]
+
+    def aggregate(self, function, field, group_by=None):
+        """Return the aggregate (one of avg, max, min or sum) of the field
+        across the items, computed by the server. If group_by is given
+        then a dict of the aggregate for each value of that field is
+        returned.
+        """
+        params = dict(function=function, field=field)
+        if group_by:
+            params['group_by'] = group_by
+        return aggregate_json(fetch_json(
+            self._url + '?' + urlencode(params), self._cache_ttl))
+
+    def __repr__(self):
+        return '<DataArray %s>' % self._base_url
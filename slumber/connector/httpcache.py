@@ -0,0 +1,174 @@
+"""
+    A two tier cache for the responses to GET requests made by the user
+    agent. The first tier is held within the process and the second is the
+    Django cache, which is normally shared between processes.
+
+    Optionally a host wide tier held in a memory mapped file can be placed
+    between the two. See slumber/connector/sharedcache.py.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from hashlib import sha1
+from httplib2 import Response
+import logging
+import threading
+import time
+import zlib
+
+from slumber._caches import PER_THREAD
+from slumber.connector.json import parse_json
+from slumber.connector.lru import LRUCache
+from slumber.connector.sharedcache import SharedCache
+
+
+# The response headers that are kept along with the cached responses
+CACHED_HEADERS = ['content-type', 'etag', 'last-modified']
+
+# The in-process tier. The values are tuples of the URL, expiry time,
+# status, headers, parsed JSON and the size of the original content
+LOCAL = LRUCache(
+    getattr(settings, 'SLUMBER_RESPONSE_CACHE_SIZE', 500),
+    getattr(settings, 'SLUMBER_RESPONSE_CACHE_BYTES', 4 * 1024 * 1024),
+    lambda value: value[5])
+
+# The host wide tier, which is opened when first needed. It is False if it
+# couldn't be opened, in which case it isn't used again by this process
+SHARED = None
+_SHARED_LOCK = threading.Lock()
+
+# The number of seconds that the record of when a URL was last invalidated
+# is kept in the Django cache. Responses must not be cached for longer
+INVALIDATION_TTL = 7 * 24 * 60 * 60
+
+# Hit and miss counts for each of the tiers
+STATISTICS = dict(
+    l1=dict(hits=0, misses=0),
+    shared=dict(hits=0, misses=0),
+    l2=dict(hits=0, misses=0))
+
+
+def _shared():
+    """Return the host wide tier, or None if it isn't configured.
+    """
+    # We need the global so the file is only opened once
+    # pylint: disable = global-statement
+    global SHARED
+    path = getattr(settings, 'SLUMBER_SHARED_CACHE_FILE', None)
+    if path and SHARED is None:
+        with _SHARED_LOCK:
+            if SHARED is None:
+                try:
+                    SHARED = SharedCache(path,
+                        getattr(settings, 'SLUMBER_SHARED_CACHE_SLOTS', 4096),
+                        getattr(settings,
+                            'SLUMBER_SHARED_CACHE_SLOT_SIZE', 4096))
+                except (ValueError, EnvironmentError):
+                    logging.exception(
+                        "Could not open the shared cache %s, "
+                        "it won't be used", path)
+                    SHARED = False
+    return SHARED or None
+
+
+def _count(tier, found):
+    """Record a hit or a miss against the tier.
+    """
+    STATISTICS[tier]['misses' if found is None else 'hits'] += 1
+
+
+def _selected_headers(response):
+    """Return the headers from the response that are to be cached.
+    """
+    if not hasattr(response, 'get'):
+        return {}
+    return dict([(h, response[h]) for h in CACHED_HEADERS if response.get(h)])
+
+
+def response_cache_key(url, headers):
+    """Return the cache key for a GET of the URL. The key includes the
+    user the request is signed for and the Accept header. It is hashed so
+    that it is always short enough for memcached.
+    """
+    parts = [url, getattr(PER_THREAD, 'username', None) or '',
+        headers.get('Accept', '')]
+    return 'slumber.connector.ua.get.' + sha1('\n'.join(
+        [p.encode('utf-8') if isinstance(p, unicode) else p
+            for p in parts])).hexdigest()
+
+
+def _invalidation_key(url):
+    """Return the Django cache key that records when the URL was last
+    invalidated.
+    """
+    return 'slumber.connector.ua.invalidated.' + sha1(
+        url.encode('utf-8') if isinstance(url, unicode) else url).hexdigest()
+
+
+def shared_cache_key(key, url):
+    """Return the key that the response is stored under in the tiers that
+    are shared with other processes. It changes whenever the URL is
+    invalidated so that one invalidation reaches every user's responses.
+    """
+    return '%s.%s' % (key, cache.get(_invalidation_key(url)) or '')
+
+
+def lookup_response(key, url):
+    """Return the cached response and JSON for the key, or None if there
+    isn't one in any of the tiers.
+    """
+    entry = LOCAL.get(key)
+    _count('l1', entry)
+    if entry is None:
+        stored, shared = None, _shared()
+        key_shared = shared_cache_key(key, url)
+        if shared:
+            stored = shared.get(key_shared)
+            _count('shared', stored)
+        if stored is None:
+            stored = cache.get(key_shared)
+            _count('l2', stored)
+            if stored is None:
+                return None
+            if shared:
+                shared.set(key_shared, stored, stored[1] - time.time())
+        url, expires, status, headers, compressed = stored
+        content = zlib.decompress(compressed)
+        entry = (url, expires, status, headers, parse_json(content),
+            len(content))
+        LOCAL.set(key, entry, max(expires - time.time(), 0))
+    _, _, status, headers, json, _ = entry
+    response = Response(dict(headers, status=status))
+    response.from_cache = True
+    return response, json
+
+
+def store_response(key, url, response, content, json, ttl):
+    """Store the response in all of the tiers for ttl seconds.
+    """
+    ttl = min(ttl, INVALIDATION_TTL)
+    expires = time.time() + ttl
+    headers = _selected_headers(response)
+    LOCAL.set(key,
+        (url, expires, response.status, headers, json, len(content)), ttl)
+    stored = (url, expires, response.status, headers, zlib.compress(content))
+    key = shared_cache_key(key, url)
+    shared = _shared()
+    if shared:
+        shared.set(key, stored, ttl)
+    cache.set(key, stored, ttl)
+
+
+def invalidate_response(url):
+    """Remove the cached responses for the URL for all users. They are
+    removed from the local tier, and the keys for the other tiers are
+    changed so that the responses there are no longer found, including in
+    other processes.
+    """
+    LOCAL.delete_matching(lambda _, value: value[0] == url)
+    cache.set(_invalidation_key(url), '%.6f' % time.time(), INVALIDATION_TTL)
+
+
+def statistics():
+    """Return a copy of the hit and miss counts for each tier.
+    """
+    return dict([(tier, dict(counts)) for tier, counts in STATISTICS.items()])
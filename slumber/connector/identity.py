@@ -0,0 +1,113 @@
+"""
+    A process wide identity map for the instance connectors used by the
+    client. This allows instance data to be re-used across requests (and
+    outside of requests altogether) for models that are configured with a
+    cache time-to-live.
+"""
+import threading
+import time
+from weakref import WeakValueDictionary
+
+from django.conf import settings
+
+from slumber.connector.configuration import INSTANCE_CACHE_TTL
+from slumber.connector.lru import LRUCache
+from slumber.scheme import from_slumber_scheme
+
+
+def instance_cache_ttl(model_url):
+    """Return the number of seconds that instances of the model may be
+    held in the process wide instance cache.
+    """
+    for type_url, ttl in INSTANCE_CACHE_TTL.items():
+        if model_url and model_url.endswith(type_url):
+            return ttl
+    return getattr(settings, 'SLUMBER_INSTANCE_CACHE_TTL', 0)
+
+
+class IdentityMap(object):
+    """Maps canonical instance URLs to the connector for that instance.
+
+    Recently used connectors are held in a bounded LRU cache. Connectors
+    that have been evicted from it, but that are still referenced by live
+    instance proxies, continue to be found through weak references until
+    they expire.
+    """
+    def __init__(self, max_entries):
+        self._recent = LRUCache(max_entries)
+        self._live = WeakValueDictionary()
+        self._lock = threading.RLock()
+        self.listeners = []
+
+    def get(self, url):
+        """Return the connector for the instance URL if there is an
+        unexpired one available.
+        """
+        url = from_slumber_scheme(url)
+        connector = self._recent.get(url)
+        if connector is None:
+            with self._lock:
+                connector = self._live.get(url)
+                if connector is not None:
+                    remaining = connector._expires - time.time()
+                    if remaining > 0:
+                        self._recent.set(url, connector, remaining)
+                    else:
+                        del self._live[url]
+                        connector = None
+        return connector
+
+    def put(self, url, connector, model_url=None, ttl=None):
+        """Store the connector for the instance URL using the time-to-live
+        for its model, or the one given if the model isn't to be cached.
+        Otherwise nothing is stored.
+        """
+        ttl = instance_cache_ttl(model_url) or ttl
+        if ttl:
+            url = from_slumber_scheme(url)
+            connector._expires = time.time() + ttl
+            connector._model_url = model_url
+            with self._lock:
+                self._recent.set(url, connector, ttl)
+                self._live[url] = connector
+
+    def connectors(self):
+        """Return the URLs and connectors that are still in use, including
+        those that have expired.
+        """
+        with self._lock:
+            return self._live.items()
+
+    def invalidate(self, url):
+        """Forget the connector for the instance URL.
+        """
+        url = from_slumber_scheme(url)
+        with self._lock:
+            self._recent.delete(url)
+            self._live.pop(url, None)
+        for listener in self.listeners:
+            listener(url)
+
+    def invalidate_model(self, model_url):
+        """Forget all of the connectors for instances of the model.
+        """
+        matches = lambda c: getattr(c, '_model_url', None) == model_url
+        with self._lock:
+            urls = [u for u, c in self._live.items() if matches(c)]
+            self._recent.delete_matching(lambda _, c: matches(c))
+            for url in urls:
+                self._live.pop(url, None)
+        for url in urls:
+            for listener in self.listeners:
+                listener(url)
+
+    def clear(self):
+        """Forget all connectors.
+        """
+        with self._lock:
+            self._recent.clear()
+            self._live.clear()
+
+
+INSTANCES = IdentityMap(
+    getattr(settings, 'SLUMBER_INSTANCE_CACHE_SIZE', 1000))
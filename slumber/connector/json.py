@@ -1,6 +1,8 @@
 """
     Implements the JSON formatting for both the client and the server.
 """
+from simplejson import JSONDecodeError, loads
+from urllib import quote
 from urlparse import urljoin
 
 
@@ -20,3 +22,48 @@ def from_json_data(base_url, json):
             return get_instance(get_model(model_url), data_url, display)
     else:
         return json['data']
+
+
+def page_length(json):
+    """Return the number of items on a page of an instance list or data
+    array.
+    """
+    if json.has_key('columns'):
+        return len(json['columns']['pk'])
+    return len(json['page'])
+
+
+def page_items(base_url, json):
+    """Yield a (type, pk, display, data, fields) tuple for each of the items
+    on a page of an instance list or data array, which may be in either the
+    object or the column format. The type and data URLs are absolute and
+    the fields only hold the values that the page was sent with.
+    """
+    if not json.has_key('columns'):
+        for obj in json['page']:
+            type_url = obj.get('type')
+            yield (type_url and urljoin(base_url, type_url), obj.get('pk'),
+                obj['display'], urljoin(base_url, obj['data']), {})
+        return
+    columns, meta = json['columns'], json.get('fields', {})
+    type_url = json.get('type') and urljoin(base_url, json['type'])
+    for index, pk in enumerate(columns['pk']):
+        if columns.has_key('data'):
+            data = columns['data'][index]
+        else:
+            data = json['data'].replace('{pk}',
+                quote(unicode(pk).encode('utf-8')))
+        yield (type_url, pk, columns['display'][index],
+            urljoin(base_url, data),
+            dict([(name, from_json_data(base_url,
+                    dict(meta[name], data=columns[name][index])))
+                for name in meta.keys()]))
+
+
+def parse_json(content):
+    """Parse the body of a response, giving an empty dict if it isn't JSON.
+    """
+    try:
+        return loads(content)
+    except JSONDecodeError:
+        return {}
@@ -0,0 +1,99 @@
+"""
+    A small thread safe LRU cache with per entry expiry used by the client
+    side caches.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache(object):
+    """A bounded mapping. Entries expire after their time to live and once
+    the cache is full the least recently used entries are evicted.
+
+    The cache can also be bounded by the total size of the values stored
+    in it, in which case a `sizeof` function must be given.
+    """
+    def __init__(self, max_entries, max_size=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._sizeof = sizeof or (lambda _: 0)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    @property
+    def size(self):
+        """The total size of the values currently stored.
+        """
+        return self._size
+
+    def get(self, key, default=None):
+        """Return the value for the key, or the default if the key is
+        not present or has expired.
+        """
+        with self._lock:
+            entry = self._pop(key)
+            if entry is None:
+                return default
+            expires, value, size = entry
+            if expires < time.time():
+                return default
+            # Re-insert so that this is now the most recently used entry
+            self._entries[key] = entry
+            self._size += size
+            return value
+
+    def set(self, key, value, ttl):
+        """Store the value for the specified number of seconds.
+        """
+        if not ttl or self.max_entries <= 0:
+            return
+        size = self._sizeof(value)
+        if self.max_size is not None and size > self.max_size:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.time() + ttl, value, size)
+            self._size += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_size is not None and self._size > self.max_size):
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def delete(self, key):
+        """Remove the key from the cache if it is present.
+        """
+        with self._lock:
+            self._pop(key)
+
+    def delete_matching(self, predicate):
+        """Remove all of the entries for which the predicate, which is
+        passed the key and the value, is true.
+        """
+        with self._lock:
+            for key in [k for k, (_, v, _) in self._entries.items()
+                    if predicate(k, v)]:
+                self._pop(key)
+
+    def clear(self):
+        """Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _pop(self, key):
+        """Remove and return the entry for the key, keeping the total size
+        up to date. The lock must already be held.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+        return entry
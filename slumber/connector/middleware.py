@@ -3,7 +3,10 @@
 """
 import logging
 
+from django.conf import settings
+
 from slumber._caches import PER_THREAD
+from slumber.connector.api import save_pending
 
 
 # Django defines the class members as methods
@@ -11,8 +14,16 @@ from slumber._caches import PER_THREAD
 
 
 class Cache(object):
-    """This middleware flushes the Slumber client cache at the start
-    of each request.
+    """This middleware adds a per-request instance cache at the start of
+    each request and throws it away at the end.
+
+    The per-request cache sits on top of the process wide instance cache
+    and makes sure that all of the proxies for an instance within the
+    request see the same data.
+
+    If the SLUMBER_SAVE_AT_END_OF_REQUEST setting is True then changes
+    made to instances during the request are saved at the end of it,
+    unless the response is an error.
     """
 
     def process_request(self, _request):
@@ -20,12 +31,19 @@ class Cache(object):
         """
         logging.info("PER_THREAD instance cache created")
         PER_THREAD.cache = type('cache', (dict,), {})()
+        PER_THREAD.pending_writes = [] if getattr(settings,
+            'SLUMBER_SAVE_AT_END_OF_REQUEST', False) else None
 
     def process_response(self, _request, response):
         """Turn the cache off again at the end of the request and flush it.
         """
-        delattr(PER_THREAD, 'cache')
-        logging.info("PER_THREAD instance cache removed")
+        try:
+            if getattr(response, 'status_code', 500) < 400:
+                save_pending()
+        finally:
+            PER_THREAD.pending_writes = None
+            delattr(PER_THREAD, 'cache')
+            logging.info("PER_THREAD instance cache removed")
         return response
 
 
@@ -0,0 +1,77 @@
+"""
+    Listens for the change notifications from a service and removes the
+    instances that have changed from the client caches.
+"""
+import logging
+import threading
+from urllib import urlencode
+from urlparse import urljoin
+
+from slumber._caches import PER_THREAD
+from slumber.connector.api import invalidate_instances
+from slumber.connector.ua import get
+
+
+class Listener(object):
+    """Long polls a service's notifications operation and invalidates the
+    instances that it says have changed.
+    """
+    # How long to wait before polling again after a failure
+    RETRY_DELAY = 5
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.cursor = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def poll(self, timeout=None):
+        """Wait up to timeout seconds for changes and invalidate the changed
+        instances. Returns their URLs. The first poll only finds where the
+        notifications start from.
+        """
+        if self.cursor is None:
+            qs = {}
+        else:
+            qs = dict(after=self.cursor,
+                timeout=self.timeout if timeout is None else timeout)
+        _, json = get(self.url + ('?' + urlencode(qs) if qs else ''))
+        urls = [urljoin(self.url, url) for url in json['urls']]
+        invalidate_instances(urls)
+        self.cursor = json['cursor']
+        return urls
+
+    def _listen(self, username):
+        """Poll until told to stop.
+        """
+        PER_THREAD.username = username
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+            except Exception: # pylint: disable=W0703
+                logging.exception("Polling %s for notifications failed",
+                    self.url)
+                self._stopping.wait(self.RETRY_DELAY)
+
+    def start(self):
+        """Start listening in a background thread, which makes its requests
+        for the user that this thread is making requests for. Where the
+        notifications start from is found first so no changes are missed.
+        """
+        assert self._thread is None, "The listener is already running"
+        if self.cursor is None:
+            self.poll()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen,
+            args=(getattr(PER_THREAD, 'username', None),))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening once the current poll has finished.
+        """
+        self._stopping.set()
+        self._thread, thread = None, self._thread
+        return thread
@@ -0,0 +1,95 @@
+"""
+    Runs fetches from remote services in parallel using a bounded pool of
+    threads.
+"""
+from django.conf import settings
+from django.db import connection
+from httplib2 import Http
+from multiprocessing.pool import ThreadPool
+import threading
+
+from slumber._caches import PER_THREAD
+from slumber.connector.ua import _use_fake, get
+
+
+# The pool is created when it's first needed
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _start_thread():
+    """Give each pool thread an Http object of its own so that the
+    connections it opens are kept alive between fetches.
+    """
+    PER_THREAD.http = Http(disable_ssl_certificate_validation=True)
+
+
+def _pool():
+    """Return the thread pool, creating it if necessary.
+    """
+    # We need the global so there is only ever one pool
+    # pylint: disable = global-statement
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPool(
+                getattr(settings, 'SLUMBER_PREFETCH_THREADS', 4),
+                _start_thread)
+        return _POOL
+
+
+def _call(work):
+    """Run a task in a pool thread signing the requests for the user that
+    the calling thread is making requests for. Any database connection
+    the task opened, for example to read a replica, is closed afterwards
+    as nothing else would close it.
+    """
+    username, function, task = work
+    previous = getattr(PER_THREAD, 'username', None)
+    PER_THREAD.username = username
+    try:
+        return function(*task)
+    finally:
+        PER_THREAD.username = previous
+        connection.close()
+
+
+def fetch_json(url, cache_ttl):
+    """Return the JSON at the URL. Used for the fetches that are made in
+    the background.
+    """
+    _, json = get(url, cache_ttl)
+    return json
+
+
+def fetch_all(function, tasks):
+    """Call the function with the arguments from each task, the first of
+    which must be a URL, and return the results in the same order.
+
+    Tasks for remote URLs are run in the thread pool. Local URLs are
+    handled by the fake HTTP client, which must use this thread's database
+    connection, so those tasks are run here whilst the pool is busy.
+    """
+    username = getattr(PER_THREAD, 'username', None)
+    results = [None] * len(tasks)
+    remote = [i for i, task in enumerate(tasks) if not _use_fake(task[0])]
+    pending = _pool().map_async(_call,
+        [(username, function, tasks[i]) for i in remote]) if remote else None
+    for i in set(range(len(tasks))) - set(remote):
+        results[i] = function(*tasks[i])
+    if pending:
+        for i, result in zip(remote, pending.get()):
+            results[i] = result
+    return results
+
+
+def fetch_later(function, task):
+    """Start calling the function with the arguments from the task, the
+    first of which must be a URL, in the thread pool and return the pending
+    result. Returns None for local URLs, which must be fetched when they're
+    needed in the thread that needs them.
+    """
+    if _use_fake(task[0]):
+        return None
+    return _pool().apply_async(_call,
+        ((getattr(PER_THREAD, 'username', None), function, task),))
@@ -0,0 +1,207 @@
+"""
+    An optional host wide tier for the response cache. It is held in a
+    memory mapped file so it is shared by all of the worker processes on a
+    machine and survives them being restarted.
+
+    The file is split into sets of slots and each key is stored in one of
+    the slots of the set its hash selects. Readers don't take any locks.
+    Instead each slot has a sequence number which writers make odd whilst
+    they change the slot, and readers retry if it changes underneath them.
+    Writers lock the file and, when a set is full, choose which slot to
+    re-use with the clock algorithm.
+
+    The layout of the file is part of its name. Other processes may still
+    have a file mapped, so one is never resized once it has been set up.
+    Changing the slot settings starts a new file instead.
+"""
+from contextlib import contextmanager
+from hashlib import sha1
+import marshal
+import mmap
+import os
+import struct
+import threading
+import time
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+
+
+_MAGIC = 'SLUMBERC'
+_VERSION = 1
+
+# Magic, version, number of slots, slot size and the clock hand
+_HEADER = struct.Struct('<8sIIII')
+_HEADER_SIZE = 64
+
+# Sequence number, key digest, expiry time, payload length and whether the
+# slot has been referenced since the clock hand last passed it
+_SLOT = struct.Struct('<Q20sdIB')
+_SEQUENCE = struct.Struct('<Q')
+_REFERENCED = 40
+_PAYLOAD = 48
+
+# The number of slots in each set
+WAYS = 8
+
+_EMPTY_KEY = '\0' * 20
+
+
+class SharedCache(object):
+    """A fixed size cache held in a memory mapped file.
+    """
+    def __init__(self, path, slots=4096, slot_size=4096):
+        assert fcntl, "The shared cache needs fcntl file locking"
+        assert slot_size > _PAYLOAD, "The slot size is too small"
+        self.slots = max(WAYS, slots - slots % WAYS)
+        self.slot_size = slot_size
+        self.path = '%s.%s-%s-%s' % (path, _VERSION, self.slots, slot_size)
+        self._lock = threading.RLock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0600)
+        size = _HEADER_SIZE + self.slots * self.slot_size
+        with self._locked():
+            if os.fstat(self._fd).st_size == 0:
+                # Nobody can have mapped an empty file
+                os.ftruncate(self._fd, size)
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, _HEADER.pack(
+                    _MAGIC, _VERSION, self.slots, self.slot_size, 0))
+            valid = self._valid(size)
+            if valid:
+                self._map = mmap.mmap(self._fd, size)
+        if not valid:
+            os.close(self._fd)
+            raise ValueError("%s is not a shared cache with this layout" %
+                self.path)
+
+    def _valid(self, size):
+        """Return True if the file already holds a cache with the same
+        layout as this one.
+        """
+        if os.fstat(self._fd).st_size != size:
+            return False
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        header = os.read(self._fd, _HEADER.size)
+        magic, version, slots, slot_size, _ = _HEADER.unpack(header)
+        return (magic, version, slots, slot_size) == \
+            (_MAGIC, _VERSION, self.slots, self.slot_size)
+
+    @contextmanager
+    def _locked(self):
+        """Lock out other writers in this process and others.
+        """
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _set_offsets(self, digest):
+        """Return the offsets of the slots in the set for the key digest.
+        """
+        number = struct.unpack('<I', digest[:4])[0] % (self.slots / WAYS)
+        first = _HEADER_SIZE + number * WAYS * self.slot_size
+        return [first + way * self.slot_size for way in range(WAYS)]
+
+    def _read(self, offset, digest):
+        """Read the payload from the slot if it holds the key. Returns None
+        if it doesn't, or if the slot keeps changing whilst being read.
+        """
+        for _ in range(3):
+            sequence, key, expires, length, _ = \
+                _SLOT.unpack_from(self._map, offset)
+            if sequence % 2:
+                continue
+            if key != digest:
+                return None
+            payload = self._map[offset + _PAYLOAD:offset + _PAYLOAD + length]
+            if _SEQUENCE.unpack_from(self._map, offset)[0] == sequence:
+                return expires, payload
+        return None
+
+    def get(self, key):
+        """Return the value stored for the key, or None.
+        """
+        digest = sha1(key).digest()
+        for offset in self._set_offsets(digest):
+            found = self._read(offset, digest)
+            if found:
+                expires, payload = found
+                if expires < time.time():
+                    return None
+                self._map[offset + _REFERENCED] = '\1'
+                return marshal.loads(payload)
+        return None
+
+    def set(self, key, value, ttl):
+        """Store the value for ttl seconds. Values that are too large to fit
+        in a slot are not stored.
+        """
+        payload = marshal.dumps(value)
+        if ttl <= 0 or len(payload) > self.slot_size - _PAYLOAD:
+            return
+        digest = sha1(key).digest()
+        with self._locked():
+            offset = self._victim(self._set_offsets(digest), digest)
+            self._write(offset, digest, time.time() + ttl, payload)
+
+    def _victim(self, offsets, digest):
+        """Choose the slot that the key is to be written to. The lock must
+        already be held.
+        """
+        now = time.time()
+        headers = [_SLOT.unpack_from(self._map, o) for o in offsets]
+        for offset, (_, key, _, _, _) in zip(offsets, headers):
+            if key == digest:
+                return offset
+        for offset, (_, key, expires, _, _) in zip(offsets, headers):
+            if key == _EMPTY_KEY or expires < now:
+                return offset
+        header = _HEADER.unpack_from(self._map, 0)
+        hand = header[4]
+        while True:
+            offset = offsets[hand % WAYS]
+            hand += 1
+            if self._map[offset + _REFERENCED] == '\0':
+                break
+            self._map[offset + _REFERENCED] = '\0'
+        _HEADER.pack_into(self._map, 0, *(header[:4] + (hand % WAYS,)))
+        return offset
+
+    def _write(self, offset, digest, expires, payload):
+        """Write the slot, keeping its sequence number odd whilst doing so.
+        The lock must already be held.
+        """
+        sequence = _SEQUENCE.unpack_from(self._map, offset)[0]
+        # A writer that died part way through may have left this odd
+        sequence += sequence % 2
+        _SLOT.pack_into(self._map, offset,
+            sequence + 1, digest, expires, len(payload), 0)
+        self._map[offset + _PAYLOAD:offset + _PAYLOAD + len(payload)] = \
+            payload
+        _SEQUENCE.pack_into(self._map, offset, sequence + 2)
+
+    def delete(self, key):
+        """Remove the key from the cache.
+        """
+        digest = sha1(key).digest()
+        with self._locked():
+            for offset in self._set_offsets(digest):
+                if _SLOT.unpack_from(self._map, offset)[1] == digest:
+                    self._write(offset, _EMPTY_KEY, 0, '')
+
+    def clear(self):
+        """Remove everything from the cache.
+        """
+        with self._locked():
+            for slot in range(self.slots):
+                self._write(_HEADER_SIZE + slot * self.slot_size,
+                    _EMPTY_KEY, 0, '')
+
+    def close(self):
+        """Release the memory map and the file.
+        """
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,79 @@
+"""
+    Keeps the expanded directories of services in a local file so that a
+    new process can build its client without asking the services first.
+"""
+from contextlib import contextmanager
+import logging
+import os
+from simplejson import dumps, loads
+import tempfile
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+
+from django.conf import settings
+
+
+def snapshot_path():
+    """Return the path of the snapshot file, or None if there isn't one.
+    """
+    return getattr(settings, 'SLUMBER_SNAPSHOT', None)
+
+
+def _read(path):
+    """Return the expanded directories in the snapshot keyed by the
+    directory URL of their services.
+    """
+    try:
+        with open(path) as snapshot:
+            return loads(snapshot.read())
+    except (IOError, ValueError):
+        return {}
+
+
+def read_snapshot(directory):
+    """Return the expanded directory saved for the service, or None.
+    """
+    path = snapshot_path()
+    if not path or not os.path.exists(path):
+        return None
+    json = _read(path).get(directory)
+    if json is None:
+        logging.info("The snapshot %s has nothing for %s", path, directory)
+    return json
+
+
+@contextmanager
+def _locked(path):
+    """Lock out other writers of the snapshot in this process and others.
+    A separate lock file is used as the snapshot itself is replaced.
+    """
+    if fcntl is None: # pragma: no cover
+        yield
+        return
+    handle = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0600)
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(handle)
+
+
+def write_snapshot(directory, json):
+    """Save the expanded directory for the service. The file is replaced
+    in one step so that other processes never read it half written, and
+    writers take turns so that none of them lose another's service.
+    """
+    path = snapshot_path()
+    if not path:
+        return
+    with _locked(path):
+        services = _read(path)
+        services[directory] = dict([(k, v)
+            for k, v in json.items() if k != '_meta'])
+        handle, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(handle, 'w') as snapshot:
+            snapshot.write(dumps(services, separators=(',', ':')))
+        os.rename(temporary, path)
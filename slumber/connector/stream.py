@@ -0,0 +1,118 @@
+"""
+    Streams the instances of a remote model by following the pages of its
+    instance list.
+"""
+from urllib import urlencode
+from urlparse import urljoin
+
+from slumber.connector.json import page_items, page_length
+from slumber.connector.prefetch import fetch_json, fetch_later
+
+
+class InstanceStream(object):
+    """Iterates over the instances of a model. Only the page being used and
+    the one after it, which is fetched in the background if it comes from a
+    remote service, are held in memory. The pages are asked for in the
+    compact column format, along with the values of any fields named.
+    """
+    def __init__(self, model, page_size=None, filters=None, proxies=True,
+            ordering=None, fields=None):
+        # We need all of these arguments as they are all used
+        # pylint: disable=R0913
+        self._model = model
+        self._page_size = page_size
+        self._filters = filters or {}
+        self._proxies = proxies
+        self._ordering = ordering or []
+        self._fields = fields or []
+
+    def filter(self, **filters):
+        """Return a stream of the instances that also match the filters,
+        which must have been configured for the model on the server.
+        """
+        return InstanceStream(self._model, self._page_size,
+            dict(self._filters, **filters), self._proxies, self._ordering,
+            self._fields)
+
+    def order_by(self, *names):
+        """Return a stream that gives the instances in the order of the
+        fields, which must have been configured as orderings on the server.
+        Names starting with '-' give a descending order.
+        """
+        return InstanceStream(self._model, self._page_size, self._filters,
+            self._proxies, list(names), self._fields)
+
+    def _first_page(self):
+        """Return the URL for the first page of the instance list.
+        """
+        url = urljoin(self._model._url, self._model._operations['instances'])
+        qs = dict([(k, unicode(v).encode('utf-8'))
+            for k, v in self._filters.items()])
+        qs['format'] = 'columns'
+        if self._fields:
+            qs['fields'] = ','.join(self._fields)
+        if self._page_size:
+            qs['page_size'] = self._page_size
+        if self._ordering:
+            qs['order_by'] = ','.join(self._ordering)
+        return url + '?' + urlencode(qs)
+
+    def _item(self, pk, display, url, fields):
+        """Return the proxy or the (pk, display, url) tuple for an entry.
+        """
+        if self._proxies:
+            from slumber.connector.api import get_instance
+            return get_instance(self._model, url, display, fields)
+        return pk, display, url
+
+    def __iter__(self):
+        url = self._first_page()
+        json = fetch_json(url, 0)
+        while page_length(json):
+            next_page, pending = json.get('next_page'), None
+            if next_page:
+                next_page = urljoin(url, next_page)
+                pending = fetch_later(fetch_json, (next_page, 0))
+            for _, pk, display, data, fields in page_items(url, json):
+                yield self._item(pk, display, data, fields)
+            if not next_page:
+                return
+            url = next_page
+            json = pending.get() if pending else fetch_json(url, 0)
+
+
+class ChangeStream(object):
+    """Iterates over the changes to the instances of a model made after a
+    cursor, giving (kind, pk, url) tuples where the kind is one of created,
+    updated or deleted. The `cursor` is moved on as each page is used up
+    so it can be stored and used to start the next sync from. If the
+    service has pruned its change log past the cursor then there are no
+    changes, `expired` is set and the cursor is moved to the end of the log.
+    """
+    def __init__(self, model, cursor=0, page_size=None):
+        self._model = model
+        self.cursor = cursor
+        self._page_size = page_size
+        self.expired = False
+
+    def __iter__(self):
+        url = urljoin(self._model._url, self._model._operations['changes'])
+        qs = dict(after=self.cursor)
+        if self._page_size:
+            qs['page_size'] = self._page_size
+        url += '?' + urlencode(qs)
+        json = fetch_json(url, 0)
+        self.expired = json.get('expired', False)
+        while True:
+            next_page, pending = json.get('next_page'), None
+            if next_page:
+                next_page = urljoin(url, next_page)
+                pending = fetch_later(fetch_json, (next_page, 0))
+            for change in json['changes']:
+                yield (change['kind'], change['pk'],
+                    urljoin(url, change['data']))
+            self.cursor = json['cursor']
+            if not next_page:
+                return
+            url = next_page
+            json = pending.get() if pending else fetch_json(url, 0)
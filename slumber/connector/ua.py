@@ -3,27 +3,67 @@
     servers.
 """
 from django.conf import settings
-from django.core.cache import cache
 from django.test.client import Client as FakeClient, encode_multipart, \
     BOUNDARY
 from django.utils.http import urlencode
 
 from datetime import datetime
 from fost_authn.signature import fost_hmac_request_signature
-from httplib2 import Http
+from httplib2 import Http, Response
 import logging
-from simplejson import dumps, JSONDecodeError, loads
+from simplejson import dumps
 from urllib import urlencode
 from urlparse import parse_qs, urlparse
 
 from slumber._caches import PER_THREAD
+from slumber.connector.configuration import REPLICAS
+from slumber.connector.httpcache import lookup_response, \
+    response_cache_key, store_response
+from slumber.connector.json import parse_json
+from slumber.connector.lru import LRUCache
 from slumber.server import get_slumber_local_url_prefix
 
 
+# Status codes for which failed lookups are remembered
+_NEGATIVE_STATUSES = [404, 410]
+
+# Stores recent failed GETs so that repeated misses don't go upstream. It is
+# keyed on the URL and the user, as the response cache is
+NEGATIVE_CACHE = LRUCache(
+    getattr(settings, 'SLUMBER_NEGATIVE_CACHE_SIZE', 1000))
+
+
+def _negative_cache_ttl():
+    """Return the number of seconds that a failed lookup is remembered for.
+    """
+    return getattr(settings, 'SLUMBER_NEGATIVE_CACHE_TTL', 5)
+
+
+def _negative_cache_key(url):
+    """Return the key that a failed lookup of the URL by the current user
+    is remembered under.
+    """
+    return (url, getattr(PER_THREAD, 'username', None) or '')
+
+
+def flush_negative_cache(*prefixes):
+    """Forget failed lookups for URLs starting with any of the prefixes
+    given, or all of them if no prefixes are given.
+    """
+    if prefixes:
+        NEGATIVE_CACHE.delete_matching(
+            lambda key, _: key[0].startswith(prefixes))
+    else:
+        NEGATIVE_CACHE.clear()
+
+
 def _real():
-    """Don't check certificates when we use httplib2.
+    """Don't check certificates when we use httplib2. Threads that set up
+    their own Http object (the prefetch pool threads) use it so that their
+    connections are reused.
     """
-    return Http(disable_ssl_certificate_validation=True)
+    return getattr(PER_THREAD, 'http', None) or \
+        Http(disable_ssl_certificate_validation=True)
 
 
 def _parse_qs(url):
@@ -130,8 +170,16 @@ def _fake_http_headers(headers):
 
 
 def get(url, ttl=0, codes=None, headers=None):
-    """Perform a GET request against a Slumber server.
+    """Perform a GET request against a Slumber server. URLs of replicated
+    models are read from the local replica when it has them.
     """
+    if REPLICAS:
+        from slumber.replica import lookup
+        json = lookup(url)
+        if json is not None:
+            response = Response(dict(status=200))
+            response.from_cache = True
+            return response, json
     return _get(url, ttl, codes, headers)
 
 
@@ -153,11 +201,19 @@ def _get(url, ttl, codes, headers):
             return get(response['location'], ttl, codes)
         assert response.status_code in codes, \
             (url_fragment, response, response.content)
-        content = response.content
+        json = parse_json(response.content)
     else:
-        cache_key = 'slumber.connector.ua.get.%s' % url
-        cached = cache.get(cache_key)
-        if not cached:
+        cache_key = response_cache_key(url, headers)
+        missed = NEGATIVE_CACHE.get(_negative_cache_key(url))
+        cached = None if missed else lookup_response(cache_key, url)
+        if missed:
+            logging.debug("Negative cache hit for url %s", url)
+            response, content = missed
+            response.from_cache = True
+            assert response.status in codes, \
+                (url, response, content)
+            json = parse_json(content)
+        elif not cached:
             logging.debug("Cache miss for url %s with cache key %s",
                 url, cache_key)
             _, _, path, _, query, _ = urlparse(url)
@@ -167,34 +223,36 @@ def _get(url, ttl, codes, headers):
                     url, headers=headers)
                 if response.status in codes:
                     break
+            negative_ttl = _negative_cache_ttl()
+            if negative_ttl and response.status not in codes and \
+                    response.status in _NEGATIVE_STATUSES:
+                NEGATIVE_CACHE.set(_negative_cache_key(url),
+                    (response, content), negative_ttl)
             assert response.status in codes, \
                 (url, response, content)
+            json = parse_json(content)
             if ttl:
-                cache.set(cache_key, (response, content), ttl)
+                store_response(cache_key, url, response, content, json, ttl)
         else:
             logging.debug("Fetched %s from cache key %s", url, cache_key)
-            response, content = cached
-            response.from_cache = True
-    try:
-        return response, loads(content)
-    except JSONDecodeError:
-        return response, {}
+            response, json = cached
+    return response, json
 
 
-def post(url, data, codes=None):
+def post(url, data, codes=None, headers=None):
     """Perform a POST request against a Slumber server.
     """
-    return _post(url, data, codes)
+    return _post(url, data, codes, headers)
 
 
-def _post(url, data, codes):
+def _post(url, data, codes, headers):
     """Mockable version of the user agent post.
     """
     # Pylint gets confused by the urlparse return type
     # pylint: disable=E1101
     # Pylint gets confused by the fake HTTP client
     # pylint: disable=E1103
-    headers = dict(Accept='application/json')
+    headers = dict(headers or {}, Accept='application/json')
     body = dumps(data) if data else ''
     url_fragment = _use_fake(url)
     if url_fragment:
@@ -213,8 +271,5 @@ def _post(url, data, codes):
             headers = headers)
         assert response.status in (codes or [200]), \
             (url, response, content)
-    try:
-        return response, loads(content)
-    except JSONDecodeError:
-        return response, {}
+    return response, parse_json(content)
 
@@ -48,6 +48,12 @@ class ModelOperation(object):
             uri += '?' + urlencode(qs)
         return uri
 
+    def template(self):
+        """Return the URL of the operation for an instance with `{pk}`
+        standing in for the primary key.
+        """
+        return self('{pk}').replace(quote('{pk}'), '{pk}')
+
     def headers(self, retvalue, request, response):
         """Calculate and place extra headers needed for certain types of
         response.
@@ -0,0 +1,71 @@
+"""
+    Implements counts and aggregates that are computed in the database.
+"""
+try:
+    from django.db.models import Avg, Max, Min, Sum
+except ImportError: # pragma: no cover
+    # Aggregates arrived in Django 1.1
+    Avg = Max = Min = Sum = None
+
+from slumber.operations import ModelOperation
+from slumber.operations.selection import filtered
+from slumber.server import Forbidden
+from slumber.server.http import require_user
+
+
+# The aggregate functions that clients may ask for
+FUNCTIONS = dict(avg=Avg, max=Max, min=Min, sum=Sum) if Avg else {}
+
+# The query string parameters that describe the aggregate
+PARAMETERS = ['function', 'field', 'group_by']
+
+
+def aggregate(model, query, params):
+    """Return the response data for the aggregate described by the params
+    over the query set. Only the fields configured as aggregates for the
+    model may be aggregated, and they may only be grouped by the fields that
+    the model may be filtered or ordered by.
+    """
+    function, field = params.get('function'), params.get('field')
+    group_by = params.get('group_by')
+    if not FUNCTIONS.has_key(function):
+        raise Forbidden("Unknown aggregate function %s" % function)
+    if field not in model.aggregates:
+        raise Forbidden("Aggregating %s is not allowed" % field)
+    if not group_by:
+        return dict(value=query.aggregate(
+            value=FUNCTIONS[function](field))['value'])
+    if '__' in group_by or group_by not in model.filters + model.orderings:
+        raise Forbidden("Grouping by %s is not allowed" % group_by)
+    return dict(groups=[[row[group_by], row['value']]
+        for row in query.order_by(group_by).values(group_by).annotate(
+            value=FUNCTIONS[function](field))])
+
+
+class CountInstances(ModelOperation):
+    """Counts the instances of the model.
+    """
+    @require_user
+    def get(self, request, response, _appname, _modelname):
+        """Return the number of instances that match the filters in the
+        query string.
+        """
+        response['count'] = filtered(self.model,
+            self.model.model.objects.all(), request.GET).count()
+
+
+class AggregateInstances(ModelOperation):
+    """Aggregates a field across the instances of the model.
+    """
+    @require_user
+    def get(self, request, response, _appname, _modelname):
+        """Return the aggregate described by the `function`, `field` and
+        `group_by` in the query string over the instances that match the
+        rest of it, which are filters.
+        """
+        params = dict(request.GET.items())
+        filters = dict([(k, v) for k, v in params.items()
+            if k not in PARAMETERS])
+        response.update(aggregate(self.model,
+            filtered(self.model, self.model.model.objects.all(), filters),
+            params))
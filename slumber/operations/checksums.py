@@ -0,0 +1,109 @@
+"""
+    Implements the checksums over ranges of a model's instances that let a
+    client find where its copy of the model differs from the service's.
+"""
+from hashlib import sha1
+from simplejson import dumps
+
+from django.core.exceptions import ValidationError
+
+from slumber.operations import ModelOperation
+from slumber.server import Forbidden
+from slumber.server.http import require_user
+
+
+# The number of ranges that a range may be split into
+MAX_PARTS = 100
+
+
+def stored_fields(model):
+    """Return the names of the columns that the model's instances are
+    stored in, which are what the checksum for an instance covers.
+    """
+    return [field.attname for field in model.model._meta.fields]
+
+
+def row_checksum(values):
+    """Return the checksum for an instance given the values of its
+    stored fields in the order `stored_fields` gives them.
+    """
+    return sha1(dumps([None if v is None else unicode(v)
+        for v in values])).hexdigest()
+
+
+def range_checksum(checksums):
+    """Return the checksum for a range of instances given the checksums of
+    its instances in primary key order.
+    """
+    return sha1(''.join(checksums)).hexdigest()
+
+
+class ModelChecksums(ModelOperation):
+    """Returns checksums for ranges of the model's instances. The checksum
+    for an instance is taken from the values of its stored fields so the
+    instances are never loaded, and the rows are hashed as they're read.
+    """
+    def _bound(self, request, name):
+        """Return the primary key given as the range bound, or None.
+        """
+        if not request.GET.has_key(name):
+            return None
+        try:
+            return self.model.model._meta.pk.to_python(request.GET[name])
+        except (TypeError, ValueError, ValidationError):
+            raise Forbidden("The range bounds must be primary keys")
+
+    @require_user
+    def get(self, request, response, _appname, _modelname):
+        """Return the checksum for the instances with a primary key after
+        `after` and up to and including `upto`, split into `parts` smaller
+        ranges (16 by default) each with its own checksum. Once the range
+        has no more instances than it would be split into, the checksums
+        for the instances themselves are given instead.
+        """
+        after, upto = self._bound(request, 'after'), \
+            self._bound(request, 'upto')
+        try:
+            parts = int(request.GET.get('parts', 16))
+        except ValueError:
+            raise Forbidden("The number of parts must be a number")
+        if parts < 2 or parts > MAX_PARTS:
+            raise Forbidden("The number of parts must be between 2 and %s" %
+                MAX_PARTS)
+        query = self.model.model.objects.order_by('pk')
+        if after is not None:
+            query = query.filter(pk__gt=after)
+        if upto is not None:
+            query = query.filter(pk__lte=upto)
+        count = query.count()
+        if count <= parts:
+            data = self.model.operations['data']
+            response['rows'] = []
+        else:
+            response['ranges'] = []
+        # The range checksums are built up as the rows are read so that
+        # they never all need to be held at once
+        size = max((count + parts - 1) / parts, 1)
+        total, part, in_part, upto = sha1(), sha1(), 0, None
+        response['count'] = 0
+        fields = stored_fields(self.model)
+        pk_index = fields.index(self.model.model._meta.pk.attname)
+        for values in query.values_list(*fields).iterator():
+            checksum = row_checksum(values)
+            upto = values[pk_index]
+            total.update(checksum)
+            response['count'] += 1
+            if response.has_key('rows'):
+                response['rows'].append(
+                    dict(pk=upto, checksum=checksum, data=data(upto)))
+                continue
+            part.update(checksum)
+            in_part += 1
+            if in_part == size:
+                response['ranges'].append(dict(after=after, upto=upto,
+                    count=in_part, checksum=part.hexdigest()))
+                part, in_part, after = sha1(), 0, upto
+        if in_part:
+            response['ranges'].append(dict(after=after, upto=upto,
+                count=in_part, checksum=part.hexdigest()))
+        response['checksum'] = total.hexdigest()
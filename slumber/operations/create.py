@@ -3,6 +3,10 @@
 """
 from django.core.management.color import no_style
 from django.db import connection
+try:
+    from django.db.transaction import atomic
+except ImportError: # pragma: no cover
+    from django.db.transaction import commit_on_success as atomic
 
 from slumber.operations import ModelOperation
 from slumber.operations.instancedata import instance_data
@@ -10,6 +14,29 @@ from slumber.server.http import require_permission
 from slumber.server.json import to_json_data
 
 
+def _reset_sequence(model):
+    """Reset the sequence for the model's primary key. This is needed after
+    rows have been inserted with explicit primary keys.
+    """
+    reset_sequence_command_lines = connection.ops.sequence_reset_sql(
+        no_style(), [model])
+    if len(reset_sequence_command_lines) != 0:
+        connection.cursor().execute(';'.join(reset_sequence_command_lines))
+
+
+def _insert(model, instances):
+    """Insert the new instances with as few queries as the Django version
+    and model allow. Models whose changes are tracked are saved one at a
+    time as bulk inserts don't send the save signals.
+    """
+    if hasattr(model.objects, 'bulk_create') and not model._meta.parents \
+            and not model.slumber_model.changes_tracked:
+        model.objects.bulk_create(instances)
+    else:
+        for instance in instances:
+            instance.save()
+
+
 class CreateInstance(ModelOperation):
     """Allows for the creation of new instances.
     """
@@ -33,12 +60,9 @@ class CreateInstance(ModelOperation):
                 for k, v in request.POST.items()]))
             instance.save()
 
-            # Reset the sequence point in case there was a PK set
-            cursor = connection.cursor()
-            reset_sequence_command_lines = connection.ops.sequence_reset_sql(
-                no_style(), [self.model.model])
-            if len(reset_sequence_command_lines) != 0:
-                cursor.execute(';'.join(reset_sequence_command_lines))
+            if request.POST.has_key(key_name):
+                # Reset the sequence point as there was a PK set
+                _reset_sequence(self.model.model)
 
             instance_data(response, self.model, instance)
             response['pk'] = to_json_data(self.model, instance, key_name,
@@ -46,3 +70,38 @@ class CreateInstance(ModelOperation):
             response['created'] = created
 
         return do_create(self, request)
+
+
+class CreateInstances(ModelOperation):
+    """Allows for the creation of many new instances in one request.
+    """
+    # The number of rows inserted by each query
+    BATCH_SIZE = 500
+
+    def post(self, request, response, appname, modelname):
+        """Perform the object creation.
+        """
+        @require_permission('%s.add_%s' % (appname, modelname.lower()))
+        def do_create(_cls, request):
+            """Use an inner function so that we can generate a proper
+            permission name at run time.
+            """
+            model = self.model.model
+            key_names = set(
+                [model._meta.pk.name, model._meta.pk.attname, 'pk'])
+            objects = request.POST.get('objects', [])
+            instances = [model(**dict([(k, v) for k, v in obj.items()]))
+                for obj in objects]
+            # Older versions of Django can't use this as a context manager
+            @atomic
+            def insert():
+                """Insert all of the instances in one transaction.
+                """
+                for start in range(0, len(instances), self.BATCH_SIZE):
+                    _insert(model, instances[start:start + self.BATCH_SIZE])
+                if any(key_names.intersection(obj.keys()) for obj in objects):
+                    _reset_sequence(model)
+            insert()
+            response['created'] = len(instances)
+
+        return do_create(self, request)
@@ -1,8 +1,10 @@
 """
     Implements creation of an object.
 """
-from slumber.operations import InstanceOperation
-from slumber.server.http import require_permission
+from slumber.operations import InstanceOperation, ModelOperation
+from slumber.operations.instancedata import instance_data
+from slumber.operations.selection import selected_instances
+from slumber.server.http import prefers_representation, require_permission
 
 
 class DeleteInstance(InstanceOperation):
@@ -14,13 +16,35 @@ class DeleteInstance(InstanceOperation):
         # We need all of these arguments as they are all used
         # pylint: disable=R0913
         @require_permission('%s.delete_%s' % (appname, modelname.lower()))
-        def do_delete(_cls, _request):
+        def do_delete(_cls, request):
             """This inner function is used to allow us to build a correct
             permission name at run time based on the application and model
             names.
             """
             instance = self.model.model.objects.get(pk=pk)
+            if prefers_representation(request):
+                # This has to be done whilst the instance still has its pk
+                instance_data(response, self.model, instance)
             instance.delete()
             response['deleted'] = True
         return do_delete(self, request)
 
+
+class DeleteInstances(ModelOperation):
+    """Allows for the removal of all of the selected instances.
+    """
+    def post(self, request, response, appname, modelname):
+        """Perform the object deletion.
+        """
+        @require_permission('%s.delete_%s' % (appname, modelname.lower()))
+        def do_delete(_cls, request):
+            """This inner function is used to allow us to build a correct
+            permission name at run time based on the application and model
+            names.
+            """
+            query = selected_instances(self.model, request.POST)
+            # Django deletes related rows too, so count the selected rows
+            # before they are deleted
+            response['deleted'] = query.count()
+            query.delete()
+        return do_delete(self, request)
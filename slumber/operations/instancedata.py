@@ -1,7 +1,13 @@
 """
     Implements the server side for the instance operators.
 """
+from hashlib import sha1
+from simplejson import dumps
+
 from slumber.operations import InstanceOperation
+from slumber.operations.aggregate import aggregate
+from slumber.operations.instancelist import FORMAT_PARAMETERS, \
+    column_fields, page_columns, requested_page_size
 from slumber.server import get_slumber_root
 from slumber.server.http import require_user
 from slumber.server.json import to_json_data
@@ -30,6 +36,17 @@ def instance_data(into, model, instance):
             into['identity'] + '%s/' % field
 
 
+def instance_etag(data):
+    """Return an entity tag for the instance data. The client calculates
+    the same tag from the data it has been sent, so only the parts that
+    `instance_data` fills in are used.
+    """
+    keys = ['type', 'identity', 'display', 'operations', 'fields',
+        'data_arrays']
+    return sha1(dumps(dict([(k, data.get(k)) for k in keys]),
+        sort_keys=True)).hexdigest()
+
+
 class InstanceData(InstanceOperation):
     """Return the instance data.
     """
@@ -43,13 +60,20 @@ class InstanceData(InstanceOperation):
         else:
             self._get_instance_data(request, response, instance)
 
-    def _get_instance_data(self, _request, response, instance):
-        """Return the base field data for the instance.
+    def _get_instance_data(self, request, response, instance):
+        """Return the base field data for the instance. The operations are
+        left out if the query string has `operations=no`, as a client can
+        build them from the model's `instance_templates`.
         """
-        return instance_data(response, self.model, instance)
+        instance_data(response, self.model, instance)
+        if request.GET.get('operations') == 'no':
+            del response['operations']
 
     def _get_dataset(self, request, response, instance, dataset):
-        """Return one page of the array data.
+        """Return one page of the array data. A `page_size` of zero gives
+        just the count, a `format` of `columns` sends the page in the
+        compact column format, and a `function` and `field` give an
+        aggregate over the related instances instead.
         """
         root = get_slumber_root()
         response['instance'] = self(instance, dataset)
@@ -58,19 +82,41 @@ class InstanceData(InstanceOperation):
             query = getattr(instance, dataset + '_set')
         except AttributeError:
             query = getattr(instance, dataset)
+        if request.GET.has_key('function'):
+            response.update(aggregate(
+                query.model.slumber_model, query.all(), request.GET))
+            return
         query = query.order_by('-pk')
         if request.GET.has_key('start_after'):
             query = query.filter(pk__lt=request.GET['start_after'])
+        else:
+            # The first page also says how many items there are in total
+            response['count'] = query.count()
+        qs = dict([(k, request.GET[k].encode('utf-8'))
+            for k in FORMAT_PARAMETERS if request.GET.has_key(k)])
+        if request.GET.has_key('page_size'):
+            qs['page_size'] = size = requested_page_size(
+                request.GET['page_size'], 0)
+        else:
+            size = 10
 
-        response['page'] = []
-        for obj in query[:10]:
-            model = type(obj).slumber_model
-            response['page'].append(dict(
-                    type=root + model.path,
-                    pk=obj.pk, display=unicode(obj),
-                    data=model.operations['data'](obj)))
+        fields = None
+        if request.GET.has_key('format'):
+            related = query.model.slumber_model
+            fields = column_fields(related, request.GET)
+        objects = list(query[:size + 1]) if size else []
+        if fields is None:
+            response['page'] = []
+            for obj in objects[:size]:
+                model = type(obj).slumber_model
+                response['page'].append(dict(
+                        type=root + model.path,
+                        pk=obj.pk, display=unicode(obj),
+                        data=model.operations['data'](obj)))
+        else:
+            response['type'] = root + related.path
+            response.update(page_columns(related, objects[:size], fields))
 
-        if query.count() > len(response['page']):
+        if len(objects) > size:
             response['next_page'] = self(instance, dataset,
-                start_after=response['page'][-1]['pk'])
-
+                start_after=objects[size - 1].pk, **qs)
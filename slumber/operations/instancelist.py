@@ -1,11 +1,184 @@
 """
     Implements a listing of all instances for a given model.
 """
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from dougrain import Builder
+from simplejson import dumps, loads
+from urllib import quote
 
 from slumber.operations import ModelOperation
-from slumber.server import get_slumber_root
+from slumber.operations.selection import filtered, is_lookup
+from slumber.server import Forbidden, get_slumber_root
 from slumber.server.http import require_user
+from slumber.server.json import to_json_data
+
+
+# The largest page size that a client may ask for
+MAX_PAGE_SIZE = 100
+
+# The query string parameters that choose how a page is represented
+FORMAT_PARAMETERS = ['format', 'fields']
+
+
+def requested_page_size(value, minimum=1):
+    """Return the page size the client asked for.
+    """
+    try:
+        size = int(value)
+    except ValueError:
+        raise Forbidden("The page size must be a number")
+    if size < minimum or size > MAX_PAGE_SIZE:
+        raise Forbidden("The page size must be between %s and %s" % (
+            minimum, MAX_PAGE_SIZE))
+    return size
+
+
+def column_fields(model, params):
+    """Return None if the page should be sent as a list of objects. If the
+    client asked for the `columns` format then return the names of the
+    fields that it wants sent along with the primary keys and display
+    names.
+    """
+    page_format = params.get('format')
+    if page_format is None:
+        return None
+    elif page_format != 'columns':
+        raise Forbidden("Unknown page format %s" % page_format)
+    names = [name for name in params.get('fields', '').split(',') if name]
+    fields = model.fields
+    for name in names:
+        if not fields.has_key(name):
+            raise Forbidden("%s is not a field of %s" % (name, model.name))
+    return names
+
+
+def page_columns(model, instances, fields):
+    """Return the response data for a page of instances of the model in the
+    column format. Rather than an object per instance there is a list for
+    each of the primary keys, the display names and the fields asked for.
+    The data URLs are given by a single template with `{pk}` in it.
+    """
+    meta = model.fields
+    columns = dict(pk=[o.pk for o in instances],
+        display=[unicode(o) for o in instances])
+    for name in fields:
+        columns[name] = [to_json_data(model, o, name, meta[name])
+            for o in instances]
+    page = dict(columns=columns, fields=dict([
+            (name, dict(kind=meta[name]['kind'], type=meta[name]['type']))
+        for name in fields]))
+    data = model.operations['data']
+    template = data.template()
+    if instances and data(instances[0]) != \
+            template.replace('{pk}', quote(str(instances[0].pk))):
+        # The data operation doesn't build its URLs from the primary key
+        columns['data'] = [data(o) for o in instances]
+    else:
+        page['data'] = template
+    return page
+
+
+def _field(django_model, name):
+    """Return the model field that an ordering key is on.
+    """
+    if name == 'pk':
+        return django_model._meta.pk
+    return django_model._meta.get_field(name)
+
+
+def _order_keys(model, order_by):
+    """Return the (name, descending) pairs for the requested ordering. The
+    primary key is always added last so that the order is total.
+    """
+    keys = []
+    for name in order_by.split(','):
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        if name not in model.orderings:
+            raise Forbidden("Ordering by %s is not allowed" % name)
+        keys.append((name, descending))
+    return keys + [('pk', keys[-1][1])]
+
+
+def _cursor(django_model, keys, instance):
+    """Return the opaque cursor for the page that follows the instance.
+    """
+    return urlsafe_b64encode(dumps([
+        _field(django_model, name).value_to_string(instance)
+            for name, _ in keys]))
+
+
+def _keyset(django_model, keys, cursor):
+    """Return the condition that selects the instances after the cursor in
+    the ordering given by the keys.
+    """
+    try:
+        values = loads(urlsafe_b64decode(str(cursor)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        values = [_field(django_model, name).to_python(value)
+            for (name, _), value in zip(keys, values)]
+    except (TypeError, ValueError, ValidationError):
+        raise Forbidden("The cursor is not valid")
+    condition = None
+    for index, (name, descending) in enumerate(keys):
+        after = Q(**{'%s__%s' % (name, 'lt' if descending else 'gt'):
+            values[index]})
+        for (earlier, _), value in zip(keys[:index], values[:index]):
+            after &= Q(**{earlier: value})
+        condition = after if condition is None else condition | after
+    return condition
+
+
+def instance_page(operation, params, query_set, start_key, page_size=10):
+    """Return a page of instances of the operation's model, whether there
+    are more after them and the query string for the page that follows.
+
+    The params may give a `page_size`, an `order_by` of the orderings
+    configured for the model, and any of the configured filters. Lookups
+    on fields that aren't configured filters are refused. Without
+    an ordering the instances are newest first and the page after is
+    found from the last primary key, given as `start_key`. Otherwise an
+    `after` cursor holding the ordering values of the last instance is
+    used.
+    """
+    params = dict(params.items())
+    start, after = params.pop(start_key, None), params.pop('after', None)
+    order_by = params.pop('order_by', None)
+    size = params.pop('page_size', None)
+    # The links to later pages carry the same parameters
+    qs = dict([(k, v.encode('utf-8')) for k, v in params.items()])
+    for name in FORMAT_PARAMETERS:
+        params.pop(name, None)
+    if size is not None:
+        qs['page_size'] = page_size = requested_page_size(size)
+
+    django_model = operation.model.model
+    # Other parameters, such as cache busters, are ignored
+    query_set = filtered(operation.model, query_set, dict([(k, v)
+        for k, v in params.items() if is_lookup(operation.model, k)]))
+    if order_by:
+        qs['order_by'] = order_by
+        keys = _order_keys(operation.model, order_by)
+        query_set = query_set.order_by(*[('-' if descending else '') + name
+            for name, descending in keys])
+        if after is not None:
+            query_set = query_set.filter(
+                _keyset(django_model, keys, after))
+    else:
+        query_set = query_set.order_by('-pk')
+        if start is not None:
+            query_set = query_set.filter(pk__lt=start)
+
+    instances = list(query_set[:page_size + 1])
+    more, instances = len(instances) > page_size, instances[:page_size]
+    if instances and order_by:
+        qs['after'] = _cursor(django_model, keys, instances[-1])
+    elif instances:
+        qs[start_key] = instances[-1].pk
+    return instances, more, qs
 
 
 class InstanceList(ModelOperation):
@@ -13,42 +186,41 @@ class InstanceList(ModelOperation):
     """
     @require_user
     def get(self, request, response, _appname, _modelname):
-        """Return a paged set of instances for this model.
+        """Return a paged set of instances for this model. The query string
+        may give a `page_size`, an `order_by`, any of the filters configured
+        for the model and a `format` of `columns` with the `fields` to send.
         """
         root = get_slumber_root()
         response['model'] = root + self.model.path
 
-        query = self.model.model.objects.order_by('-pk')
-        if request.GET.has_key('start_after'):
-            query = query.filter(pk__lt=request.GET['start_after'])
-
-        response['page'] = [
-                dict(pk=o.pk, display=unicode(o),
-                    data=self.model.operations['data'](o))
-            for o in query[:10]]
-        if len(response['page']) > 0:
-            response['next_page'] = self(
-                start_after=response['page'][-1]['pk'])
+        fields = column_fields(self.model, request.GET)
+        instances, more, qs = instance_page(self, request.GET,
+            self.model.model.objects, 'start_after')
+        if fields is None:
+            response['page'] = [
+                    dict(pk=o.pk, display=unicode(o),
+                        data=self.model.operations['data'](o))
+                for o in instances]
+        else:
+            response.update(page_columns(self.model, instances, fields))
+        # Without an ordering the last page also links on to an empty page
+        if more or (instances and not request.GET.get('order_by')):
+            response['next_page'] = self(**qs)
 
 
 def hal_instance_list(operation, control, builder, query_set, page_size=10):
-    """Return a page of JSON-HAL based results across the query set.
+    """Return a page of JSON-HAL based results across the query set. The
+    control may give the same parameters as the instance list.
     """
     from slumber import data_link
-    starter = control.get('lpk', None)
-    if starter:
-        query_set = query_set.filter(pk__lt=starter)
-    lpk = None
-    for instance in query_set.order_by('-pk').iterator():
-        if page_size == 0:
-            builder.add_link('next', operation(lpk=lpk))
-            return
-        else:
-            page_size -= 1
-            lpk = instance.pk
-            item = Builder(data_link(instance))
-            item.set_property('display', unicode(instance))
-            builder.embed('page', item)
+    instances, more, qs = instance_page(
+        operation, control, query_set, 'lpk', page_size)
+    for instance in instances:
+        item = Builder(data_link(instance))
+        item.set_property('display', unicode(instance))
+        builder.embed('page', item)
+    if more:
+        builder.add_link('next', operation(**qs))
 
 
 class InstanceListHal(ModelOperation):
@@ -0,0 +1,59 @@
+"""
+    Selects the instances that a bulk operation applies to.
+"""
+from django.db.models.fields import FieldDoesNotExist
+
+from slumber.server import Forbidden
+
+
+def _lookup_value(model, lookup, value):
+    """Convert a filter value given as a string to the type of the field
+    that the lookup is on.
+    """
+    parts = lookup.split('__')
+    if len(parts) > 1 and parts[-1] in ['in', 'isnull', 'range']:
+        return value
+    try:
+        field = model._meta.get_field(parts[0])
+    except FieldDoesNotExist:
+        return value
+    return field.to_python(value)
+
+
+def is_lookup(model, name):
+    """Return True if the name is a lookup on one of the model's fields,
+    whether or not filtering on it is allowed.
+    """
+    field = name.split('__')[0]
+    if field == 'pk':
+        return True
+    try:
+        model.model._meta.get_field(field)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def filtered(model, query, filters):
+    """Apply the filters to the query set. Only the filters that have been
+    configured for the model may be used.
+    """
+    for lookup in filters.keys():
+        if lookup not in model.filters:
+            raise Forbidden("Filtering on %s is not allowed" % lookup)
+    return query.filter(**dict([(str(k), _lookup_value(model.model, k, v))
+        for k, v in filters.items()]))
+
+
+def selected_instances(model, body):
+    """Return a query set for the instances selected by the request body.
+    The body may give a list of `pks`, a `filter` or both. Only the filters
+    that have been configured for the model may be used.
+    """
+    pks, filters = body.get('pks'), body.get('filter') or {}
+    if pks is None and not filters:
+        raise Forbidden("A list of pks or a filter must be given")
+    query = filtered(model, model.model.objects.all(), filters)
+    if pks is not None:
+        query = query.filter(pk__in=pks)
+    return query
@@ -1,8 +1,36 @@
 """
     Implements updating of instances.
 """
-from slumber.operations import InstanceOperation
-from slumber.server.http import require_permission
+import django
+
+from slumber.operations import InstanceOperation, ModelOperation
+from slumber.operations.instancedata import instance_data
+from slumber.operations.selection import selected_instances
+from slumber.server import Forbidden
+from slumber.server.http import prefers_representation, require_permission
+
+
+def _concrete_fields(model):
+    """Return the names and attribute names of the fields that are stored
+    in the model's table, apart from the primary key.
+    """
+    concrete = set()
+    for field in model._meta.fields:
+        if not field.primary_key:
+            concrete.update([field.name, field.attname])
+    return concrete
+
+
+def _update_fields(model, names):
+    """Return the names to pass to save as update_fields, or None if the
+    whole instance has to be saved.
+    """
+    if django.VERSION < (1, 5):
+        return None
+    names = list(names)
+    if names and _concrete_fields(model).issuperset(names):
+        return names
+    return None
 
 
 class UpdateInstance(InstanceOperation):
@@ -20,7 +48,44 @@ class UpdateInstance(InstanceOperation):
             instance = self.model.model.objects.get(pk=pk)
             for k, v in request.POST.items():
                 setattr(instance, k, v)
-            instance.save()
+            update_fields = _update_fields(
+                self.model.model, request.POST.keys())
+            if update_fields:
+                instance.save(update_fields=update_fields)
+            else:
+                instance.save()
             response['self'] = dict(
                 url=self.model.operations['data'](instance))
+            if prefers_representation(request):
+                # Re-read so the field values are the stored ones
+                instance = self.model.model.objects.get(pk=pk)
+                instance_data(response, self.model, instance)
+        return do_update(self, request)
+
+
+class UpdateInstances(ModelOperation):
+    """Update the attributes of all of the selected instances with a
+    single query.
+    """
+    def post(self, request, response, appname, modelname):
+        """Perform the update.
+        """
+        @require_permission('%s.change_%s' % (appname, modelname.lower()))
+        def do_update(_, request):
+            """A function we can decorate which will allow us to use the
+            decorator with a dynamic permission name.
+            """
+            values = request.POST.get('values') or {}
+            concrete = _concrete_fields(self.model.model)
+            for name in values.keys():
+                if name not in concrete:
+                    raise Forbidden("%s cannot be updated" % name)
+            query = selected_instances(self.model, request.POST)
+            if self.model.changes_tracked:
+                # Updating a query set doesn't send the save signals
+                from slumber.changelog import record_changes
+                record_changes(self.model, 'updated',
+                    query.values_list('pk', flat=True))
+            response['updated'] = query.update(
+                **dict([(str(k), v) for k, v in values.items()]))
         return do_update(self, request)
@@ -0,0 +1,351 @@
+"""
+    An optional application that keeps copies of remote models in the
+    local database so that reading read-mostly data doesn't need a request
+    to the remote service. It must be added to INSTALLED_APPS.
+"""
+from datetime import datetime, timedelta
+from simplejson import dumps
+from urllib import urlencode
+from urlparse import urljoin
+
+from django.conf import settings
+try:
+    from django.db.transaction import atomic
+except ImportError: # pragma: no cover
+    from django.db.transaction import commit_on_success as atomic
+
+from slumber.connector.configuration import REPLICAS
+from slumber.connector.dataarray import first_page_url
+from slumber.connector.json import parse_json
+from slumber.connector.lru import LRUCache
+from slumber.connector.prefetch import fetch_all, fetch_json
+from slumber.connector.ua import post
+from slumber.operations.checksums import range_checksum
+
+
+# The number of instances whose data is fetched at once during a sync
+SYNC_BATCH = 50
+
+# The length that field values are indexed to in the replica
+VALUE_LENGTH = 255
+
+# The number of seconds that the URL prefixes of the replicas are held in
+# memory before they're read from the database again
+PREFIX_TTL = 60
+_PREFIXES = LRUCache(1)
+
+
+def replica_ttl(model_url):
+    """Return the number of seconds after a sync that the replica of the
+    model may be used for, or None if the model isn't replicated.
+    """
+    for model_path, ttl in REPLICAS.items():
+        if model_url.endswith(model_path):
+            return ttl
+    return None
+
+
+def _fresh(replica):
+    """Return True if the replica was synced recently enough to be used.
+    """
+    ttl = replica_ttl(replica.model)
+    return ttl is not None and replica.synced is not None and \
+        replica.synced >= datetime.now() - timedelta(seconds=ttl)
+
+
+def _prefixes():
+    """Return the URL prefixes that the documents of all of the replicas
+    are found below.
+    """
+    prefixes = _PREFIXES.get('prefixes')
+    if prefixes is None:
+        from slumber.replica.models import Replica
+        prefixes = []
+        for lines in Replica.objects.values_list('prefixes', flat=True):
+            prefixes.extend(lines.split())
+        _PREFIXES.set('prefixes', prefixes, PREFIX_TTL)
+    return prefixes
+
+
+def _replicated(url):
+    """Return True if the URL may be held by one of the replicas.
+    """
+    if not REPLICAS:
+        return False
+    for prefix in _prefixes():
+        if url.startswith(prefix):
+            return True
+    return False
+
+
+def _parent(url, levels=1):
+    """Return the URL with the last path segments removed.
+    """
+    for _ in range(levels):
+        url = url[:url.rstrip('/').rfind('/') + 1]
+    return url
+
+
+def lookup(url):
+    """Return the JSON for the URL from the replica of its model, or None
+    if no replica has it or the replica isn't fresh enough.
+    """
+    if not _replicated(url):
+        return None
+    from slumber.replica.models import Document, url_hash
+    try:
+        document = Document.objects.select_related('replica').get(
+            url_hash=url_hash(url))
+    except Document.DoesNotExist:
+        return None
+    return parse_json(document.json) if _fresh(document.replica) else None
+
+
+def find(model_url, lookups):
+    """Return the data for the one instance of the model that matches the
+    lookups from the replica, or None if it can't be found there. Only
+    exact matches on `pk` or on the values of the fields are supported,
+    and these are found with a query against the stored field values.
+    """
+    if replica_ttl(model_url) is None:
+        return None
+    from slumber.replica.models import Replica
+    try:
+        replica = Replica.objects.get(model=model_url)
+    except Replica.DoesNotExist:
+        return None
+    if not _fresh(replica):
+        return None
+    documents = replica.documents.filter(array='')
+    for field, value in lookups.items():
+        if field == 'pk':
+            documents = documents.filter(instance=unicode(value))
+        else:
+            documents = documents.filter(field_values__field=field,
+                field_values__value=unicode(value)[:VALUE_LENGTH])
+    lookups = dict([(k, v) for k, v in lookups.items() if k != 'pk'])
+    found = []
+    for document in documents.distinct()[:2]:
+        json = parse_json(document.json)
+        fields = json['fields']
+        if all([fields.has_key(k) and unicode(fields[k]['data']) == unicode(v)
+                for k, v in lookups.items()]):
+            found.append(json)
+    return found[0] if len(found) == 1 else None
+
+
+def forget(url):
+    """Remove the instance whose data is at the URL, along with the pages
+    of its data arrays, from the replica that holds it.
+    """
+    if not _replicated(url):
+        return
+    from slumber.replica.models import Document, url_hash
+    for replica, instance in Document.objects.filter(url_hash=url_hash(url),
+            array='').values_list('replica', 'instance'):
+        Document.objects.filter(replica=replica, instance=instance).delete()
+
+
+def forget_model(model_url):
+    """Stop using the replica of the model until it is next synced.
+    """
+    if replica_ttl(model_url) is not None:
+        from slumber.replica.models import Replica
+        Replica.objects.filter(model=model_url).update(synced=None)
+
+
+def _document(replica, url, json, instance, array='', checksum=''):
+    """Store the JSON for the URL in the replica. For instance data the
+    values of the fields are stored as well so that they can be looked up,
+    along with the service's checksum for the instance if it is known.
+    """
+    from slumber.replica.models import Document, FieldValue
+    if array:
+        Document.objects.create(replica=replica, url=url, instance=instance,
+            array=array, json=dumps(json))
+        return
+    document = Document.objects.create(replica=replica, url=url,
+        instance=instance, json=dumps(json),
+        checksum=checksum)
+    values = [FieldValue(document=document, field=field,
+            value=unicode(meta['data'])[:VALUE_LENGTH])
+        for field, meta in json.get('fields', {}).items()
+            if not isinstance(meta['data'], (dict, list))]
+    if hasattr(FieldValue.objects, 'bulk_create'):
+        FieldValue.objects.bulk_create(values)
+    else:
+        for value in values:
+            value.save()
+
+
+def _store_pages(replica, url, instance, array):
+    """Store all of the pages of the instance's data array at the URL, in
+    the format that the client asks for them in.
+    """
+    page_url = first_page_url(url)
+    json = fetch_json(page_url, 0)
+    if json.has_key('count'):
+        # This is what the server returns when only the count is asked for
+        _document(replica, url + '?page_size=0',
+            dict(count=json['count'], instance=json.get('instance'), page=[]),
+            instance, array)
+    url = page_url
+    while True:
+        _document(replica, url, json, instance, array)
+        if not json.get('next_page'):
+            return
+        url = urljoin(url, json['next_page'])
+        json = fetch_json(url, 0)
+
+
+def _resolve_url(model):
+    """Return the URL of the resolve operation of the service that the
+    model is in, or None if the service doesn't have one. Models are found
+    below the service root at their application's path and their name.
+    """
+    path = model.module.replace('.', '/') + '/' + model.name + '/'
+    if not model._url.endswith(path):
+        return None
+    root = model._url[:-len(path)]
+    resolve = fetch_json(root, 0).get('operations', {}).get('resolve')
+    return urljoin(root, resolve) if resolve else None
+
+
+def _store(model, replica, instances):
+    """Fetch the data for the (pk, url) pairs and store it along with the
+    pages of the instances' data arrays. Each batch of instances is
+    fetched in one request if the service can resolve them together.
+    """
+    resolve = _resolve_url(model) if instances else None
+    prefixes = set(replica.prefixes.split())
+    for start in range(0, len(instances), SYNC_BATCH):
+        batch = instances[start:start + SYNC_BATCH]
+        if resolve:
+            _, json = post(resolve, dict(urls=[url for _, url in batch]))
+            found = [json['instances'].get(url) for _, url in batch]
+            checksums = json.get('checksums', {})
+        else:
+            found = fetch_all(fetch_json, [(url, 0) for _, url in batch])
+            checksums = {}
+        for (pk, url), json in zip(batch, found):
+            if json is None:
+                # The instance was deleted after it was listed
+                continue
+            _document(replica, url, json, unicode(pk),
+                checksum=checksums.get(url, ''))
+            prefixes.add(_parent(url))
+            for array, array_url in json.get('data_arrays', {}).items():
+                array_url = urljoin(url, array_url)
+                _store_pages(replica, array_url, unicode(pk), array)
+                prefixes.add(_parent(array_url, 2))
+    if prefixes != set(replica.prefixes.split()):
+        replica.prefixes = '\n'.join(sorted(prefixes))
+        replica.save()
+        _PREFIXES.clear()
+
+
+@atomic
+def sync(model):
+    """Bring the replica for the client model connector up to date. If the
+    remote model tracks its changes then only the instances that have
+    changed since the last sync are fetched, otherwise the whole model is
+    copied again. This is done in one transaction so that a sync that fails
+    part way leaves the replica as it was.
+    """
+    from slumber.connector.api import invalidate_instances
+    from slumber.replica.models import Replica
+    assert 'slumber.replica' in settings.INSTALLED_APPS, \
+        "slumber.replica must be installed to replicate models"
+    assert replica_ttl(model._url) is not None, \
+        "%s is not configured to be replicated" % model._url
+    replica, _ = Replica.objects.get_or_create(model=model._url)
+    started = datetime.now()
+    changes = None
+    if replica.cursor is not None:
+        changes, latest = model.changes(replica.cursor), {}
+        for kind, pk, url in changes:
+            latest[url] = (kind, pk)
+    if changes is not None and not changes.expired:
+        # This also removes the changed instances from the replica
+        invalidate_instances(latest.keys())
+        _store(model, replica, [(pk, url)
+            for url, (kind, pk) in latest.items() if kind != 'deleted'])
+        replica.cursor = changes.cursor
+    else:
+        replica.cursor = None
+        if changes is not None:
+            # The changes since the last sync have been pruned, and the
+            # expired stream ends where they end now
+            replica.cursor = changes.cursor
+        elif model._operations.has_key('changes'):
+            # Find where the changes end before the copy is taken so that
+            # anything changed whilst it's being made is fetched next time
+            changes = model.changes(0)
+            for _ in changes:
+                pass
+            replica.cursor = changes.cursor
+        replica.documents.all().delete()
+        instances = [(pk, url)
+            for pk, _, url in model.instances(proxies=False)]
+        invalidate_instances([url for _, url in instances])
+        _store(model, replica, instances)
+    replica.synced = started
+    replica.save()
+
+
+def _key(pk):
+    """Return the primary key in a form that orders the same way as on the
+    service. Numeric keys are compared as numbers.
+    """
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        return unicode(pk)
+
+
+def _in_range(rows, after, upto):
+    """Return the (key, checksum) rows in the range of primary keys.
+    """
+    return [(key, checksum) for key, checksum in rows
+        if (after is None or key > _key(after)) and
+            (upto is None or key <= _key(upto))]
+
+
+def repair(model):
+    """Find the instances in the replica of the model that differ from the
+    service's by comparing checksums over ranges of primary keys, only
+    going into the ranges whose checksums differ, and fetch just those
+    instances again. Returns the number of instances that were fetched
+    again or removed.
+    """
+    from slumber.connector.api import invalidate_instances
+    from slumber.replica.models import Replica
+    replica = Replica.objects.get(model=model._url)
+    documents = replica.documents.filter(array='')
+    rows = sorted([(_key(pk), checksum)
+        for pk, checksum in documents.values_list('instance', 'checksum')])
+    url = urljoin(model._url, model._operations['checksums'])
+    changed, extra, ranges = [], [], [dict(after=None, upto=None)]
+    while ranges:
+        bounds = ranges.pop()
+        ours = _in_range(rows, bounds['after'], bounds['upto'])
+        qs = dict([(k, bounds[k])
+            for k in ['after', 'upto'] if bounds[k] is not None])
+        json = fetch_json(url + ('?' + urlencode(qs) if qs else ''), 0)
+        if json['checksum'] == range_checksum([c for _, c in ours]):
+            continue
+        for part in json.get('ranges', []):
+            mine = _in_range(rows, part['after'], part['upto'])
+            if part['checksum'] != range_checksum([c for _, c in mine]):
+                ranges.append(part)
+        if json.has_key('rows'):
+            ours = dict(ours)
+            for row in json['rows']:
+                if ours.pop(_key(row['pk']), None) != row['checksum']:
+                    changed.append((row['pk'], urljoin(url, row['data'])))
+            extra.extend(ours.keys())
+    invalidate_instances([data_url for _, data_url in changed])
+    replica.documents.filter(
+        instance__in=[unicode(key) for key in extra]).delete()
+    _store(model, replica, changed)
+    return len(changed) + len(extra)
@@ -0,0 +1,65 @@
+"""
+    The tables that hold the local copies of remote models.
+"""
+from hashlib import sha1
+
+from django.db import models
+
+
+def url_hash(url):
+    """Return the hash of the URL that documents are looked up by. URLs can
+    be longer than an indexed column allows.
+    """
+    return sha1(url.encode('utf-8')).hexdigest()
+
+
+class Replica(models.Model):
+    """A remote model that is copied into the local database.
+    """
+    model = models.CharField(max_length=255, unique=True)
+    # The change log cursor that the next sync starts from, if the remote
+    # model tracks its changes
+    cursor = models.IntegerField(null=True, blank=True)
+    synced = models.DateTimeField(null=True, blank=True)
+    # The URL prefixes that the replica's documents are found below, one
+    # per line, so that other URLs are never looked for in the database
+    prefixes = models.TextField(blank=True)
+
+    def __unicode__(self):
+        return self.model
+
+
+class Document(models.Model):
+    """The JSON for one of the remote model's URLs. This is either the
+    data for an instance or a page of one of its data arrays.
+    """
+    replica = models.ForeignKey(Replica, related_name='documents')
+    url = models.TextField()
+    url_hash = models.CharField(max_length=40, unique=True)
+    # The primary key of the instance that the data is for
+    instance = models.CharField(max_length=200, db_index=True)
+    # The name of the data array for its pages, blank for the instance data
+    array = models.CharField(max_length=200, blank=True)
+    json = models.TextField()
+    # The service's checksum for the instance data, used by repairs
+    checksum = models.CharField(max_length=40, blank=True)
+
+    def save(self, *args, **kwargs):
+        self.url_hash = url_hash(self.url)
+        super(Document, self).save(*args, **kwargs)
+
+    def __unicode__(self):
+        return self.url
+
+
+class FieldValue(models.Model):
+    """The value of one of the fields of an instance in the replica, so
+    that the instances matching a lookup can be found with a query.
+    """
+    document = models.ForeignKey(Document, related_name='field_values')
+    field = models.CharField(max_length=200)
+    # Longer values are cut short here and checked against the JSON
+    value = models.CharField(max_length=255, db_index=True)
+
+    def __unicode__(self):
+        return u'%s=%s' % (self.field, self.value)
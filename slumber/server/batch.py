@@ -0,0 +1,128 @@
+"""
+    Runs a list of Slumber operations in a single request.
+"""
+from copy import copy
+import logging
+from urlparse import urlparse
+
+from django.core.urlresolvers import reverse
+from django.http import QueryDict
+try:
+    from django.db.transaction import atomic
+except ImportError: # pragma: no cover
+    from django.db.transaction import commit_on_success as atomic
+
+from slumber.server import Forbidden
+from slumber.server.http import require_user, run_view
+
+
+class _Rollback(Exception):
+    """Used to leave the transaction when an operation fails.
+    """
+    pass
+
+
+def _sub_request(request, invocation):
+    """Build the request for one of the operations in the batch. The user
+    and the other request meta data are those of the batch request.
+    """
+    _, _, path, _, query, _ = urlparse(invocation['uri'])
+    if not path.endswith('/'):
+        path += '/'
+    sub = copy(request)
+    sub.method = invocation.get('method', 'GET').upper()
+    sub.path = sub.path_info = path
+    sub.META = dict(request.META, REQUEST_METHOD=sub.method,
+        QUERY_STRING=query)
+    for header, value in (invocation.get('headers') or {}).items():
+        sub.META['HTTP_' + header.upper().replace('-', '_')] = value
+    body = invocation.get('body') or {}
+    if sub.method == 'GET':
+        sub.GET = QueryDict(query).copy()
+        for key, value in body.items():
+            sub.GET[key] = value
+        sub.POST = QueryDict('')
+    else:
+        sub.GET = QueryDict(query)
+        sub.POST = body
+    return sub
+
+
+def _run(request, route, invocation):
+    """Run the operation and return its response data.
+    """
+    root = reverse('slumber.server.views.service_root')
+    sub = _sub_request(request, invocation)
+    if not sub.path.startswith(root):
+        return {'_meta': dict(status=404, message='Not Found'),
+            'error': "%s is not a Slumber URL" % sub.path}
+    result = run_view(route, sub, sub.path[len(root):-1])
+    if not isinstance(result, dict):
+        # The view returned its own HTTP response
+        result = {'_meta': dict(status=result.status_code,
+            message=getattr(result, 'reason_phrase', ''))}
+    return result
+
+
+def _failed(invocation, exception):
+    """Return the response data for an operation that raised an exception
+    that the view didn't turn into an error response.
+    """
+    logging.exception("Batch operation %s failed", invocation.get('uri'))
+    return {'_meta': dict(status=500, message='Internal Server Error'),
+        'error': unicode(exception)}
+
+
+@require_user
+def _run_batch(_cls, request, response, route):
+    """Run the operations, all in one transaction if the client asked for
+    that. The transaction is rolled back if any of the operations fail.
+    Otherwise each operation has its own transaction so that one failing
+    doesn't stop the results of the others being returned.
+    """
+    invocations = request.POST.get('operations')
+    if not isinstance(invocations, list):
+        raise Forbidden("The batch must give a list of operations")
+    results = response['results'] = []
+    if request.POST.get('atomic'):
+        # Older versions of Django can't use this as a context manager
+        @atomic
+        def run_all():
+            """Run the operations until one of them fails.
+            """
+            for invocation in invocations:
+                try:
+                    results.append(_run(request, route, invocation))
+                except Exception, exception: # pylint: disable=W0703
+                    results.append(_failed(invocation, exception))
+                if results[-1]['_meta']['status'] >= 400:
+                    raise _Rollback()
+        try:
+            run_all()
+            response['committed'] = True
+        except _Rollback:
+            response['committed'] = False
+    else:
+        for invocation in invocations:
+            try:
+                results.append(atomic(_run)(request, route, invocation))
+            except Exception, exception: # pylint: disable=W0703
+                results.append(_failed(invocation, exception))
+
+
+def run_batch(request, response, route):
+    """Run each of the operations in the request body using the router
+    given and place their responses in the response.
+
+    The body is a JSON object with a list of `operations`, each of which
+    has a `uri`, a `method` and a `body`. If `atomic` is true then the
+    operations are run in a single transaction and processing stops at the
+    first one that fails. Operations that raise an unexpected exception
+    are given a 500 result.
+    """
+    if request.method != 'POST':
+        response['_meta']['status'] = 405
+        response['_meta']['message'] = "Method Not Allowed"
+        response['_meta']['headers'] = {'Allow': 'POST'}
+        return
+    _run_batch(None, request, response, route)
@@ -64,12 +64,46 @@ def require_permissions(permissions):
     return decorator
 
 
+def prefers_representation(request):
+    """Return True if the client has asked for the instance data to be
+    returned from a write operation.
+    """
+    return 'return=representation' in request.META.get('HTTP_PREFER', '')
+
+
 class Response(dict):
     """Subclass dict so that we can annotate it.
     """
     pass
 
 
+def run_view(view, request, *args, **kwargs):
+    """Run the view and return either the HTTP response it returns or the
+    response data. The Slumber exceptions are turned into error responses.
+    """
+    response = Response(_meta=dict(status=200, message='OK'))
+    try:
+        http_response = view(request, response, *args, **kwargs)
+        if http_response:
+            return http_response
+    except NotAuthorised, _:
+        response = {
+            '_meta': dict(status=401, message='Unauthorized',
+                headers= {'WWW-Authenticate':'FOST Realm="Slumber"'}),
+            'error': 'No user is logged in'}
+    except Forbidden, exception:
+        response = {'_meta': dict(status=403, message='Forbidden'),
+            'error': unicode(exception)}
+    except ObjectDoesNotExist, exception:
+        response = {'_meta': dict(status=404, message='Not Found'),
+            'error': unicode(exception)}
+    except NotImplementedError, _:
+        response = {
+            '_meta': dict(status=501, message='Not Implemented'),
+            'error': "Not implemented"}
+    return response
+
+
 def view_handler(view):
     """Wrap a view function so it can return either JSON, HTML or some
     other response.
@@ -84,26 +118,9 @@ def view_handler(view):
                 request.POST = loads(request.body or '{}')
             else:
                 request.POST = loads(request.raw_post_data or '{}')
-        response = Response(_meta=dict(status=200, message='OK'))
-        try:
-            http_response = view(request, response, *args, **kwargs)
-            if http_response:
-                return http_response
-        except NotAuthorised, _:
-            response = {
-                '_meta': dict(status=401, message='Unauthorized',
-                    headers= {'WWW-Authenticate':'FOST Realm="Slumber"'}),
-                'error': 'No user is logged in'}
-        except Forbidden, exception:
-            response = {'_meta': dict(status=403, message='Forbidden'),
-                'error': unicode(exception)}
-        except ObjectDoesNotExist, exception:
-            response = {'_meta': dict(status=404, message='Not Found'),
-                'error': unicode(exception)}
-        except NotImplementedError, _:
-            response = {
-                '_meta': dict(status=501, message='Not Implemented'),
-                'error': "Not implemented"}
+        response = run_view(view, request, *args, **kwargs)
+        if not isinstance(response, dict):
+            return response
         if request.user.is_authenticated():
             response['_meta']['username'] = request.user.username
         else:
@@ -115,4 +132,3 @@ def view_handler(view):
             http_response[header] = value
         return http_response
     return wrapper if not USE_CSRF else csrf_exempt(wrapper)
-
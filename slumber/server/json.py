@@ -1,6 +1,7 @@
 """
     Implements the JSON formatting for the server.
 """
+from hashlib import sha1
 from simplejson import dumps, JSONEncoder
 
 from django.http import HttpResponse
@@ -50,6 +51,13 @@ class _proxyEncoder(JSONEncoder):
         return unicode(obj)
 
 
+def json_fingerprint(data):
+    """Return a hash of the JSON for the data that doesn't depend on the
+    order of the keys.
+    """
+    return sha1(dumps(data, sort_keys=True, cls=_proxyEncoder)).hexdigest()
+
+
 def as_json(_request, response, content_type):
     """Implement the default accept handling which will return JSON data.
     """
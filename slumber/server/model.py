@@ -5,16 +5,19 @@ from django.db.models import ForeignKey, ManyToManyField
 from django.db.models.fields import FieldDoesNotExist
 
 from slumber._caches import DJANGO_MODEL_TO_SLUMBER_MODEL
+from slumber.operations.aggregate import FUNCTIONS, AggregateInstances, \
+    CountInstances
 from slumber.operations.authenticate import AuthenticateUser
 from slumber.operations.authorization import CheckMyPermission, \
     PermissionCheck, ModulePermissions, GetPermissions
-from slumber.operations.create import CreateInstance
-from slumber.operations.delete import DeleteInstance
+from slumber.operations.checksums import ModelChecksums
+from slumber.operations.create import CreateInstance, CreateInstances
+from slumber.operations.delete import DeleteInstance, DeleteInstances
 from slumber.operations.instancedata import InstanceData
 from slumber.operations.instancelist import InstanceList
 from slumber.operations.profile import GetProfile
 from slumber.operations.search import DereferenceInstance
-from slumber.operations.update import UpdateInstance
+from slumber.operations.update import UpdateInstance, UpdateInstances
 from slumber.server import get_slumber_root
 
 
@@ -31,15 +34,25 @@ class DjangoModel(object):
         self.path = app.path + '/' + self.name + '/'
 
         self.properties = dict(r=[], w=[])
+        self.filters, self.orderings, self.aggregates = [], [], []
+        self.changes_tracked = False
         self._fields, self._data_arrays = {}, []
         self.operations = {
+            'checksums': ModelChecksums(self, 'checksums'),
+            'count': CountInstances(self, 'count'),
             'instances': InstanceList(self, 'instances'),
             'create': CreateInstance(self, 'create'),
+            'create-many': CreateInstances(self, 'create-many'),
             'data': InstanceData(self, 'data'),
             'delete': DeleteInstance(self, 'delete'),
+            'delete-many': DeleteInstances(self, 'delete-many'),
             'get': DereferenceInstance(self, 'get'),
-            'update': UpdateInstance(self, 'update')
+            'update': UpdateInstance(self, 'update'),
+            'update-many': UpdateInstances(self, 'update-many'),
         }
+        if FUNCTIONS:
+            self.operations['aggregate'] = \
+                AggregateInstances(self, 'aggregate')
         if self.path == 'django/contrib/auth/User/':
             self.operations['do-i-have-perm'] = \
                 CheckMyPermission(self, 'do-i-have-perm')
@@ -0,0 +1,129 @@
+"""
+    Returns the data for many instances, from any of the models in the
+    service, in a single request. Also allows the client to check many
+    instances that it has cached in one go.
+"""
+from urllib import unquote
+from urlparse import urlparse
+
+from django.core.exceptions import ValidationError
+
+from slumber.operations.checksums import row_checksum, stored_fields
+from slumber.operations.instancedata import instance_data, instance_etag
+from slumber.server import Forbidden, get_slumber_root
+from slumber.server.http import require_user
+from slumber.server.meta import applications
+
+
+def _data_prefixes():
+    """Return the URL paths that instance data is found below, mapped to
+    the model. Models may have their data operation mounted elsewhere so
+    both that and the standard location are included.
+    """
+    root = get_slumber_root()
+    prefixes = {}
+    for app in applications():
+        for model in app.models.values():
+            prefixes[root + model.path + 'data/'] = model
+            data = model.operations.get('data')
+            if data:
+                prefixes[urlparse(data()).path] = model
+    return prefixes
+
+
+def _group_by_model(urls):
+    """Return a dict of the primary keys and URLs for each model, and the
+    URLs that aren't instance data URLs.
+    """
+    prefixes = _data_prefixes()
+    groups, unknown = {}, []
+    for url in urls:
+        path = urlparse(url).path
+        longest = None
+        for prefix in prefixes.keys():
+            if path.startswith(prefix) and \
+                    (not longest or len(prefix) > len(longest)):
+                longest = prefix
+        parts = path[len(longest):].split('/') if longest else []
+        if len(parts) == 2 and parts[0] and not parts[1]:
+            model = prefixes[longest]
+            try:
+                pk = model.model._meta.pk.to_python(unquote(parts[0]))
+                groups.setdefault(model, []).append((pk, url))
+                continue
+            except ValidationError:
+                pass
+        unknown.append(url)
+    return groups, unknown
+
+
+def _load(urls, checksums=None):
+    """Return the instance data for each URL that can be found, and the
+    URLs of instances that don't exist. Each model is loaded with a single
+    query. URLs that aren't instance data URLs are ignored. If a dict of
+    checksums is given then the instances' row checksums are put in it.
+    """
+    groups, unknown = _group_by_model(urls)
+    instances, missing = {}, []
+    for model, keys in groups.items():
+        found = dict([(unicode(i.pk), i)
+            for i in model.model.objects.filter(
+                pk__in=[pk for pk, _ in keys])])
+        for pk, url in keys:
+            if found.has_key(unicode(pk)):
+                instance = found[unicode(pk)]
+                instances[url] = {}
+                instance_data(instances[url], model, instance)
+                if checksums is not None:
+                    checksums[url] = row_checksum([getattr(instance, name)
+                        for name in stored_fields(model)])
+            else:
+                missing.append(url)
+    return instances, missing, unknown
+
+
+@require_user
+def _resolve(_cls, request, response):
+    """Load the instances, using one query for each model.
+    """
+    if request.method == 'POST':
+        urls = request.POST.get('urls')
+    else:
+        urls = request.GET.getlist('url')
+    if not isinstance(urls, list):
+        raise Forbidden("A list of instance data URLs must be given")
+    response['checksums'] = {}
+    response['instances'], missing, unknown = \
+        _load(urls, response['checksums'])
+    response['missing'] = missing + unknown
+
+
+def resolve(request, response):
+    """Return the instance data for each of the URLs given, keyed by the
+    URL. URLs for instances that don't exist are listed in `missing`. The
+    `checksums` give the row checksum of each instance, as used by the
+    model `checksums` operation.
+    """
+    _resolve(None, request, response)
+
+
+@require_user
+def _revalidate(_cls, request, response):
+    """Compare the entity tags the client has against the current ones.
+    """
+    entries = request.POST.get('entries')
+    if request.method != 'POST' or not isinstance(entries, list):
+        raise Forbidden("A list of URLs and entity tags must be POSTed")
+    tags = dict([(url, etag) for url, etag in entries])
+    instances, response['deleted'], response['unknown'] = _load(tags.keys())
+    response['changed'] = dict([(url, data)
+        for url, data in instances.items()
+            if instance_etag(data) != tags[url]])
+
+
+def revalidate(request, response):
+    """Take a list of instance data URLs with the entity tags the client
+    has for them and return the data for only those instances that have
+    changed. Instances that no longer exist are listed in `deleted`.
+    """
+    _revalidate(None, request, response)
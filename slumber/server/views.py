@@ -3,6 +3,7 @@
 """
 import logging
 
+from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect, \
     HttpResponsePermanentRedirect, HttpResponseNotFound
@@ -10,14 +11,27 @@ from django.http import HttpResponseRedirect, \
 from slumber._caches import OPERATION_URIS
 from slumber.server import get_slumber_service, get_slumber_root, \
     get_slumber_services
+from slumber.server.batch import run_batch
 from slumber.server.http import view_handler
+from slumber.server.json import json_fingerprint
 from slumber.server.meta import applications
+from slumber.server.resolve import resolve, revalidate
 
 
 @view_handler
 def service_root(request, response):
     """Request routing for Slumber.
     """
+    if not request.path.endswith('/'):
+        return HttpResponsePermanentRedirect(request.path + '/')
+    path = request.path[len(reverse('slumber.server.views.service_root')):-1]
+    return route(request, response, path)
+
+
+def route(request, response, path):
+    """Find and run the view for the path, which is relative to the
+    Slumber root and has no trailing slash.
+    """
     # We have many return statements, but there's no point in artificially
     # breaking the function up to reduce them
     # pylint: disable = R0911
@@ -26,10 +40,6 @@ def service_root(request, response):
     service = get_slumber_service()
     apps = applications()
 
-    if not request.path.endswith('/'):
-        return HttpResponsePermanentRedirect(request.path + '/')
-    path = request.path[len(reverse('slumber.server.views.service_root')):-1]
-
     longest = None
     for op_name in OPERATION_URIS.keys():
         if not longest or len(op_name) > len(longest):
@@ -53,7 +63,9 @@ def service_root(request, response):
             return HttpResponseNotFound()
         path = path[len(service) + 1:]
 
-    if not path:
+    if SERVICE_OPERATIONS.has_key(path):
+        return SERVICE_OPERATIONS[path](request, response)
+    elif not path:
         return _get_applications(request, response, apps)
     else:
         # Find the app with the longest matching path
@@ -104,6 +116,18 @@ def _get_applications(request, response, apps):
         for app in apps])
     response['configuration'] = dict([(app.name, app.configuration)
         for app in apps if getattr(app, 'configuration', None)])
+    response['operations'] = dict([(name.lstrip('_'), root + name + '/')
+        for name in SERVICE_OPERATIONS.keys()])
+    expand = request.GET.get('expand') == '1'
+    if expand or request.GET.get('fingerprint') == '1':
+        expanded = dict([(app.name, dict(
+                url=root + app.path + '/',
+                models=dict([(n, dict(model_metadata(m), url=root + m.path))
+                    for n, m in app.models.items()])))
+            for app in apps])
+        response['fingerprint'] = json_fingerprint(expanded)
+        if expand:
+            response['expanded'] = expanded
     get_service_directory(request, response)
 
 
@@ -115,21 +139,46 @@ def get_models(_, response, app):
         for n, m in app.models.items()])
 
 
+def model_metadata(model):
+    """Return the meta data about the model.
+    """
+    root = get_slumber_root()
+    return dict(
+        name=model.name,
+        module=model.app.name,
+        fields=model.fields,
+        puttable=[[f] for f, p in model.fields.items()
+                if p['kind'] != 'property' and
+                    model.model._meta.get_field(f).unique] +
+            list(model.model._meta.unique_together),
+        data_arrays=model.data_arrays,
+        operations=dict([(op.name, op.uri or root + op.path)
+            for op in model.operations.values() if op.model_operation]),
+        instance_templates=dict([(op.name, op.template())
+            for op in model.operations.values() if not op.model_operation]))
+
+
 def get_model(_, response, model):
     """Return meta data about the model.
     """
     if not model:
         return HttpResponseNotFound()
-    root = get_slumber_root()
-    response['name'] = model.name
-    response['module'] = model.app.name
-    response['fields'] = model.fields
-    response['puttable'] = [[f] for f, p in model.fields.items()
-            if p['kind'] != 'property' and
-                model.model._meta.get_field(f).unique] + \
-        list(model.model._meta.unique_together)
-    response['data_arrays'] = model.data_arrays
-    response['operations'] = dict(
-        [(op.name, op.uri or root + op.path)
-            for op in model.operations.values() if op.model_operation])
+    response.update(model_metadata(model))
 
+
+def batch(request, response):
+    """Run a list of operations given in the request body.
+    """
+    return run_batch(request, response, route)
+
+
+# The operations that apply to the whole service. They are found at these
+# paths below the service root
+SERVICE_OPERATIONS = {
+    '_batch': batch,
+    '_resolve': resolve,
+    '_revalidate': revalidate,
+}
+if 'slumber.changelog' in settings.INSTALLED_APPS:
+    from slumber.changelog.notifications import notifications
+    SERVICE_OPERATIONS['_notifications'] = notifications
@@ -21,6 +21,38 @@ class _Operations(object):
         return self._url + name + self._suffix
 
 
+class _MockInstances(list):
+    """The instances of a mock model, which can also be called like the
+    `instances` method of a model connector.
+    """
+    def __call__(self, page_size=None, filters=None, proxies=True,
+            fields=None):
+        """Implements a mocked version of the instance list.
+        """
+        selected = self.filter(**(filters or {}))
+        if proxies:
+            return selected
+        return [(getattr(i, 'pk', None), unicode(i), getattr(i, '_url', None))
+            for i in selected]
+
+    def filter(self, **filters):
+        """Implements a mocked version of filtering the instances.
+        """
+        return _MockInstances([i for i in self
+            if not [k for k, v in filters.items()
+                if getattr(i, k, None) != v]])
+
+    def order_by(self, *names):
+        """Implements a mocked version of ordering the instances.
+        """
+        ordered = list(self)
+        for name in reversed(names):
+            ordered.sort(
+                key=lambda i, n=name.lstrip('-'): getattr(i, n, None),
+                reverse=name.startswith('-'))
+        return _MockInstances(ordered)
+
+
 class _MockModel(object):
     """A mock model object type so we can attach things more sanely for
     mocking purposes.
@@ -30,7 +62,7 @@ class _MockModel(object):
         self._url = url
         self._operations = _Operations(url)
         self.instance_type = instance_type
-        self.instances = []
+        self.instances = _MockInstances()
 
     def __call__(self, url, display_name):
         return get_instance('slumber://' + self._url, url, display_name)
@@ -51,6 +83,39 @@ class _MockModel(object):
                     return i
         assert False, "The instance was not found\n%s" % query
 
+    def count(self, **filters):
+        """Implements a mocked version of the count operator.
+        """
+        return len(self.instances.filter(**filters))
+
+    def aggregate(self, function, field, group_by=None, **filters):
+        """Implements a mocked version of the aggregate operator.
+        """
+        functions = dict(sum=sum, min=min, max=max,
+            avg=lambda values: sum(values) / len(values))
+        def value(instances):
+            """Aggregate the field values of the instances.
+            """
+            values = [getattr(i, field) for i in instances
+                if getattr(i, field, None) is not None]
+            return functions[function](values) if values else None
+        instances = self.instances.filter(**filters)
+        if group_by is None:
+            return value(instances)
+        keys = set([getattr(i, group_by, None) for i in instances])
+        return dict([(key, value(instances.filter(**{group_by: key})))
+            for key in keys])
+
+    def filter(self, **filters):
+        """Implements a mocked version of the filtered instance list.
+        """
+        return self.instances.filter(**filters)
+
+    def order_by(self, *names):
+        """Implements a mocked version of the ordered instance list.
+        """
+        return self.instances.order_by(*names)
+
     def create(self, **items):
         """Implements a mocked version of the create operator.
         """
@@ -59,6 +124,14 @@ class _MockModel(object):
         self.client._instances.append(instance)
         return instance
 
+    def create_many(self, objects):
+        """Implements a mocked version of the create-many operator.
+        """
+        objects = list(objects)
+        for items in objects:
+            self.create(**items)
+        return len(objects)
+
     def update(self, instance_connector, **updating_data):
         """ Implement a mocked version of update operator """
         updating_id = instance_connector.pk
@@ -68,6 +141,40 @@ class _MockModel(object):
                 for key, value in updating_data.items():
                     setattr(instance, key, value)
 
+    def _selected(self, pks, filters):
+        """Return the instances matching the primary keys and filters.
+        """
+        return [i for i in self.instances
+            if (pks is None or i.pk in pks) and
+                not [k for k, v in filters.items() if getattr(i, k) != v]]
+
+    def update_many(self, values, pks=None, **filters):
+        """Implement a mocked version of the update-many operator.
+        """
+        selected = self._selected(pks, filters)
+        for instance in selected:
+            for key, value in values.items():
+                setattr(instance, key, value)
+        return len(selected)
+
+    def delete_many(self, pks=None, **filters):
+        """Implement a mocked version of the delete-many operator.
+        """
+        selected = self._selected(pks, filters)
+        for instance in selected:
+            self.instances.remove(instance)
+            self.client._instances.remove(instance)
+        return len(selected)
+
+    def delete(self, instance_connector):
+        """Implement a mocked version of the delete operator.
+        """
+        for instance in self.instances:
+            if instance.pk == instance_connector.pk:
+                self.instances.remove(instance)
+                self.client._instances.remove(instance)
+                return
+
 
 class _MockInstance(DictObject):
     """A mock instance that will add in a _url parameter.
@@ -160,7 +267,7 @@ def mock_ua(test_method):
             self.test.assertIsNone(edata)
             return None, rdata
 
-        def do_post(self, url, data, _codes = None):
+        def do_post(self, url, data, _codes=None, _headers=None):
             """The patch for the user agent post.
             """
             self.test.assertTrue(self.expectations,
@@ -2,7 +2,7 @@ from slumber import configure
 from slumber.operations.instancedata import InstanceData
 from slumber.operations.instancelist import InstanceListHal
 
-from models import Pizza, Shop
+from models import Pizza, PizzaSizePrice, Shop
 from operations import OrderPizza, ShopList
 
 
@@ -10,7 +10,14 @@ configure(
     {'test': True})
 
 configure(Pizza,
-    operations_extra = [(OrderPizza, 'order')])
+    operations_extra = [(OrderPizza, 'order')],
+    filters = ['for_sale', 'name__startswith'],
+    orderings = ['name'],
+    aggregates = ['max_extra_toppings'])
+
+configure(PizzaSizePrice,
+    orderings = ['price'],
+    aggregates = ['amount'])
 
 configure(Shop,
     operations_extra = [
@@ -19,4 +26,6 @@ configure(Shop,
         (InstanceListHal, 'shops-hal', 'shops/mount2'),
         (InstanceData, 'data', 'pizzas/shop'),
     ],
-    properties_ro = ['web_address'])
+    properties_ro = ['web_address'],
+    orderings = ['slug'],
+    track_changes = True)
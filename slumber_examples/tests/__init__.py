@@ -1,17 +1,34 @@
 from accept_handler import *
+from aggregate import *
 from application_configuration import *
 from authentication import *
+from batch import *
+from bootstrap import *
+from changelog import *
+from checksums import *
 from client import *
+from columns import *
+from dataarray import *
 from forms import *
 from hal import *
 from html import *
+from identity import *
+from lru import *
 from middleware import *
 from models import *
 from mock_client import *
+from notifications import *
 from operations import *
+from prefetch import *
 from proxies import *
+from replica import *
+from resolve import *
 from server import *
 from services import *
+from sharedcache import *
+from snapshot import *
+from stream import *
+from templates import *
 from ua import *
 from uris import *
 from views import *
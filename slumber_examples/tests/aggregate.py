@@ -0,0 +1,93 @@
+from decimal import Decimal
+from mock import patch
+
+from django.test import TestCase
+
+from slumber import client, configure
+from slumber.connector.ua import get
+
+from slumber_examples.models import Pizza, PizzaPrice, PizzaSizePrice
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestAggregates(ConfigureUser, TestCase):
+    url = '/slumber/slumber_examples/Pizza/'
+
+    def setUp(self):
+        super(TestAggregates, self).setUp()
+        for n in range(6):
+            Pizza(name='P%s' % n, for_sale=bool(n % 2),
+                max_extra_toppings=n).save()
+        self.pizza = Pizza.objects.get(name='P1')
+        for n in range(3):
+            price = PizzaPrice(pizza=self.pizza, date='2011-04-0%s' % (n + 1))
+            price.save()
+            for size, amount in [('s', '10.00'), ('l', '15.50')]:
+                PizzaSizePrice(price=price, size=size,
+                    amount=Decimal(amount) + n).save()
+        self.prices = '%sdata/%s/prices/' % (self.url, self.pizza.pk)
+
+    def test_count(self):
+        _, json = get(self.url + 'count/')
+        self.assertEqual(json['count'], 6)
+        _, json = get(self.url + 'count/?for_sale=True')
+        self.assertEqual(json['count'], 3)
+        get(self.url + 'count/?max_extra_toppings=1', codes=[403])
+
+    def test_aggregate(self):
+        _, json = get(self.url +
+            'aggregate/?function=sum&field=max_extra_toppings')
+        self.assertEqual(json['value'], 15)
+        _, json = get(self.url + 'aggregate/?function=max'
+            '&field=max_extra_toppings&name__startswith=P')
+        self.assertEqual(json['value'], 5)
+        _, json = get(self.url + 'aggregate/?function=sum'
+            '&field=max_extra_toppings&group_by=for_sale')
+        self.assertEqual(json['groups'], [[False, 6], [True, 9]])
+
+    def test_aggregate_is_whitelisted(self):
+        get(self.url + 'aggregate/?function=median'
+            '&field=max_extra_toppings', codes=[403])
+        get(self.url + 'aggregate/?function=sum&field=id', codes=[403])
+        get(self.url + 'aggregate/?function=sum&field=max_extra_toppings'
+            '&group_by=max_extra_toppings', codes=[403])
+
+    def test_aggregated_fields_must_be_numeric(self):
+        with self.assertRaises(AssertionError):
+            configure(Pizza, aggregates=['name'])
+        self.assertNotIn('name', Pizza.slumber_model.aggregates)
+
+    def test_data_array_count_has_no_rows(self):
+        _, json = get(self.prices + '?page_size=0')
+        self.assertEqual(json['count'], 3)
+        self.assertEqual(json['page'], [])
+        self.assertFalse(json.has_key('next_page'))
+        _, json = get(self.prices + '?page_size=2')
+        self.assertEqual(len(json['page']), 2)
+        self.assertIn('page_size=2', json['next_page'])
+
+    def test_data_array_aggregate(self):
+        price = self.pizza.prices.order_by('pk')[0]
+        _, json = get('/slumber/slumber_examples/PizzaPrice/data/%s/amounts/'
+            '?function=sum&field=amount' % price.pk)
+        self.assertEqual(Decimal(str(json['value'])), Decimal('25.50'))
+
+    def test_client(self):
+        pizzas = client.slumber_examples.Pizza
+        self.assertEqual(pizzas.count(), 6)
+        self.assertEqual(pizzas.count(for_sale=False), 3)
+        self.assertEqual(pizzas.aggregate('min', 'max_extra_toppings',
+            for_sale=True), 1)
+        self.assertEqual(pizzas.aggregate('avg', 'max_extra_toppings',
+            group_by='for_sale'), {False: 2, True: 3})
+
+    def test_client_data_array(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        with patch('slumber.connector.prefetch.get', wraps=get) as pages:
+            self.assertEqual(len(pizza.prices), 3)
+        self.assertTrue(pages.call_args[0][0].endswith('?page_size=0'))
+        amounts = pizza.prices[0].amounts
+        self.assertEqual(Decimal(str(amounts.aggregate('max', 'amount'))),
+            Decimal('17.50'))
+        self.assertEqual(len(amounts.aggregate('sum', 'amount',
+            group_by='price')), 1)
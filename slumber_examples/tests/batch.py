@@ -0,0 +1,158 @@
+from mock import patch
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.batch import BatchError
+from slumber.connector.ua import get, post
+
+from slumber_examples.models import Pizza
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestBatchEndpoint(ConfigureUser, TestCase):
+    url = '/slumber/_batch/'
+
+    def test_listed_in_directory(self):
+        _, json = get('/slumber/')
+        self.assertEqual(json['operations']['batch'], self.url)
+
+    def test_get_not_allowed(self):
+        response, json = get(self.url, codes=[405])
+
+    def test_operations_are_run_in_order(self):
+        _, json = post(self.url, dict(operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(id=3, name='P1')),
+            dict(uri='http://localhost:8000/slumber/slumber_examples/'
+                'Pizza/update/3/', method='POST', body=dict(for_sale=True)),
+            dict(uri='/slumber/slumber_examples/Pizza/data/3/'),
+            dict(uri='/slumber/slumber_examples/Pizza/get/',
+                body=dict(name='P1')),
+        ]))
+        self.assertEqual([r['_meta']['status'] for r in json['results']],
+            [200] * 4)
+        self.assertTrue(json['results'][0]['created'])
+        self.assertTrue(json['results'][2]['fields']['for_sale']['data'])
+        self.assertTrue(json['results'][3]['identity'].endswith(
+            '/Pizza/data/3/'))
+        self.assertTrue(Pizza.objects.get(pk=3).for_sale)
+
+    def test_failures_are_reported(self):
+        _, json = post(self.url, dict(operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/data/100/'),
+            dict(uri='/not-slumber/'),
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P1')),
+        ]))
+        self.assertEqual([r['_meta']['status'] for r in json['results']],
+            [404, 404, 200])
+        self.assertFalse(json.has_key('committed'))
+        self.assertEqual(Pizza.objects.count(), 1)
+
+    def test_exceptions_are_reported(self):
+        _, json = post(self.url, dict(operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P1')),
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P2', not_a_field=1)),
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P3')),
+        ]))
+        self.assertEqual([r['_meta']['status'] for r in json['results']],
+            [200, 500, 200])
+        self.assertTrue(json['results'][0]['created'])
+        self.assertEqual(sorted(Pizza.objects.values_list('name', flat=True)),
+            ['P1', 'P3'])
+
+    def test_atomic_rolls_back_on_exceptions(self):
+        _, json = post(self.url, dict(atomic=True, operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P1')),
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P2', not_a_field=1))]))
+        self.assertFalse(json['committed'])
+        self.assertEqual([r['_meta']['status'] for r in json['results']],
+            [200, 500])
+        self.assertEqual(Pizza.objects.count(), 0)
+
+    def test_headers_are_passed(self):
+        Pizza(id=1, name='P1').save()
+        _, json = post(self.url, dict(operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/update/1/',
+                method='POST', body=dict(for_sale=True),
+                headers={'Prefer': 'return=representation'})]))
+        self.assertTrue(json['results'][0]['fields']['for_sale']['data'])
+
+    def test_atomic_commits(self):
+        _, json = post(self.url, dict(atomic=True, operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P1')),
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P2'))]))
+        self.assertTrue(json['committed'])
+        self.assertEqual(Pizza.objects.count(), 2)
+
+    def test_atomic_rolls_back(self):
+        _, json = post(self.url, dict(atomic=True, operations=[
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P1')),
+            dict(uri='/slumber/slumber_examples/Pizza/data/100/'),
+            dict(uri='/slumber/slumber_examples/Pizza/create/',
+                method='POST', body=dict(name='P2'))]))
+        self.assertFalse(json['committed'])
+        self.assertEqual(len(json['results']), 2)
+        self.assertEqual(Pizza.objects.count(), 0)
+
+    def test_requires_user(self):
+        response = self.client.post(self.url, '{"operations": []}',
+            content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+class TestClientBatch(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestClientBatch, self).setUp()
+        self.pizzas = client.slumber_examples.Pizza
+
+    def test_writes_are_sent_together(self):
+        with client.batch() as batch:
+            created = self.pizzas.create(name='P1')
+            counted = self.pizzas.create_many(
+                [dict(name='P2'), dict(name='P3')])
+            self.assertIsNone(created.status)
+            with self.assertRaises(BatchError):
+                created.value
+        self.assertTrue(batch.committed)
+        self.assertEqual(created.value.name, 'P1')
+        self.assertEqual(counted.value, 2)
+        self.assertEqual(Pizza.objects.count(), 3)
+
+    def test_only_one_request_is_made(self):
+        self.pizzas._operations
+        batch = client.batch()
+        calls = []
+        def counting_post(*a, **kw):
+            calls.append(a)
+            return post(*a, **kw)
+        with patch('slumber.connector.batch.post', counting_post):
+            with patch('slumber.connector.api.post', self.fail):
+                with batch:
+                    self.pizzas.create(name='P1')
+                    self.pizzas.create(name='P2')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Pizza.objects.count(), 2)
+
+    def test_atomic_failure(self):
+        p1 = self.pizzas.create(name='P1')
+        with client.batch(atomic=True) as batch:
+            updated = self.pizzas.update(p1, for_sale=True)
+            refused = self.pizzas.update_many({'for_sale': True}, name='P1')
+            later = self.pizzas.delete(p1)
+        self.assertFalse(batch.committed)
+        for result in [updated, refused, later]:
+            with self.assertRaises(BatchError):
+                result.value
+        self.assertEqual(refused.status, 409)
+        self.assertFalse(p1.for_sale)
+        self.assertFalse(Pizza.objects.get(pk=p1.id).for_sale)
@@ -0,0 +1,94 @@
+from mock import patch
+
+from django.test import TestCase
+
+from slumber.connector import Client
+from slumber.connector.ua import get
+
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestBootstrap(ConfigureUser, TestCase):
+    def test_expanded_directory(self):
+        _, json = get('/slumber/?expand=1')
+        app = json['expanded']['slumber_examples']
+        self.assertEqual(app['url'], '/slumber/slumber_examples/')
+        _, model = get('/slumber/slumber_examples/Pizza/')
+        del model['_meta']
+        self.assertEqual(app['models']['Pizza'],
+            dict(model, url='/slumber/slumber_examples/Pizza/'))
+        self.assertTrue(json['expanded'].has_key('django.contrib.auth'))
+        self.assertEqual(get('/slumber/?expand=1')[1]['fingerprint'],
+            json['fingerprint'])
+        _, json = get('/slumber/')
+        self.assertFalse(json.has_key('expanded'))
+        self.assertFalse(json.has_key('fingerprint'))
+        _, fingerprint = get('/slumber/?fingerprint=1')
+        self.assertFalse(fingerprint.has_key('expanded'))
+        self.assertEqual(fingerprint['fingerprint'],
+            get('/slumber/?expand=1')[1]['fingerprint'])
+
+    def test_client_is_built_from_one_request(self):
+        fetched = []
+        def _get(url, ttl=0):
+            fetched.append(url)
+            return get(url, ttl)
+        client = Client()
+        with patch('slumber.connector.get', _get):
+            fingerprint = client.bootstrap()
+        self.assertEqual(fetched, ['http://localhost:8000/slumber/?expand=1'])
+        self.assertEqual(fingerprint,
+            get('/slumber/?expand=1')[1]['fingerprint'])
+        with patch('slumber.connector.get', self.fail), \
+                patch('slumber.connector.api.get', self.fail):
+            pizza = client.slumber_examples.Pizza
+            self.assertEqual(pizza.module, 'slumber_examples')
+            self.assertEqual(pizza._operations['create'],
+                'http://localhost:8000/slumber/slumber_examples/Pizza/create/')
+            self.assertEqual(client.django.contrib.auth.User.name, 'User')
+            self.assertEqual(client._service_operation('batch'),
+                'http://localhost:8000/slumber/_batch/')
+        self.assertEqual(client.django.contrib.auth._directory,
+            'http://localhost:8000/slumber/django/contrib/auth/')
+
+    def test_expired_tree_is_expanded_again(self):
+        client = Client()
+        client.bootstrap()
+        client._tree = (0,) + client._tree[1:]
+        fetched = []
+        def _get(url, ttl=0):
+            fetched.append(url)
+            return get(url, ttl)
+        with patch('slumber.connector.get', _get), \
+                patch('slumber.connector.api.get', self.fail), \
+                patch('slumber.connector.write_snapshot', self.fail):
+            self.assertEqual(client.slumber_examples.Pizza.name, 'Pizza')
+        self.assertEqual(fetched,
+            ['http://localhost:8000/slumber/?fingerprint=1'])
+
+    def test_changed_fingerprint_is_expanded_again(self):
+        client = Client()
+        client.bootstrap()
+        client._tree = (0,) + client._tree[1:]
+        client._fingerprint = 'stale'
+        fetched = []
+        def _get(url, ttl=0):
+            fetched.append(url)
+            return get(url, ttl)
+        with patch('slumber.connector.get', _get), \
+                patch('slumber.connector.write_snapshot') as written:
+            self.assertEqual(client.slumber_examples.Pizza.name, 'Pizza')
+        self.assertEqual(fetched,
+            ['http://localhost:8000/slumber/?fingerprint=1',
+                'http://localhost:8000/slumber/?expand=1'])
+        self.assertEqual(written.call_count, 1)
+        self.assertNotEqual(client._fingerprint, 'stale')
+
+    def test_services_are_bootstrapped_separately(self):
+        with patch('slumber.server._get_slumber_directory', lambda: {
+                'pizzas': 'http://localhost:8000/slumber/',
+                'takeaway': 'http://localhost:8000/slumber/'}):
+            client = Client()
+        fingerprints = client.bootstrap()
+        self.assertEqual(sorted(fingerprints.keys()), ['pizzas', 'takeaway'])
+        self.assertTrue(hasattr(client.pizzas.slumber_examples, 'Pizza'))
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from mock import patch
+import time
+
+from django.conf import settings
+from django.test import TestCase
+
+from slumber import client, configure
+from slumber.changelog import prune_changes
+from slumber.changelog.models import Change
+from slumber.connector.ua import get, post
+
+from slumber_examples.models import Pizza, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestChanges(ConfigureUser, TestCase):
+    url = '/slumber/slumber_examples/Shop/changes/'
+
+    def setUp(self):
+        super(TestChanges, self).setUp()
+        self.shops = []
+        for n in range(3):
+            shop = Shop(name='Shop %s' % n, slug='shop%s' % n)
+            shop.save()
+            self.shops.append(shop)
+
+    def kinds(self, json):
+        return [(c['pk'], c['kind']) for c in json['changes']]
+
+    def test_operation_only_on_tracked_models(self):
+        _, json = get('/slumber/slumber_examples/Shop/')
+        self.assertTrue(json['operations'].has_key('changes'))
+        _, json = get('/slumber/slumber_examples/Pizza/')
+        self.assertFalse(json['operations'].has_key('changes'))
+
+    def test_changes_are_collapsed(self):
+        first, second, third = self.shops
+        gone = third.pk
+        first.name = 'Changed'
+        first.save()
+        second.save()
+        third.delete()
+        _, json = get(self.url)
+        self.assertEqual(self.kinds(json), [(first.pk, 'created'),
+            (second.pk, 'created'), (gone, 'deleted')])
+        self.assertTrue(json['changes'][0]['data'].endswith(
+            '/slumber/pizzas/shop/%s/' % first.pk))
+        _, json = get(self.url + '?after=%s' % json['cursor'])
+        self.assertEqual(json['changes'], [])
+        first.save()
+        _, json = get(self.url + '?after=%s' % json['cursor'])
+        self.assertEqual(self.kinds(json), [(first.pk, 'updated')])
+
+    def test_paging(self):
+        _, json = get(self.url + '?page_size=2')
+        self.assertEqual(len(json['changes']), 2)
+        _, json = get(json['next_page'])
+        self.assertEqual(self.kinds(json), [(self.shops[2].pk, 'created')])
+        self.assertFalse(json.has_key('next_page'))
+        get(self.url + '?after=x', codes=[403])
+
+    def test_bulk_operations_are_recorded(self):
+        cursor = Change.objects.order_by('-pk')[0].pk
+        post('/slumber/slumber_examples/Shop/create-many/',
+            {'objects': [{'name': 'New', 'slug': 'new'}]})
+        post('/slumber/slumber_examples/Shop/update-many/',
+            {'pks': [self.shops[0].pk], 'values': {'name': 'Bulk'}})
+        _, json = get(self.url + '?after=%s' % cursor)
+        new = Shop.objects.get(slug='new')
+        self.assertEqual(self.kinds(json),
+            [(new.pk, 'created'), (self.shops[0].pk, 'updated')])
+
+    def test_bulk_updates_are_recorded_together(self):
+        with patch.object(Change.objects, 'bulk_create',
+                wraps=Change.objects.bulk_create) as created:
+            post('/slumber/slumber_examples/Shop/update-many/',
+                {'pks': [s.pk for s in self.shops], 'values': {'name': 'B'}})
+        self.assertEqual(created.call_count, 1)
+        self.assertEqual(len(created.call_args[0][0]), 3)
+
+    def test_only_tracked_models_are_recorded(self):
+        count = Change.objects.count()
+        Pizza(name='Untracked').save()
+        self.assertEqual(Change.objects.count(), count)
+
+    def test_tracking_needs_the_application(self):
+        with patch.object(settings, 'INSTALLED_APPS', ['slumber_examples']):
+            with self.assertRaises(AssertionError):
+                configure(Pizza, track_changes=True)
+        self.assertFalse(Pizza.slumber_model.changes_tracked)
+
+    def test_client_sync(self):
+        changes = client.slumber_examples.Shop.changes(page_size=2)
+        seen = list(changes)
+        self.assertEqual([(k, pk) for k, pk, _ in seen],
+            [('created', s.pk) for s in self.shops])
+        self.assertEqual(seen[0][2],
+            'http://localhost:8000/slumber/pizzas/shop/%s/' % self.shops[0].pk)
+        gone = self.shops[1].pk
+        self.shops[1].delete()
+        changes = client.slumber_examples.Shop.changes(changes.cursor)
+        self.assertEqual([(k, pk) for k, pk, _ in changes],
+            [('deleted', gone)])
+
+    def age(self, shop):
+        Change.objects.filter(instance=unicode(shop.pk)).update(
+            when=datetime.now() - timedelta(days=30))
+
+    def test_old_changes_are_pruned(self):
+        self.age(self.shops[0])
+        self.age(self.shops[1])
+        prune_changes()
+        marker = Change.objects.order_by('pk')[0]
+        self.assertEqual(marker.kind, 'pruned')
+        self.assertEqual(marker.instance, unicode(self.shops[1].pk))
+        self.assertEqual(Change.objects.count(), 2)
+        _, json = get(self.url)
+        self.assertTrue(json['expired'])
+        self.assertEqual(json['changes'], [])
+        self.assertEqual(json['cursor'], Change.objects.order_by('-pk')[0].pk)
+        _, json = get(self.url + '?after=%s' % marker.pk)
+        self.assertFalse(json.has_key('expired'))
+        self.assertEqual(self.kinds(json), [(self.shops[2].pk, 'created')])
+        changes = client.slumber_examples.Shop.changes()
+        self.assertEqual(list(changes), [])
+        self.assertTrue(changes.expired)
+
+    def test_changes_are_pruned_on_write(self):
+        self.age(self.shops[0])
+        with patch('slumber.changelog._PRUNED', 0):
+            self.shops[2].save()
+        self.assertEqual(Change.objects.order_by('pk')[0].kind, 'pruned')
+        # It isn't pruned again straight away
+        self.age(self.shops[1])
+        with patch('slumber.changelog._PRUNED', time.time()):
+            self.shops[2].save()
+        self.assertEqual(Change.objects.count(), 5)
+
+    def test_changes_can_be_kept(self):
+        self.age(self.shops[0])
+        with patch.object(settings, 'SLUMBER_CHANGELOG_RETENTION', None,
+                create=True):
+            prune_changes()
+        self.assertEqual(Change.objects.count(), 3)
@@ -0,0 +1,123 @@
+from mock import patch
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.identity import INSTANCES
+from slumber.connector.ua import get, post
+from slumber.operations.checksums import range_checksum
+from slumber.replica.models import Document
+
+from slumber_examples.models import Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestChecksums(ConfigureUser, TestCase):
+    url = '/slumber/slumber_examples/Shop/checksums/'
+
+    def setUp(self):
+        super(TestChecksums, self).setUp()
+        self.shops = []
+        for n in range(20):
+            shop = Shop(name='Shop %s' % n, slug='shop%s' % n)
+            shop.save()
+            self.shops.append(shop)
+
+    def test_ranges(self):
+        _, json = get(self.url + '?parts=4')
+        self.assertEqual(json['count'], 20)
+        self.assertEqual([r['count'] for r in json['ranges']], [5] * 4)
+        self.assertEqual(json['ranges'][0]['after'], None)
+        self.assertEqual(json['ranges'][0]['upto'], self.shops[4].pk)
+        self.assertEqual(json['ranges'][1]['after'], self.shops[4].pk)
+        self.assertEqual(json['checksum'],
+            range_checksum([r['checksum'] for r in
+                get(self.url + '?parts=20')[1]['rows']]))
+
+    def test_rows_in_range(self):
+        _, json = get(self.url + '?parts=4&after=%s&upto=%s' % (
+            self.shops[4].pk, self.shops[8].pk))
+        self.assertFalse(json.has_key('ranges'))
+        self.assertEqual([r['pk'] for r in json['rows']],
+            [s.pk for s in self.shops[5:9]])
+        self.assertEqual(json['rows'][0]['data'],
+            '/slumber/pizzas/shop/%s/' % self.shops[5].pk)
+        _, resolved = post('/slumber/_resolve/',
+            dict(urls=[json['rows'][0]['data']]))
+        self.assertEqual(resolved['checksums'],
+            {json['rows'][0]['data']: json['rows'][0]['checksum']})
+        self.assertEqual(json['checksum'],
+            range_checksum([r['checksum'] for r in json['rows']]))
+
+    def test_checksums_change_with_the_data(self):
+        _, before = get(self.url + '?parts=4')
+        Shop.objects.filter(pk=self.shops[7].pk).update(name='Changed')
+        _, after = get(self.url + '?parts=4')
+        self.assertNotEqual(before['checksum'], after['checksum'])
+        self.assertEqual(
+            [b['checksum'] == a['checksum']
+                for b, a in zip(before['ranges'], after['ranges'])],
+            [True, False, True, True])
+
+    def test_bad_parameters(self):
+        get(self.url + '?parts=1', codes=[403])
+        get(self.url + '?parts=x', codes=[403])
+        get(self.url + '?after=x', codes=[403])
+
+
+class TestRepair(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestRepair, self).setUp()
+        self.replicas = patch.dict(
+            'slumber.connector.configuration.REPLICAS',
+            {'/slumber_examples/Shop/': 60})
+        self.replicas.start()
+        self.shops = []
+        for n in range(40):
+            shop = Shop(name='Shop %s' % n, slug='shop%s' % n)
+            shop.save()
+            self.shops.append(shop)
+        self.model = client.slumber_examples.Shop
+        self.model.sync()
+        self.fetched = []
+    def tearDown(self):
+        self.replicas.stop()
+        INSTANCES.clear()
+        super(TestRepair, self).tearDown()
+
+    def repair(self):
+        from slumber.replica import fetch_json
+        def _fetch(url, ttl):
+            self.fetched.append(url)
+            return fetch_json(url, ttl)
+        with patch('slumber.replica.fetch_json', _fetch):
+            return self.model.repair()
+
+    def test_nothing_to_repair(self):
+        self.assertEqual(self.repair(), 0)
+        self.assertEqual(len(self.fetched), 1)
+
+    def test_only_differences_are_fetched(self):
+        Shop.objects.filter(pk=self.shops[30].pk).update(name='Changed')
+        self.assertEqual(self.repair(), 1)
+        # The root, the range that differs, the service directory and the
+        # instance's data array. The instance itself is resolved in a POST
+        self.assertEqual(len(self.fetched), 4)
+        self.assertEqual(self.fetched[2], 'http://localhost:8000/slumber/')
+        self.assertEqual(self.fetched[3],
+            'http://localhost:8000/slumber/slumber_examples/Shop/data/%s/'
+                'pizza/?format=columns' % self.shops[30].pk)
+        self.assertEqual(
+            get('/slumber/pizzas/shop/%s/' % self.shops[30].pk)[1]['display'],
+            'Changed')
+        self.assertEqual(self.repair(), 0)
+
+    def test_missing_and_extra_instances(self):
+        missing, extra = self.shops[3].pk, self.shops[20].pk
+        Document.objects.filter(instance=unicode(missing)).delete()
+        Shop.objects.filter(pk=extra).delete()
+        self.assertEqual(self.repair(), 2)
+        self.assertTrue(Document.objects.filter(
+            instance=unicode(missing)).exists())
+        self.assertFalse(Document.objects.filter(
+            instance=unicode(extra)).exists())
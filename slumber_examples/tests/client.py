@@ -1,4 +1,6 @@
 from mock import patch
+import threading
+import time
 
 from django.contrib.auth.models import User
 from django.test import TestCase
@@ -85,6 +87,52 @@ class TestLoads(ConfigureUser, TestCase):
         self.assertEquals(rpizza.id, lpizza.id)
 
 
+class TestDirectoryTree(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestDirectoryTree, self).setUp()
+        self.client = Client()
+        self.directory = get(self.client._directory)
+        self.fetched = []
+    def _get(self, url, ttl=0):
+        self.fetched.append(url)
+        if url != self.client._directory:
+            return get(url, ttl)
+        time.sleep(0.01)
+        return self.directory
+
+    def test_directory_is_fetched_once(self):
+        with patch('slumber.connector.get', self._get):
+            pizza = self.client.slumber_examples.Pizza
+            self.assertIs(self.client.slumber_examples.Pizza, pizza)
+            self.assertFalse(hasattr(self.client, 'auth'))
+            self.assertFalse(hasattr(self.client, 'not_an_app'))
+            self.assertTrue(hasattr(self.client.django.contrib, 'auth'))
+            self.assertEqual(self.client._service_operation('batch'),
+                'http://localhost:8000/slumber/_batch/')
+        self.assertEqual(self.fetched, [self.client._directory,
+            self.client._directory + 'slumber_examples/'])
+
+    def test_expired_tree_is_replaced(self):
+        with patch('slumber.connector.get', self._get):
+            app = self.client.slumber_examples
+            self.client._tree = (0,) + self.client._tree[1:]
+            self.assertFalse(hasattr(self.client, 'not_an_app'))
+            self.assertIsNot(self.client.slumber_examples, app)
+            self.assertIs(self.client.slumber_examples.Pizza, app.Pizza)
+        self.assertEqual(self.fetched.count(self.client._directory), 2)
+
+    def test_one_thread_fetches_the_directory(self):
+        found = []
+        def find():
+            found.append(self.client.slumber_examples)
+        with patch('slumber.connector.get', self._get):
+            threads = [threading.Thread(target=find) for _ in range(5)]
+            [t.start() for t in threads]
+            [t.join() for t in threads]
+        self.assertEqual(len(self.fetched), 1)
+        self.assertEqual(len(set([id(a) for a in found])), 1)
+
+
 class TestAuth(ConfigureUser, TestCase):
     def test_has_attributes(self):
         user = client.django.contrib.auth.User.get(pk=self.user.pk)
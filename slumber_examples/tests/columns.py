@@ -0,0 +1,74 @@
+from mock import patch
+from simplejson import dumps
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.ua import get
+
+from slumber_examples.models import Pizza, PizzaPrice, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestColumns(ConfigureUser, TestCase):
+    url = '/slumber/slumber_examples/Pizza/instances/'
+
+    def setUp(self):
+        super(TestColumns, self).setUp()
+        self.shop = Shop(name='Shop', slug='shop')
+        self.shop.save()
+        for n in range(15):
+            Pizza(name='P%02d' % n, for_sale=bool(n % 2),
+                exclusive_to=self.shop if n == 14 else None).save()
+
+    def test_instance_list(self):
+        _, objects = get(self.url)
+        _, json = get(self.url + '?format=columns&fields=name,for_sale')
+        self.assertFalse(json.has_key('page'))
+        self.assertEqual(json['columns']['pk'],
+            [o['pk'] for o in objects['page']])
+        self.assertEqual(json['columns']['display'],
+            [o['display'] for o in objects['page']])
+        self.assertEqual(json['columns']['for_sale'][:2], [False, True])
+        self.assertEqual(json['fields']['name']['kind'], 'value')
+        self.assertEqual(json['data'],
+            '/slumber/slumber_examples/Pizza/data/{pk}/')
+        self.assertIn('format=columns', json['next_page'])
+        self.assertIn('fields=name%2Cfor_sale', json['next_page'])
+        _, compact = get(self.url + '?format=columns')
+        self.assertLess(len(dumps(compact)), len(dumps(objects)) * 2 / 3)
+
+    def test_custom_data_urls(self):
+        _, json = get('/slumber/slumber_examples/Shop/instances/'
+            '?format=columns')
+        self.assertEqual(json['data'], '/slumber/pizzas/shop/{pk}/')
+
+    def test_bad_parameters(self):
+        get(self.url + '?format=rows', codes=[403])
+        get(self.url + '?format=columns&fields=nothing', codes=[403])
+
+    def test_data_array(self):
+        pizza = Pizza.objects.get(name='P00')
+        for n in range(12):
+            PizzaPrice(pizza=pizza, date='2011-04-%02d' % (n + 1)).save()
+        url = '/slumber/slumber_examples/Pizza/data/%s/prices/' % pizza.pk
+        _, json = get(url + '?format=columns&fields=date')
+        self.assertEqual(json['count'], 12)
+        self.assertEqual(json['type'],
+            '/slumber/slumber_examples/PizzaPrice/')
+        self.assertEqual(len(json['columns']['pk']), 10)
+        self.assertEqual(json['columns']['date'][0], '2011-04-12')
+        self.assertIn('format=columns', json['next_page'])
+        _, json = get(json['next_page'])
+        self.assertEqual(len(json['columns']['date']), 2)
+        remote = client.slumber_examples.Pizza.get(pk=pizza.pk)
+        self.assertEqual(len(list(remote.prices)), 12)
+
+    def test_client_expands_fields(self):
+        pizzas = list(client.slumber_examples.Pizza.instances(
+            fields=['name', 'exclusive_to']))
+        self.assertEqual(len(pizzas), 15)
+        with patch('slumber.connector.api.get', self.fail):
+            self.assertEqual(pizzas[0].name, 'P14')
+            self.assertEqual(unicode(pizzas[0].exclusive_to), 'Shop')
+            self.assertIsNone(pizzas[1].exclusive_to)
@@ -0,0 +1,107 @@
+from mock import patch
+from simplejson import dumps
+import threading
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.dataarray import DataArray
+from slumber.connector.api import get_model
+from slumber.connector.ua import get
+
+from slumber_examples.models import Pizza, PizzaPrice
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class _Response(dict):
+    status = 200
+
+
+class TestDataArray(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestDataArray, self).setUp()
+        self.s = Pizza(name='S1')
+        self.s.save()
+        for p in range(25):
+            PizzaPrice(pizza=self.s, date='2011-04-%s' % (p + 1)).save()
+        self.pizza = client.slumber_examples.Pizza.get(pk=self.s.pk)
+        self.pizza.name
+
+    def _pages(self):
+        return patch('slumber.connector.prefetch.get', wraps=get)
+
+    def test_server_gives_count_on_first_page(self):
+        url = '/slumber/slumber_examples/Pizza/data/%s/prices/' % self.s.pk
+        _, json = get(url)
+        self.assertEqual(json['count'], 25)
+        _, json = get(json['next_page'])
+        self.assertFalse(json.has_key('count'))
+
+    def test_pages_are_fetched_as_needed(self):
+        with self._pages() as pages:
+            prices = self.pizza.prices
+            self.assertEqual(pages.call_count, 0)
+            self.assertEqual(len(prices), 25)
+            self.assertEqual(pages.call_count, 1)
+            for n, price in enumerate(prices):
+                if n == 12:
+                    break
+            self.assertEqual(pages.call_count, 3)
+            self.assertEqual(len(list(prices)), 25)
+            self.assertEqual(pages.call_count, 6)
+        self.assertEqual(prices._items, [])
+
+    def test_indexing_and_slicing(self):
+        prices = self.pizza.prices
+        pks = list(PizzaPrice.objects.order_by('-pk').values_list(
+            'pk', flat=True))
+        self.assertEqual(prices[0].id, pks[0])
+        self.assertEqual(prices[-1].id, pks[-1])
+        self.assertEqual([p.id for p in prices[8:13]], pks[8:13])
+        self.assertEqual([p.id for p in prices[::10]], pks[::10])
+        self.assertEqual([p.id for p in prices[::-1]], pks[::-1])
+        self.assertEqual([p.id for p in prices[-3:]], pks[-3:])
+        with self.assertRaises(IndexError):
+            prices[25]
+
+    def test_slices_are_fetched_as_needed(self):
+        with self._pages() as pages:
+            prices = self.pizza.prices
+            self.assertEqual(len(prices[2:5]), 3)
+            self.assertEqual(pages.call_count, 1)
+            self.assertEqual(len(prices[8:13]), 5)
+            self.assertEqual(pages.call_count, 2)
+        for call in pages.call_args_list:
+            self.assertNotIn('page_size=0', call[0][0])
+
+    def test_length_without_a_count(self):
+        def _get(url, ttl):
+            response, json = get(url, ttl)
+            json.pop('count', None)
+            return response, json
+        with patch('slumber.connector.prefetch.get', _get):
+            self.assertEqual(len(self.pizza.prices), 25)
+
+    def test_remote_pages_are_read_ahead(self):
+        remote = 'http://remote.example.com/slumber/app/Thing/'
+        get_model(remote)
+        requests = []
+        def _request(_self, url, headers={}):
+            requests.append(threading.current_thread())
+            start = int(url.split('start_after=')[1]) \
+                if 'start_after=' in url else 0
+            json = dict(page=[dict(type='/slumber/app/Thing/',
+                    data='/slumber/app/Thing/data/%s/' % n, display=str(n))
+                for n in range(start, start + 10)])
+            if start < 20:
+                json['next_page'] = '/slumber/app/Thing/data/1/parts/' \
+                    '?start_after=%s' % (start + 10)
+            return _Response(), dumps(json)
+        with patch('slumber.connector.ua.Http.request', _request):
+            parts = DataArray(remote, 'data/1/parts/', 0)
+            self.assertEqual(unicode(parts[0]), '0')
+            self.assertEqual(unicode(parts[25]), '25')
+            self.assertEqual(len(parts), 30)
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(requests[0], threading.current_thread())
+        self.assertNotIn(threading.current_thread(), requests[1:])
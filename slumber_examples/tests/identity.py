@@ -0,0 +1,141 @@
+from mock import patch
+from django.test import TestCase
+from unittest2 import TestCase as UnitTestCase
+
+from slumber import client
+from slumber.connector.api import _InstanceConnector, invalidate_instances
+from slumber.connector.identity import IdentityMap, INSTANCES
+from slumber.connector.middleware import Cache
+from slumber_examples.models import Pizza
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+MODEL_URL = 'http://example.com/slumber/app/Model/'
+
+
+class _Connector(object):
+    pass
+
+
+class TestIdentityMap(UnitTestCase):
+    def setUp(self):
+        self.identity = IdentityMap(2)
+        self.ttl = patch.dict(
+            'slumber.connector.configuration.INSTANCE_CACHE_TTL',
+            {'/app/Model/': 60})
+        self.ttl.start()
+    def tearDown(self):
+        self.ttl.stop()
+
+    def test_models_without_ttl_are_not_stored(self):
+        self.identity.put('http://example.com/other/data/1/', _Connector(),
+            'http://example.com/slumber/app/Other/')
+        self.assertIsNone(self.identity.get('http://example.com/other/data/1/'))
+
+    def test_put_and_get(self):
+        connector = _Connector()
+        self.identity.put(MODEL_URL + 'data/1/', connector, MODEL_URL)
+        self.assertIs(self.identity.get(MODEL_URL + 'data/1/'), connector)
+
+    def test_expiry(self):
+        self.identity.put(MODEL_URL + 'data/1/', _Connector(), MODEL_URL)
+        with patch('slumber.connector.lru.time.time', lambda: 1e12):
+            with patch('slumber.connector.identity.time.time', lambda: 1e12):
+                self.assertIsNone(self.identity.get(MODEL_URL + 'data/1/'))
+
+    def test_live_connectors_survive_eviction(self):
+        live = _Connector()
+        self.identity.put(MODEL_URL + 'data/1/', live, MODEL_URL)
+        for pk in range(2, 5):
+            self.identity.put(MODEL_URL + 'data/%s/' % pk, _Connector(),
+                MODEL_URL)
+        self.assertIs(self.identity.get(MODEL_URL + 'data/1/'), live)
+        self.assertIsNone(self.identity.get(MODEL_URL + 'data/2/'))
+
+    def test_invalidate_calls_listeners(self):
+        invalidated = []
+        self.identity.listeners.append(invalidated.append)
+        self.identity.put(MODEL_URL + 'data/1/', _Connector(), MODEL_URL)
+        self.identity.invalidate(MODEL_URL + 'data/1/')
+        self.assertIsNone(self.identity.get(MODEL_URL + 'data/1/'))
+        self.assertEqual(invalidated, [MODEL_URL + 'data/1/'])
+
+    def test_invalidate_model(self):
+        keep = _Connector()
+        self.identity.put(MODEL_URL + 'data/1/', _Connector(), MODEL_URL)
+        with patch.dict('slumber.connector.configuration.INSTANCE_CACHE_TTL',
+                {'/app/Other/': 60}):
+            self.identity.put('http://example.com/other/data/1/', keep,
+                'http://example.com/slumber/app/Other/')
+        self.identity.invalidate_model(MODEL_URL)
+        self.assertIsNone(self.identity.get(MODEL_URL + 'data/1/'))
+        self.assertIs(self.identity.get('http://example.com/other/data/1/'),
+            keep)
+
+
+class TestInstanceCache(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestInstanceCache, self).setUp()
+        self.pizza = Pizza.objects.create(name='S1', for_sale=True)
+        self.ttl = patch.dict(
+            'slumber.connector.configuration.INSTANCE_CACHE_TTL',
+            {'/slumber_examples/Pizza/': 60})
+        self.ttl.start()
+    def tearDown(self):
+        self.ttl.stop()
+        INSTANCES.clear()
+        super(TestInstanceCache, self).tearDown()
+
+    def test_connector_is_shared_without_middleware(self):
+        p1 = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        self.assertEqual(p1.name, 'S1')
+        fail = lambda *a, **f: self.fail("_InstanceConnector.__init__ called")
+        with patch('slumber.connector.api._InstanceConnector.__init__', fail):
+            p2 = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+            self.assertEqual(p2.name, 'S1')
+            self.assertIs(p1._fetch_instance(), p2._fetch_instance())
+
+    def test_unsaved_changes_are_not_shared(self):
+        model = client.slumber_examples.Pizza
+        p1 = model.get(pk=self.pizza.pk)
+        p1.name = 'Unsaved'
+        self.assertEqual(p1.name, 'Unsaved')
+        self.assertEqual(model.get(pk=self.pizza.pk).name, 'S1')
+        middleware = Cache()
+        middleware.process_request(None)
+        try:
+            p2 = model.get(pk=self.pizza.pk)
+            p2.name = 'In request'
+            self.assertEqual(model.get(pk=self.pizza.pk).name, 'In request')
+        finally:
+            middleware.process_response(None, None)
+        self.assertEqual(model.get(pk=self.pizza.pk).name, 'S1')
+
+    def test_update_invalidates(self):
+        self.user.is_superuser = True
+        self.user.save()
+        p1 = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        self.assertTrue(p1.for_sale)
+        client.slumber_examples.Pizza.update(p1, for_sale=False)
+        p2 = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        self.assertFalse(p2.for_sale)
+
+    def test_invalidation_reaches_live_proxies(self):
+        url = 'http://localhost:8000/slumber/slumber_examples/Pizza/' \
+            'data/%s/' % self.pizza.pk
+        for ttl in [{}, {'/slumber_examples/Pizza/': 60}]:
+            Pizza.objects.filter(pk=self.pizza.pk).update(name='Old')
+            with patch.dict(
+                    'slumber.connector.configuration.INSTANCE_CACHE_TTL',
+                    ttl, clear=True):
+                pizza = client.slumber_examples.Pizza(url, None)
+                self.assertEqual(pizza.name, 'Old')
+                Pizza.objects.filter(pk=self.pizza.pk).update(name='New')
+                invalidate_instances([url])
+                self.assertEqual(pizza.name, 'New')
+
+    def test_flush(self):
+        p1 = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        connector = p1._fetch_instance()
+        client._flush_client_instance_cache()
+        self.assertIsNone(INSTANCES.get(p1._url))
@@ -0,0 +1,55 @@
+from mock import patch
+from unittest2 import TestCase
+
+from slumber.connector.lru import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def setUp(self):
+        self.cache = LRUCache(3)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', 1, 10)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertTrue('a' in self.cache)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_zero_ttl_is_not_stored(self):
+        self.cache.set('a', 1, 0)
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_expiry(self):
+        self.cache.set('a', 1, 10)
+        with patch('slumber.connector.lru.time.time', lambda: 1e12):
+            self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        for key in ['a', 'b', 'c']:
+            self.cache.set(key, key, 10)
+        self.cache.get('a')
+        self.cache.set('d', 'd', 10)
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 'a')
+
+    def test_delete_matching(self):
+        for key in ['a1', 'a2', 'b1']:
+            self.cache.set(key, key, 10)
+        self.cache.delete_matching(lambda k, _: k.startswith('a'))
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.get('b1'), 'b1')
+
+    def test_size_bound(self):
+        cache = LRUCache(10, 10, len)
+        cache.set('a', 'x' * 6, 10)
+        cache.set('b', 'x' * 3, 10)
+        self.assertEqual(cache.size, 9)
+        cache.set('c', 'x' * 4, 10)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 7)
+        cache.set('d', 'x' * 11, 10)
+        self.assertIsNone(cache.get('d'))
+        cache.delete('b')
+        self.assertEqual(cache.size, 4)
@@ -1,10 +1,14 @@
 from django.conf import settings
+from django.http import HttpResponse
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from slumber import client
 from slumber._caches import PER_THREAD
 from slumber.connector.middleware import Cache
+from slumber.connector.ua import for_user, post
 
+from slumber_examples.models import Pizza
 from slumber_examples.tests.client import TestsWithPizza
 from slumber_examples.tests.configurations import ConfigureUser
 
@@ -63,3 +67,66 @@ class TestSetting(ConfigureUser, TestCase):
         self.assertFalse(hasattr(PER_THREAD, 'cache'))
         self.assertEqual(response, 'response')
 
+
+class TestSaveAtEndOfRequest(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestSaveAtEndOfRequest, self).setUp()
+        self.user.is_superuser = True
+        self.user.save()
+        self.pizza = Pizza(name='S1', for_sale=True)
+        self.pizza.save()
+        self.settings = override_settings(
+            SLUMBER_SAVE_AT_END_OF_REQUEST=True)
+        self.settings.enable()
+        self.middleware = Cache()
+        self.middleware.process_request(None)
+    def tearDown(self):
+        self.settings.disable()
+        super(TestSaveAtEndOfRequest, self).tearDown()
+
+    def test_changes_are_saved(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        pizza.name = 'S2'
+        self.middleware.process_response(None, HttpResponse())
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S2')
+
+    def test_changes_are_not_saved_on_error(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        pizza.name = 'S2'
+        self.middleware.process_response(None, HttpResponse(status=500))
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S1')
+
+    def test_changes_are_saved_for_the_user_that_made_them(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        signed = []
+        def _post(*a, **kw):
+            signed.append(getattr(PER_THREAD, 'username', None))
+            return post(*a, **kw)
+        for_user(self.user.username)(setattr)(pizza, 'name', 'S2')
+        self.assertIsNone(getattr(PER_THREAD, 'username', None))
+        with patch('slumber.connector.api.post', _post):
+            self.middleware.process_response(None, HttpResponse())
+        self.assertEqual(signed, [self.user.username])
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S2')
+
+    def test_cache_is_removed_when_the_save_fails(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        pizza.name = 'S2'
+        with patch('slumber.connector.middleware.save_pending',
+                    lambda: 1 / 0):
+            with self.assertRaises(ZeroDivisionError):
+                self.middleware.process_response(None, HttpResponse())
+        self.assertFalse(hasattr(PER_THREAD, 'cache'))
+
+
+class TestNoSaveAtEndOfRequest(ConfigureUser, TestCase):
+    def test_changes_are_only_local(self):
+        pizza = Pizza(name='S1', for_sale=True)
+        pizza.save()
+        middleware = Cache()
+        middleware.process_request(None)
+        remote = client.slumber_examples.Pizza.get(pk=pizza.pk)
+        remote.name = 'S2'
+        with patch('slumber.connector.api.post', self.fail):
+            middleware.process_response(None, HttpResponse())
+        self.assertEqual(Pizza.objects.get(pk=pizza.pk).name, 'S1')
@@ -81,6 +81,37 @@ class TestSlumberMockClient(ServiceTestsWithDirectory, unittest2.TestCase):
         Hawaiin_pizza =  client.pizzas.slumber.Pizza.get(pk = 3)
         self.assertEquals(Hawaiin_pizza.for_sale, True)
 
+    @mock_client(pizzas__slumber__Pizza=[dict(pk=3, name='Hawaiin')])
+    def test_delete_pizza(self):
+        pizza = client.pizzas.slumber.Pizza.get(pk=3)
+        client.pizzas.slumber.Pizza.delete(pizza)
+        with self.assertRaises(AssertionError):
+            client.pizzas.slumber.Pizza.get(pk=3)
+
+    @mock_client(pizzas__slumber__Pizza=[dict(pk=1, for_sale=False),
+        dict(pk=2, for_sale=False), dict(pk=3, for_sale=True)])
+    def test_bulk_changes(self):
+        Pizza = client.pizzas.slumber.Pizza
+        self.assertEqual(Pizza.update_many({'name': 'X'}, for_sale=False), 2)
+        self.assertEqual(Pizza.get(pk=2).name, 'X')
+        self.assertEqual(Pizza.delete_many(pks=[1, 3]), 2)
+        with self.assertRaises(AssertionError):
+            Pizza.get(pk=1)
+
+    @mock_client(pizzas__slumber__Pizza=[dict(pk=1, for_sale=False),
+        dict(pk=2, for_sale=True)])
+    def test_instance_stream(self):
+        Pizza = client.pizzas.slumber.Pizza
+        self.assertEqual(len(Pizza.instances()), 2)
+        self.assertEqual([p.pk for p in Pizza.instances(
+            filters=dict(for_sale=True))], [2])
+        self.assertEqual([p.pk for p in Pizza.order_by('-pk')], [2, 1])
+        self.assertEqual([p.pk for p in Pizza.filter(for_sale=False)], [1])
+        self.assertEqual(Pizza.count(for_sale=True), 1)
+        self.assertEqual(Pizza.aggregate('max', 'pk'), 2)
+        self.assertEqual(Pizza.aggregate('sum', 'pk', group_by='for_sale'),
+            {True: 2, False: 1})
+
     @mock_client(pizzas__app__Model=[])
     def test_created_object_can_be_gotten(self):
         client.pizzas.app.Model.create(id=1, name='Test')
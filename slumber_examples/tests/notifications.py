@@ -0,0 +1,87 @@
+from mock import patch
+from simplejson import dumps
+import threading
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.identity import INSTANCES
+from slumber.connector.notifications import Listener
+from slumber.connector.ua import get
+
+from slumber_examples.models import Pizza, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class _Response(dict):
+    status = 200
+
+
+class TestNotifications(ConfigureUser, TestCase):
+    url = '/slumber/_notifications/'
+
+    def setUp(self):
+        super(TestNotifications, self).setUp()
+        self.shop = Shop(name='Shop', slug='shop')
+        self.shop.save()
+        self.shop_url = 'http://localhost:8000/slumber/pizzas/shop/%s/' % \
+            self.shop.pk
+        self.ttl = patch.dict(
+            'slumber.connector.configuration.INSTANCE_CACHE_TTL',
+            {'/slumber_examples/Shop/': 60})
+        self.ttl.start()
+    def tearDown(self):
+        self.ttl.stop()
+        INSTANCES.clear()
+        super(TestNotifications, self).tearDown()
+
+    def test_listed_in_directory(self):
+        _, json = get('/slumber/')
+        self.assertEqual(json['operations']['notifications'], self.url)
+
+    def test_changes_after_cursor(self):
+        _, json = get(self.url)
+        cursor = json['cursor']
+        self.assertEqual(json['urls'], [])
+        self.shop.name = 'Changed'
+        self.shop.save()
+        self.shop.save()
+        Pizza(name='Untracked').save()
+        _, json = get(self.url + '?after=%s' % cursor)
+        self.assertEqual(json['urls'],
+            ['/slumber/pizzas/shop/%s/' % self.shop.pk])
+        _, json = get(self.url + '?after=%s&timeout=0.1' % json['cursor'])
+        self.assertEqual(json['urls'], [])
+        get(self.url + '?after=x', codes=[403])
+
+    def test_listener_evicts_changed_instances(self):
+        listener = Listener('http://localhost:8000' + self.url)
+        self.assertEqual(listener.poll(), [])
+        shop = client.slumber_examples.Shop.get(pk=self.shop.pk)
+        self.assertEqual(shop.name, 'Shop')
+        self.assertIsNotNone(INSTANCES.get(self.shop_url))
+        Shop.objects.filter(pk=self.shop.pk).update(name='Not notified')
+        self.assertEqual(listener.poll(0), [])
+        self.assertIsNotNone(INSTANCES.get(self.shop_url))
+        self.shop.save()
+        self.assertEqual(listener.poll(0), [self.shop_url])
+        self.assertIsNone(INSTANCES.get(self.shop_url))
+
+    def test_background_listener(self):
+        url = 'http://remote.example.com/slumber/_notifications/'
+        changed = 'http://remote.example.com/slumber/app/Model/data/1/'
+        polling, evicted = threading.Event(), []
+        def _request(_self, request_url, headers={}):
+            if '?' in request_url:
+                polling.set()
+                return _Response(), dumps(dict(cursor=2, urls=[changed]))
+            return _Response(), dumps(dict(cursor=1, urls=[]))
+        with patch('slumber.connector.ua.Http.request', _request), \
+                patch('slumber.connector.notifications.invalidate_instances',
+                    evicted.extend):
+            listener = Listener(url, timeout=1)
+            listener.start()
+            self.assertTrue(polling.wait(5))
+            listener.stop().join(5)
+        self.assertIn(changed, evicted)
+        self.assertEqual(listener.cursor, 2)
@@ -4,7 +4,10 @@ from simplejson import loads
 from django.test import TestCase
 
 from slumber import Client
-from slumber.connector.ua import post, get
+from slumber._caches import PER_THREAD
+from slumber.connector.api import autosave
+from slumber.connector.identity import INSTANCES
+from slumber.connector.ua import for_user, post, get
 
 from slumber_examples.models import Pizza, PizzaCrust, Shop
 from slumber_examples.tests.configurations import ConfigureUser
@@ -40,6 +43,49 @@ class CreateTests(ConfigureUser, TestCase):
         self.assertTrue(json1['created'], json1)
         self.assertEqual(PizzaCrust.objects.all().count(), 1)
 
+    def test_create_many(self):
+        response, json = post('/slumber/slumber_examples/Pizza/create-many/',
+            {'objects': [{'name': 'P%s' % n, 'for_sale': True}
+                for n in range(12)]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json['created'], 12)
+        self.assertEqual(Pizza.objects.count(), 12)
+
+    def test_create_many_in_batches(self):
+        with patch('slumber.operations.create.CreateInstances.BATCH_SIZE', 5):
+            with patch('slumber.operations.create._reset_sequence',
+                    self.fail):
+                response, json = post(
+                    '/slumber/slumber_examples/Pizza/create-many/',
+                    {'objects': [{'name': 'P%s' % n} for n in range(12)]})
+        self.assertEqual(json['created'], 12)
+        self.assertEqual(Pizza.objects.count(), 12)
+
+    def test_create_many_with_pks_resets_sequence_once(self):
+        with patch('slumber.operations.create._reset_sequence') as reset:
+            post('/slumber/slumber_examples/Pizza/create-many/',
+                {'objects': [{'id': n + 10, 'name': 'P%s' % n}
+                    for n in range(3)]})
+        self.assertEqual(reset.call_count, 1)
+        self.assertEqual(sorted([p.pk for p in Pizza.objects.all()]),
+            [10, 11, 12])
+
+    def test_create_many_requires_permission(self):
+        for_user('user')(post)('/slumber/slumber_examples/Pizza/create-many/',
+            {'objects': [{'name': 'P1'}]}, codes=[403])
+        self.assertEqual(Pizza.objects.count(), 0)
+
+    def test_create_many_from_client(self):
+        created = Client().slumber_examples.Pizza.create_many(
+            [{'name': 'P1'}, {'name': 'P2', 'for_sale': True}])
+        self.assertEqual(created, 2)
+        self.assertTrue(Pizza.objects.get(name='P2').for_sale)
+
+    def test_create_without_pk_does_not_reset_sequence(self):
+        with patch('slumber.operations.create._reset_sequence', self.fail):
+            post('/slumber/slumber_examples/Pizza/create/', {'name': 'P1'})
+        self.assertEqual(Pizza.objects.count(), 1)
+
     def test_update_pizza(self):
         self.cnx = Client()
         p_id, p_sale = 1 , False
@@ -52,6 +98,226 @@ class CreateTests(ConfigureUser, TestCase):
         self.assertEqual(pizza.for_sale, p_sale)
 
 
+class WriteRepresentationTests(ConfigureUser, TestCase):
+    def setUp(self):
+        super(WriteRepresentationTests, self).setUp()
+        self.user.is_superuser = True
+        self.user.save()
+        self.pizza = Pizza(name='S1', for_sale=True)
+        self.pizza.save()
+        self.cnx = Client()
+
+    def test_update_without_representation(self):
+        response, json = post('/slumber/slumber_examples/Pizza/update/%s/' %
+            self.pizza.pk, {'for_sale': False})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(json.has_key('fields'), json)
+
+    def test_update_returns_representation(self):
+        response, json = post('/slumber/slumber_examples/Pizza/update/%s/' %
+            self.pizza.pk, {'for_sale': False},
+            headers={'Prefer': 'return=representation'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(json['fields']['for_sale']['data'], json)
+        self.assertTrue(json['self']['url'].endswith(
+            '/slumber_examples/Pizza/data/%s/' % self.pizza.pk), json)
+
+    def test_delete_returns_representation(self):
+        response, json = post('/slumber/slumber_examples/Pizza/delete/%s/' %
+            self.pizza.pk, {}, headers={'Prefer': 'return=representation'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json['deleted'])
+        self.assertEqual(json['fields']['name']['data'], 'S1')
+        self.assertEqual(Pizza.objects.count(), 0)
+
+    def test_update_is_visible_without_a_fetch(self):
+        pizza = self.cnx.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        self.assertTrue(pizza.for_sale)
+        self.cnx.slumber_examples.Pizza.update(pizza, for_sale=False)
+        with patch('slumber.connector.api.get', self.fail):
+            self.assertFalse(pizza.for_sale)
+
+    def test_writes_go_through_the_request_cache(self):
+        PER_THREAD.cache = {}
+        try:
+            pizza = self.cnx.slumber_examples.Pizza.create(
+                name='S2', for_sale=True)
+            with patch('slumber.connector.api.get', self.fail):
+                self.assertEqual(pizza._operations['update'],
+                    'http://localhost:8000/slumber/slumber_examples/'
+                    'Pizza/update/%s/' % pizza.id)
+                self.cnx.slumber_examples.Pizza.update(pizza, name='S3')
+                self.assertEqual(PER_THREAD.cache[pizza._url].name, 'S3')
+                self.assertEqual(unicode(pizza), 'S3')
+            self.cnx.slumber_examples.Pizza.delete(pizza)
+            self.assertFalse(PER_THREAD.cache.has_key(pizza._url))
+            self.assertFalse(Pizza.objects.filter(name='S3').exists())
+        finally:
+            del PER_THREAD.cache
+
+
+class SaveTests(ConfigureUser, TestCase):
+    def setUp(self):
+        super(SaveTests, self).setUp()
+        self.user.is_superuser = True
+        self.user.save()
+        self.pizza = Pizza(name='S1', for_sale=True)
+        self.pizza.save()
+        self.cnx = Client()
+    def tearDown(self):
+        INSTANCES.clear()
+        super(SaveTests, self).tearDown()
+
+    def test_update_only_saves_posted_fields(self):
+        with patch('slumber_examples.models.Pizza.save') as save:
+            post('/slumber/slumber_examples/Pizza/update/%s/' %
+                self.pizza.pk, {'for_sale': False})
+        self.assertEqual(save.call_args[1], dict(update_fields=['for_sale']))
+
+    def test_update_of_non_field_saves_everything(self):
+        with patch('slumber_examples.models.Pizza.save') as save:
+            post('/slumber/slumber_examples/Pizza/update/%s/' %
+                self.pizza.pk, {'not_a_field': 1})
+        self.assertEqual(save.call_args[1], {})
+
+    def test_changes_are_saved_in_one_post(self):
+        pizza = self.cnx.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        pizza.name = 'S2'
+        pizza.for_sale = False
+        pizza.local_only = True
+        self.assertEqual(pizza.name, 'S2')
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S1')
+        with patch('slumber.connector.api.post', wraps=post) as posted:
+            pizza.save()
+        self.assertEqual(posted.call_count, 1)
+        self.assertEqual(posted.call_args[0][1],
+            dict(name='S2', for_sale=False))
+        saved = Pizza.objects.get(pk=self.pizza.pk)
+        self.assertEqual(saved.name, 'S2')
+        self.assertFalse(saved.for_sale)
+        self.assertEqual(pizza.name, 'S2')
+
+    def test_failed_save_keeps_the_changes(self):
+        with patch.dict('slumber.connector.configuration.INSTANCE_CACHE_TTL',
+                {'/slumber_examples/Pizza/': 60}):
+            pizza = self.cnx.slumber_examples.Pizza.get(pk=self.pizza.pk)
+            self.assertEqual(pizza.name, 'S1')
+            self.assertIsNotNone(INSTANCES.get(pizza._url))
+            pizza.name = 'S2'
+            def _post(*a, **kw):
+                raise AssertionError("Server error")
+            with patch('slumber.connector.api.post', _post):
+                with self.assertRaises(AssertionError):
+                    pizza.save()
+            self.assertIsNone(INSTANCES.get(pizza._url))
+            self.assertEqual(pizza._dirty, dict(name='S2'))
+            pizza.save()
+            self.assertEqual(pizza._dirty, {})
+            self.assertEqual(pizza.name, 'S2')
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S2')
+
+    def test_save_without_changes_does_nothing(self):
+        pizza = self.cnx.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        with patch('slumber.connector.api.post', self.fail):
+            self.assertIsNone(pizza.save())
+
+    def test_autosave(self):
+        with autosave():
+            pizza = self.cnx.slumber_examples.Pizza.get(pk=self.pizza.pk)
+            pizza.name = 'S2'
+            self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S1')
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S2')
+
+    def test_autosave_discards_on_error(self):
+        with self.assertRaises(ValueError):
+            with autosave():
+                pizza = self.cnx.slumber_examples.Pizza.get(
+                    pk=self.pizza.pk)
+                pizza.name = 'S2'
+                raise ValueError()
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'S1')
+
+
+class BulkChangeTests(ConfigureUser, TestCase):
+    def setUp(self):
+        super(BulkChangeTests, self).setUp()
+        for n in range(5):
+            Pizza(name='P%s' % n, for_sale=n % 2 == 0).save()
+        self.pks = [p.pk for p in Pizza.objects.order_by('pk')]
+        self.cnx = Client()
+
+    def test_update_by_pks(self):
+        response, json = post('/slumber/slumber_examples/Pizza/update-many/',
+            {'pks': self.pks[:2], 'values': {'max_extra_toppings': 3}})
+        self.assertEqual(json['updated'], 2)
+        self.assertEqual(
+            Pizza.objects.filter(max_extra_toppings=3).count(), 2)
+
+    def test_update_by_filter(self):
+        updated = self.cnx.slumber_examples.Pizza.update_many(
+            {'for_sale': True}, for_sale=False)
+        self.assertEqual(updated, 2)
+        self.assertEqual(Pizza.objects.filter(for_sale=True).count(), 5)
+
+    def test_update_by_pks_and_filter(self):
+        updated = self.cnx.slumber_examples.Pizza.update_many(
+            {'max_extra_toppings': 3}, pks=self.pks[:3], for_sale=True)
+        self.assertEqual(updated, 2)
+
+    def test_update_needs_a_selection(self):
+        post('/slumber/slumber_examples/Pizza/update-many/',
+            {'values': {'name': 'Changed'}}, codes=[403])
+        self.assertEqual(Pizza.objects.filter(name='Changed').count(), 0)
+
+    def test_update_with_filter_not_allowed(self):
+        post('/slumber/slumber_examples/Pizza/update-many/',
+            {'filter': {'name': 'P1'}, 'values': {'name': 'Changed'}},
+            codes=[403])
+        self.assertEqual(Pizza.objects.filter(name='Changed').count(), 0)
+
+    def test_update_of_primary_key_not_allowed(self):
+        post('/slumber/slumber_examples/Pizza/update-many/',
+            {'pks': self.pks, 'values': {'id': 100}}, codes=[403])
+
+    def test_update_requires_permission(self):
+        for_user('user')(post)('/slumber/slumber_examples/Pizza/update-many/',
+            {'pks': self.pks, 'values': {'name': 'Changed'}}, codes=[403])
+        self.assertEqual(Pizza.objects.filter(name='Changed').count(), 0)
+
+    def test_delete_by_pks(self):
+        response, json = post('/slumber/slumber_examples/Pizza/delete-many/',
+            {'pks': self.pks[1:]})
+        self.assertEqual(json['deleted'], 4)
+        self.assertEqual(Pizza.objects.count(), 1)
+
+    def test_delete_by_filter(self):
+        deleted = self.cnx.slumber_examples.Pizza.delete_many(
+            name__startswith='P', for_sale=True)
+        self.assertEqual(deleted, 3)
+        self.assertEqual(Pizza.objects.count(), 2)
+
+    def test_delete_needs_a_selection(self):
+        post('/slumber/slumber_examples/Pizza/delete-many/', {}, codes=[403])
+        self.assertEqual(Pizza.objects.count(), 5)
+
+    def test_delete_requires_permission(self):
+        for_user('user')(post)('/slumber/slumber_examples/Pizza/delete-many/',
+            {'pks': self.pks}, codes=[403])
+        self.assertEqual(Pizza.objects.count(), 5)
+
+    def test_update_removes_instances_from_request_cache(self):
+        PER_THREAD.cache = {}
+        try:
+            pizza = self.cnx.slumber_examples.Pizza.get(pk=self.pks[0])
+            self.assertEqual(pizza.name, 'P0')
+            self.assertTrue(PER_THREAD.cache.has_key(pizza._url))
+            self.cnx.slumber_examples.Pizza.update_many(
+                {'max_extra_toppings': 3}, pks=self.pks)
+            self.assertFalse(PER_THREAD.cache.has_key(pizza._url))
+        finally:
+            del PER_THREAD.cache
+
+
 class OrderTests(ConfigureUser, TestCase):
     def setUp(self):
         super(OrderTests, self).setUp()
@@ -0,0 +1,103 @@
+from mock import patch
+from simplejson import dumps
+import threading
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.api import get_instance, get_model, \
+    invalidate_instances
+from slumber.connector.identity import INSTANCES
+from slumber.connector.ua import for_user
+
+from slumber_examples.models import Pizza, PizzaPrice
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class _Response(dict):
+    status = 200
+
+
+class TestPrefetch(ConfigureUser, TestCase):
+    remote = 'http://remote.example.com/slumber/app/Thing/'
+
+    def setUp(self):
+        super(TestPrefetch, self).setUp()
+        self.pizzas = []
+        for n in range(3):
+            pizza = Pizza(name='P%s' % n)
+            pizza.save()
+            PizzaPrice(pizza=pizza, date='2011-04-0%s' % (n + 1)).save()
+            self.pizzas.append(client.slumber_examples.Pizza(
+                'http://localhost:8000/slumber/slumber_examples/'
+                'Pizza/data/%s/' % pizza.pk, None))
+    def tearDown(self):
+        INSTANCES.clear()
+        super(TestPrefetch, self).tearDown()
+
+    def _serve(self, requests):
+        def _request(_self, url, headers={}):
+            requests.append((url, headers.get('X-FOST-User'),
+                threading.current_thread(), _self))
+            path = url[len(self.remote):].split('?')[0]
+            if path.endswith('/parts/'):
+                json = dict(page=[dict(type='/slumber/app/Thing/',
+                    data='/slumber/app/Thing/data/9/', display='Nine')])
+            else:
+                pk = path.split('/')[1]
+                json = dict(type='/slumber/app/Thing/',
+                    display='Thing %s' % pk, operations={},
+                    fields=dict(name=dict(kind='value',
+                        type='django.db.models.CharField',
+                        data='Thing %s' % pk)),
+                    data_arrays=dict(parts='/slumber/app/Thing/data/%s/'
+                        'parts/' % pk))
+            return _Response(), dumps(json)
+        return patch('slumber.connector.ua.Http.request', _request)
+
+    def test_local_instances_and_data_arrays(self):
+        client.prefetch(self.pizzas + [None], attrs=['prices'])
+        with patch('slumber.connector.api.get', self.fail):
+            for n, pizza in enumerate(self.pizzas):
+                self.assertEqual(pizza.name, 'P%s' % n)
+                self.assertEqual(unicode(pizza), 'P%s' % n)
+                self.assertEqual(len(pizza.prices), 1)
+
+    def test_loaded_instances_are_skipped(self):
+        with patch.dict('slumber.connector.configuration.INSTANCE_CACHE_TTL',
+                {'/slumber_examples/Pizza/': 60}):
+            pizza = client.slumber_examples.Pizza.get(
+                pk=Pizza.objects.get(name='P0').pk)
+            pizza.prices
+            with patch('slumber.connector.api.get', self.fail):
+                client.prefetch([pizza], attrs=['prices'])
+
+    def test_invalidated_instances_are_fetched_again(self):
+        client.prefetch(self.pizzas[:1])
+        Pizza.objects.filter(name='P0').update(name='New')
+        invalidate_instances([self.pizzas[0]._url])
+        self.assertEqual(self.pizzas[0].name, 'New')
+
+    def test_remote_instances_are_fetched_in_parallel(self):
+        model = get_model(self.remote)
+        things = [get_instance(model, self.remote + 'data/%s/' % n, None)
+            for n in range(6)]
+        requests = []
+        with self._serve(requests):
+            client.prefetch(things + things[:2], attrs=['parts'])
+        self.assertEqual(len(requests), 12)
+        self.assertNotIn(threading.current_thread(),
+            [thread for _, _, thread, _ in requests])
+        self.assertTrue(len(set([http for _, _, _, http in requests])) <= 4)
+        with patch('slumber.connector.api.get', self.fail):
+            self.assertEqual(things[3].name, 'Thing 3')
+            self.assertEqual(unicode(things[1].parts[0]), 'Nine')
+
+    def test_remote_fetches_are_signed_for_the_user(self):
+        model = get_model(self.remote)
+        things = [get_instance(model, self.remote + 'data/%s/' % n, None)
+            for n in range(4)]
+        requests = []
+        with self._serve(requests):
+            for_user('user')(client.prefetch)(things)
+        self.assertEqual([user for _, user, _, _ in requests], ['user'] * 4)
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from mock import patch
+
+from django.test import TestCase
+
+from slumber import client, replica
+from slumber.changelog import prune_changes
+from slumber.changelog.models import Change
+from slumber.connector.identity import INSTANCES
+from slumber.connector.ua import get, post
+from slumber.replica.models import Document, Replica
+
+from slumber_examples.models import Pizza, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestReplica(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestReplica, self).setUp()
+        self.replicas = patch.dict(
+            'slumber.connector.configuration.REPLICAS',
+            {'/slumber_examples/Shop/': 60})
+        self.replicas.start()
+        self.shop = Shop(name='Shop', slug='shop')
+        self.shop.save()
+        self.shop_url = 'http://localhost:8000/slumber/pizzas/shop/%s/' % \
+            self.shop.pk
+        self.model = client.slumber_examples.Shop
+    def tearDown(self):
+        self.replicas.stop()
+        INSTANCES.clear()
+        super(TestReplica, self).tearDown()
+
+    def change_behind_replica(self, **values):
+        Shop.objects.filter(pk=self.shop.pk).update(**values)
+        INSTANCES.clear()
+
+    def test_sync_copies_instances(self):
+        self.model.sync()
+        replica = Replica.objects.get(model=self.model._url)
+        self.assertIsNotNone(replica.synced)
+        self.assertIsNotNone(replica.cursor)
+        document = Document.objects.get(url=self.shop_url)
+        self.assertEqual(document.instance, unicode(self.shop.pk))
+
+    def test_reads_come_from_the_replica(self):
+        self.model.sync()
+        self.change_behind_replica(name='Changed')
+        response, json = get(self.shop_url)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(json['display'], 'Shop')
+        self.assertEqual(unicode(self.model.get(pk=self.shop.pk)), 'Shop')
+        self.assertEqual(self.model.get(slug='shop').name, 'Shop')
+
+    def test_lookups_are_made_in_the_database(self):
+        for n in range(5):
+            Shop(name='Shop %s' % n, slug='shop-%s' % n).save()
+        self.model.sync()
+        self.assertEqual(Document.objects.get(url=self.shop_url)
+            .field_values.get(field='slug').value, 'shop')
+        with patch('slumber.replica.parse_json',
+                    wraps=replica.parse_json) as parsed, \
+                patch('slumber.connector.ua._get', self.fail):
+            self.assertEqual(self.model.get(slug='shop-3').name, 'Shop 3')
+            self.assertEqual(self.model.get(
+                name='Shop 1', slug='shop-1').slug, 'shop-1')
+        self.assertEqual(parsed.call_count, 2)
+
+    def test_sync_resolves_instances_together(self):
+        for n in range(5):
+            Shop(name='Shop %s' % n, slug='shop-%s' % n).save()
+        posted = []
+        def _post(url, data, codes=None, headers=None):
+            posted.append(url)
+            return post(url, data, codes, headers)
+        with patch('slumber.replica.post', _post), \
+                patch('slumber.replica.SYNC_BATCH', 4):
+            self.model.sync()
+        self.assertEqual(posted, ['http://localhost:8000/slumber/_resolve/'] * 2)
+        self.assertEqual(Document.objects.filter(array='').count(), 6)
+
+    def test_only_replicated_urls_are_looked_up(self):
+        Pizza(name='Margarita', exclusive_to=self.shop).save()
+        self.model.sync()
+        self.assertEqual(Replica.objects.get().prefixes.split(), [
+            'http://localhost:8000/slumber/pizzas/shop/',
+            'http://localhost:8000/slumber/slumber_examples/Shop/data/'])
+        self.assertIsNotNone(replica.lookup(self.shop_url))
+        with patch('slumber.replica.models.Document') as documents:
+            self.assertIsNone(replica.lookup(
+                'http://localhost:8000/slumber/slumber_examples/Pizza/'))
+            replica.forget('http://localhost:8000/slumber/')
+        self.assertEqual(documents.mock_calls, [])
+
+    def test_failed_sync_leaves_the_replica(self):
+        self.model.sync()
+        Replica.objects.update(cursor=None)
+        def _store(*a):
+            raise AssertionError("Sync failed")
+        with patch('slumber.replica._store', _store):
+            with self.assertRaises(AssertionError):
+                self.model.sync()
+        self.assertTrue(Document.objects.filter(url=self.shop_url).exists())
+        self.assertIsNone(Replica.objects.get().cursor)
+
+    def test_pruned_changes_copy_the_model_again(self):
+        self.model.sync()
+        new = Shop(name='New', slug='new')
+        new.save()
+        Change.objects.update(when=datetime.now() - timedelta(days=30))
+        prune_changes()
+        self.model.sync()
+        self.assertTrue(Document.objects.filter(
+            url=self.shop_url.replace(str(self.shop.pk), str(new.pk))).exists())
+        self.assertEqual(Replica.objects.get().cursor,
+            Change.objects.order_by('-pk')[0].pk)
+
+    def test_long_urls(self):
+        self.model.sync()
+        url = self.shop_url + 'x' * 300 + '/'
+        Document.objects.create(replica=Replica.objects.get(), url=url,
+            instance='x', array='x', json='{"page": []}')
+        self.assertEqual(replica.lookup(url), {'page': []})
+
+    def test_stale_replica_is_not_used(self):
+        self.model.sync()
+        self.change_behind_replica(name='Changed')
+        Replica.objects.update(synced=datetime.now() - timedelta(seconds=61))
+        _, json = get(self.shop_url)
+        self.assertEqual(json['display'], 'Changed')
+        self.assertEqual(unicode(self.model.get(pk=self.shop.pk)), 'Changed')
+
+    def test_misses_fall_back_to_the_service(self):
+        self.model.sync()
+        shop = Shop(name='New shop', slug='new')
+        shop.save()
+        self.assertEqual(self.model.get(slug='new').name, 'New shop')
+        self.assertEqual(self.model.get(name='Shop', active=None).slug,
+            'shop')
+
+    def test_sync_applies_changes(self):
+        gone = Shop(name='Gone', slug='gone')
+        gone.save()
+        gone_url = self.shop_url.replace(str(self.shop.pk), str(gone.pk))
+        self.model.sync()
+        self.assertTrue(Document.objects.filter(url=gone_url).exists())
+        self.shop.name = 'Changed'
+        self.shop.save()
+        shop = Shop(name='New shop', slug='new')
+        shop.save()
+        gone.delete()
+        self.model.sync()
+        self.assertFalse(Document.objects.filter(url=gone_url).exists())
+        self.assertTrue(Document.objects.filter(
+            instance=unicode(shop.pk)).exists())
+        self.change_behind_replica(name='Not synced')
+        self.assertEqual(get(self.shop_url)[1]['display'], 'Changed')
+
+    def test_data_arrays_come_from_the_replica(self):
+        Pizza(name='Margarita', exclusive_to=self.shop).save()
+        self.model.sync()
+        Pizza.objects.all().delete()
+        INSTANCES.clear()
+        shop = self.model.get(pk=self.shop.pk)
+        self.assertEqual(len(shop.pizza), 1)
+        self.assertEqual(unicode(shop.pizza[0]), 'Margarita')
+
+    def test_writes_remove_the_instance(self):
+        self.model.sync()
+        shop = self.model.get(pk=self.shop.pk)
+        shop.name = 'Written'
+        shop.save()
+        self.assertFalse(Document.objects.filter(
+            instance=unicode(self.shop.pk)).exists())
+        self.assertEqual(get(self.shop_url)[1]['display'], 'Written')
+
+    def test_bulk_writes_stop_the_replica_being_used(self):
+        self.model.sync()
+        self.model.update_many(dict(name='Bulk'), pks=[self.shop.pk])
+        self.assertIsNone(Replica.objects.get().synced)
+        self.assertEqual(get(self.shop_url)[1]['display'], 'Bulk')
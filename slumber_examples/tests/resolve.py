@@ -0,0 +1,145 @@
+from mock import patch
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.identity import INSTANCES
+from slumber.connector.ua import get, post
+from slumber.operations.instancedata import instance_etag
+
+from slumber_examples.models import Pizza, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestResolve(ConfigureUser, TestCase):
+    url = '/slumber/_resolve/'
+
+    def setUp(self):
+        super(TestResolve, self).setUp()
+        self.pizza = Pizza(name='P1')
+        self.pizza.save()
+        self.shop = Shop(name='Shop', slug='shop')
+        self.shop.save()
+        self.pizza_url = 'http://localhost:8000/slumber/slumber_examples/' \
+            'Pizza/data/%s/' % self.pizza.pk
+        self.shop_url = 'http://localhost:8000/slumber/pizzas/shop/%s/' % \
+            self.shop.pk
+    def tearDown(self):
+        INSTANCES.clear()
+        super(TestResolve, self).tearDown()
+
+    def test_listed_in_directory(self):
+        _, json = get('/slumber/')
+        self.assertEqual(json['operations']['resolve'], self.url)
+
+    def test_resolve_across_models(self):
+        missing = 'http://localhost:8000/slumber/slumber_examples/' \
+            'Pizza/data/100/'
+        _, json = post(self.url, dict(urls=[self.pizza_url, self.shop_url,
+            missing, '/slumber/slumber_examples/Pizza/data/x/',
+            '/slumber/slumber_examples/Pizza/']))
+        self.assertEqual(json['instances'][self.pizza_url]['display'], 'P1')
+        self.assertEqual(
+            json['instances'][self.shop_url]['fields']['slug']['data'],
+            'shop')
+        self.assertEqual(sorted(json['missing']), sorted([missing,
+            '/slumber/slumber_examples/Pizza/data/x/',
+            '/slumber/slumber_examples/Pizza/']))
+
+    def test_one_query_per_model(self):
+        for n in range(2, 5):
+            Pizza(name='P%s' % n).save()
+        urls = ['/slumber/slumber_examples/Pizza/data/%s/' % p.pk
+            for p in Pizza.objects.all()]
+        with patch.object(Pizza.objects, 'filter',
+                wraps=Pizza.objects.filter) as filtered:
+            _, json = post(self.url, dict(urls=urls))
+        self.assertEqual(filtered.call_count, 1)
+        self.assertEqual(len(json['instances']), 4)
+
+    def test_get(self):
+        _, json = get(self.url + '?url=' + self.pizza_url)
+        self.assertEqual(json['instances'].keys(), [self.pizza_url])
+
+    def test_requires_user(self):
+        response = self.client.post(self.url, '{"urls": []}',
+            content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_client_resolve(self):
+        pizza = client.slumber_examples.Pizza(self.pizza_url, None)
+        shop = client.slumber_examples.Shop(self.shop_url, None)
+        gone = client.slumber_examples.Pizza(
+            'http://localhost:8000/slumber/slumber_examples/Pizza/data/100/',
+            None)
+        self.assertEqual(client.resolve([pizza, shop, gone]), [gone])
+        with patch('slumber.connector.api.get', self.fail):
+            self.assertEqual(pizza.name, 'P1')
+            self.assertEqual(unicode(shop), 'Shop')
+
+    def test_client_skips_loaded_instances(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        with patch('slumber.connector.api.post', self.fail):
+            self.assertEqual(client.resolve([pizza]), [])
+
+
+class TestRevalidate(ConfigureUser, TestCase):
+    url = '/slumber/_revalidate/'
+
+    def setUp(self):
+        super(TestRevalidate, self).setUp()
+        self.pizza = Pizza(name='P1')
+        self.pizza.save()
+        self.pizza_url = 'http://localhost:8000/slumber/slumber_examples/' \
+            'Pizza/data/%s/' % self.pizza.pk
+        self.ttl = patch.dict(
+            'slumber.connector.configuration.INSTANCE_CACHE_TTL',
+            {'/slumber_examples/Pizza/': 60})
+        self.ttl.start()
+    def tearDown(self):
+        self.ttl.stop()
+        INSTANCES.clear()
+        super(TestRevalidate, self).tearDown()
+
+    def test_only_changes_are_returned(self):
+        _, data = get(self.pizza_url)
+        other = Pizza(name='P2')
+        other.save()
+        other_url = '/slumber/slumber_examples/Pizza/data/%s/' % other.pk
+        gone_url = '/slumber/slumber_examples/Pizza/data/100/'
+        Pizza.objects.filter(pk=other.pk).update(name='P3')
+        _, json = post(self.url, dict(entries=[
+            [self.pizza_url, instance_etag(data)],
+            [other_url, 'old'], [gone_url, 'old'], ['/not/slumber/', 'x']]))
+        self.assertEqual(json['changed'].keys(), [other_url])
+        self.assertEqual(json['changed'][other_url]['display'], 'P3')
+        self.assertEqual(json['deleted'], [gone_url])
+        self.assertEqual(json['unknown'], ['/not/slumber/'])
+
+    def test_requires_post(self):
+        get(self.url, codes=[403])
+
+    def test_client_refreshes_working_set(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        self.assertEqual(pizza.name, 'P1')
+        connector = pizza._fetch_instance()
+        connector._etag
+        other = Pizza(name='P2')
+        other.save()
+        gone = client.slumber_examples.Pizza.get(pk=other.pk)
+        gone._fetch_instance()._etag
+        Pizza.objects.filter(pk=self.pizza.pk).update(name='P3')
+        other.delete()
+        changed = client.revalidate()
+        self.assertEqual(sorted(changed), sorted([pizza._url, gone._url]))
+        self.assertEqual(connector.name, 'P3')
+        self.assertIsNone(INSTANCES.get(gone._url))
+
+    def test_unchanged_instances_are_renewed(self):
+        pizza = client.slumber_examples.Pizza.get(pk=self.pizza.pk)
+        connector = pizza._fetch_instance()
+        connector._etag
+        connector._expires = 0
+        with patch('slumber.connector.api.get', self.fail):
+            self.assertEqual(client.revalidate([pizza]), [])
+        self.assertIs(INSTANCES.get(pizza._url), connector)
@@ -0,0 +1,155 @@
+import os
+from mock import patch
+import tempfile
+from unittest2 import TestCase
+
+from slumber.connector import httpcache
+from slumber.connector.httpcache import lookup_response, store_response, \
+    LOCAL, statistics
+from slumber.connector.sharedcache import SharedCache, WAYS
+
+
+class _response(object):
+    status = 200
+
+
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.cache = SharedCache(self.path, WAYS, 256)
+    def tearDown(self):
+        self.cache.close()
+        os.remove(self.cache.path)
+        os.remove(self.path)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', ('value', 1, {'a': 'b'}), 10)
+        self.assertEqual(self.cache.get('key'), ('value', 1, {'a': 'b'}))
+
+    def test_overwrite(self):
+        self.cache.set('key', 'one', 10)
+        self.cache.set('key', 'two', 10)
+        self.assertEqual(self.cache.get('key'), 'two')
+
+    def test_expiry(self):
+        self.cache.set('key', 'value', 10)
+        with patch('slumber.connector.sharedcache.time.time', lambda: 1e12):
+            self.assertIsNone(self.cache.get('key'))
+
+    def test_too_large_is_not_stored(self):
+        self.cache.set('key', 'x' * 1000, 10)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_delete_and_clear(self):
+        self.cache.set('key1', 'value', 10)
+        self.cache.set('key2', 'value', 10)
+        self.cache.delete('key1')
+        self.assertIsNone(self.cache.get('key1'))
+        self.assertEqual(self.cache.get('key2'), 'value')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key2'))
+
+    def test_clock_eviction_keeps_referenced_entries(self):
+        for n in range(WAYS):
+            self.cache.set('key%s' % n, n, 10)
+        for n in range(WAYS):
+            self.assertEqual(self.cache.get('key%s' % n), n)
+        self.cache.set('extra1', 'x', 10)
+        self.cache.get('extra1')
+        self.cache.set('extra2', 'y', 10)
+        self.assertEqual(self.cache.get('extra1'), 'x')
+        self.assertEqual(self.cache.get('extra2'), 'y')
+        found = [n for n in range(WAYS) if self.cache.get('key%s' % n) == n]
+        self.assertEqual(len(found), WAYS - 2)
+
+    def test_shared_between_instances(self):
+        other = SharedCache(self.path, WAYS, 256)
+        try:
+            self.cache.set('key', 'value', 10)
+            self.assertEqual(other.get('key'), 'value')
+        finally:
+            other.close()
+
+    def test_survives_reopening(self):
+        self.cache.set('key', 'value', 10)
+        self.cache.close()
+        self.cache = SharedCache(self.path, WAYS, 256)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_different_layout_uses_another_file(self):
+        self.cache.set('key', 'value', 10)
+        other = SharedCache(self.path, WAYS * 2, 256)
+        try:
+            self.assertNotEqual(other.path, self.cache.path)
+            self.assertIsNone(other.get('key'))
+            self.assertEqual(self.cache.get('key'), 'value')
+            self.assertEqual(os.path.getsize(self.cache.path),
+                64 + WAYS * 256)
+        finally:
+            other.close()
+            os.remove(other.path)
+
+    def test_mismatched_file_is_not_reused(self):
+        with open(self.cache.path, 'r+') as cache_file:
+            cache_file.write('NOTCACHE')
+        with self.assertRaises(ValueError):
+            SharedCache(self.path, WAYS, 256)
+
+
+class SharedTierTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.shared = SharedCache(self.path)
+        self.patcher = patch('slumber.connector.httpcache._shared',
+            lambda: self.shared)
+        self.patcher.start()
+    def tearDown(self):
+        self.patcher.stop()
+        self.shared.close()
+        os.remove(self.shared.path)
+        os.remove(self.path)
+        LOCAL.clear()
+
+    def test_served_from_shared_tier(self):
+        store_response('test-key', 'http://example.com/', _response(),
+            '{"a": 1}', {"a": 1}, 10)
+        LOCAL.clear()
+        before = statistics()
+        def _get(key):
+            # Only the time the URL was last invalidated may be looked up
+            self.assertTrue(key.startswith('slumber.connector.ua.invalidated.'))
+        with patch('slumber.connector.httpcache.cache.get', _get):
+            response, json = lookup_response('test-key',
+                'http://example.com/')
+        self.assertEqual(json, {"a": 1})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(statistics()['shared']['hits'],
+            before['shared']['hits'] + 1)
+
+
+class UnusableSharedTierTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        cache = SharedCache(self.path)
+        cache.close()
+        self.cache_path = cache.path
+        with open(self.cache_path, 'r+') as cache_file:
+            cache_file.write('NOTCACHE')
+    def tearDown(self):
+        httpcache.SHARED = None
+        os.remove(self.cache_path)
+        os.remove(self.path)
+
+    def test_shared_tier_is_disabled(self):
+        with patch('slumber.connector.httpcache.settings.'
+                'SLUMBER_SHARED_CACHE_FILE', self.path, create=True):
+            with patch('slumber.connector.httpcache.logging.exception') \
+                    as logged:
+                self.assertIsNone(httpcache._shared())
+                self.assertIsNone(httpcache._shared())
+        self.assertEqual(logged.call_count, 1)
+        self.assertIs(httpcache.SHARED, False)
@@ -0,0 +1,110 @@
+from mock import patch
+import os
+from simplejson import dumps, loads
+import shutil
+import tempfile
+import threading
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from slumber.connector import Client, REVALIDATING
+from slumber.connector.snapshot import write_snapshot
+from slumber.connector.ua import get
+
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+DIRECTORY = 'http://localhost:8000/slumber/'
+
+
+class TestSnapshot(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestSnapshot, self).setUp()
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'slumber.json')
+        self.settings = override_settings(SLUMBER_SNAPSHOT=self.path)
+        self.settings.enable()
+        self.fetched = []
+        self.expanded = get(DIRECTORY + '?expand=1')
+        self.revalidating = patch.dict('slumber.connector.REVALIDATING',
+            clear=True)
+        self.revalidating.start()
+    def tearDown(self):
+        self.revalidating.stop()
+        self.settings.disable()
+        shutil.rmtree(self.folder)
+        super(TestSnapshot, self).tearDown()
+
+    def _get(self, url, ttl=0):
+        # The background thread can't see the test database, so it's given
+        # the response fetched earlier
+        self.fetched.append(url)
+        return self.expanded
+
+    def read(self):
+        with open(self.path) as snapshot:
+            return loads(snapshot.read())
+
+    def test_bootstrap_saves_the_snapshot(self):
+        fingerprint = Client().bootstrap()
+        saved = self.read()[DIRECTORY]
+        self.assertEqual(saved['fingerprint'], fingerprint)
+        models = saved['expanded']['slumber_examples']['models']
+        self.assertTrue(models.has_key('Pizza'))
+        self.assertFalse(saved.has_key('_meta'))
+
+    def test_concurrent_writes_are_kept(self):
+        threads = [threading.Thread(target=write_snapshot,
+                args=('http://example.com/%s/' % n, dict(fingerprint=n)))
+            for n in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.read()), 10)
+        self.assertTrue(os.path.exists(self.path + '.lock'))
+
+    def test_no_snapshot(self):
+        with patch('slumber.connector.get', self._get):
+            client = Client()
+        self.assertEqual(self.fetched, [])
+        self.assertIsNone(client._tree)
+
+    def test_new_client_starts_from_the_snapshot(self):
+        fingerprint = Client().bootstrap()
+        with patch('slumber.connector.get', self._get):
+            client = Client()
+            self.assertEqual(client._fingerprint, fingerprint)
+            self.assertTrue(client._tree[1].has_key('slumber_examples'))
+            self.assertEqual(REVALIDATING, {})
+            client.slumber_examples.Pizza
+            REVALIDATING[DIRECTORY].join()
+        self.assertEqual(self.fetched, [DIRECTORY + '?expand=1'])
+
+    def test_snapshot_is_checked_once(self):
+        Client().bootstrap()
+        with patch('slumber.connector.get', self._get):
+            for _ in range(3):
+                Client().slumber_examples.Pizza
+            REVALIDATING[DIRECTORY].join()
+        self.assertEqual(self.fetched, [DIRECTORY + '?expand=1'])
+
+    def test_changed_schema_is_picked_up(self):
+        fingerprint = Client().bootstrap()
+        services = self.read()
+        services[DIRECTORY]['fingerprint'] = 'stale'
+        with open(self.path, 'w') as snapshot:
+            snapshot.write(dumps(services))
+        proceed = threading.Event()
+        def _get(url, ttl=0):
+            proceed.wait()
+            return self._get(url, ttl)
+        with patch('slumber.connector.get', _get):
+            client = Client()
+            self.assertEqual(client._fingerprint, 'stale')
+            client.slumber_examples.Pizza
+            proceed.set()
+            REVALIDATING[DIRECTORY].join()
+        self.assertEqual(client._fingerprint, fingerprint)
+        self.assertEqual(self.read()[DIRECTORY]['fingerprint'], fingerprint)
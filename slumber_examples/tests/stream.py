@@ -0,0 +1,142 @@
+from mock import patch
+from simplejson import dumps
+import threading
+
+from django.test import TestCase
+
+from slumber import client, configure
+from slumber.connector.api import get_model
+from slumber.connector.ua import get
+
+from slumber_examples.models import Pizza, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class _Response(dict):
+    status = 200
+
+
+class TestInstanceStream(ConfigureUser, TestCase):
+    url = '/slumber/slumber_examples/Pizza/instances/'
+
+    def setUp(self):
+        super(TestInstanceStream, self).setUp()
+        for n in range(25):
+            Pizza(name='P%02d' % n, for_sale=bool(n % 2)).save()
+
+    def test_page_size(self):
+        _, json = get(self.url + '?page_size=7')
+        self.assertEqual(len(json['page']), 7)
+        self.assertIn('page_size=7', json['next_page'])
+        get(self.url + '?page_size=0', codes=[403])
+        get(self.url + '?page_size=x', codes=[403])
+
+    def test_filters(self):
+        _, json = get(self.url + '?for_sale=False&page_size=20')
+        self.assertEqual(len(json['page']), 13)
+        self.assertIn('for_sale=False', json['next_page'])
+        _, json = get(self.url + '?name__startswith=P1')
+        self.assertEqual(len(json['page']), 10)
+        get(self.url + '?name=P01', codes=[403])
+
+    def test_other_parameters_are_ignored(self):
+        _, json = get(self.url + '?_=123&page_size=20')
+        self.assertEqual(len(json['page']), 20)
+        _, json = get(self.url + '?lpk=5')
+        self.assertEqual(len(json['page']), 10)
+
+    def test_ordering(self):
+        _, json = get(self.url + '?order_by=name&page_size=10')
+        self.assertEqual([p['display'] for p in json['page']],
+            ['P%02d' % n for n in range(10)])
+        self.assertIn('order_by=name', json['next_page'])
+        _, json = get(json['next_page'])
+        self.assertEqual(json['page'][0]['display'], 'P10')
+        _, json = get(self.url + '?order_by=-name&for_sale=True')
+        self.assertEqual(json['page'][0]['display'], 'P23')
+        get(self.url + '?order_by=max_extra_toppings', codes=[403])
+        get(self.url + '?order_by=name&after=nonsense', codes=[403])
+
+    def test_last_ordered_page_has_no_next_page(self):
+        _, json = get(self.url + '?order_by=name&page_size=25')
+        self.assertEqual(len(json['page']), 25)
+        self.assertFalse(json.has_key('next_page'))
+
+    def test_cursor_with_ties(self):
+        with patch.object(Pizza.slumber_model, 'orderings', ['for_sale']):
+            pizzas = list(client.slumber_examples.Pizza.instances(
+                page_size=3, proxies=False).order_by('-for_sale'))
+        self.assertEqual(len(pizzas), 25)
+        self.assertEqual(len(set(pizzas)), 25)
+        self.assertEqual([d for _, d, _ in pizzas[:12]],
+            ['P%02d' % n for n in range(23, 0, -2)])
+
+    def test_hal_ordering(self):
+        for slug in ['c', 'a', 'd', 'b']:
+            Shop(name=slug, slug=slug).save()
+        _, json = get('/slumber/shops/mount2/?order_by=slug&page_size=2')
+        self.assertEqual([s['display'] for s in json['_embedded']['page']],
+            ['a', 'b'])
+        _, json = get(json['_links']['next']['href'])
+        self.assertEqual([s['display'] for s in json['_embedded']['page']],
+            ['c', 'd'])
+        self.assertFalse(json['_links'].has_key('next'))
+
+    def test_configured_fields_must_be_indexed(self):
+        with self.assertRaises(AssertionError):
+            configure(Pizza, filters=['max_extra_toppings'])
+        with self.assertRaises(AssertionError):
+            configure(Pizza, orderings=['exclusive_to'])
+        self.assertNotIn('max_extra_toppings', Pizza.slumber_model.filters)
+        self.assertNotIn('exclusive_to', Pizza.slumber_model.orderings)
+
+    def test_client_filter_and_order_by(self):
+        names = [p.name for p in client.slumber_examples.Pizza.filter(
+            for_sale=True).order_by('name')]
+        self.assertEqual(names, ['P%02d' % n for n in range(1, 25, 2)])
+
+    def test_client_streams_all_pages(self):
+        with patch('slumber.connector.prefetch.get', wraps=get) as pages:
+            names = [p.name for p in
+                client.slumber_examples.Pizza.instances(page_size=10)]
+        self.assertEqual(names, ['P%02d' % n for n in range(24, -1, -1)])
+        self.assertEqual(pages.call_count, 4)
+
+    def test_client_stops_early(self):
+        with patch('slumber.connector.prefetch.get', wraps=get) as pages:
+            for n, item in enumerate(client.slumber_examples.Pizza.instances(
+                    page_size=5, proxies=False)):
+                if n == 6:
+                    break
+        self.assertEqual(pages.call_count, 2)
+        pk, display, url = item
+        self.assertEqual(display, 'P18')
+        self.assertTrue(url.endswith('/Pizza/data/%s/' % pk), url)
+
+    def test_client_filters(self):
+        pizzas = list(client.slumber_examples.Pizza.instances(
+            filters=dict(for_sale=True), proxies=False))
+        self.assertEqual(len(pizzas), 12)
+
+    def test_remote_pages_are_read_ahead(self):
+        remote = 'http://remote.example.com/slumber/app/Stream/'
+        model = get_model(remote)
+        model._operations = dict(instances=remote + 'instances/')
+        requests = []
+        def _request(_self, url, headers={}):
+            requests.append(threading.current_thread())
+            start = int(url.split('start_after=')[1]) \
+                if 'start_after=' in url else 30
+            json = dict(page=[dict(pk=n, display=str(n),
+                    data='/slumber/app/Stream/data/%s/' % n)
+                for n in range(start - 1, max(start - 11, 0), -1)])
+            if json['page']:
+                json['next_page'] = '/slumber/app/Stream/instances/' \
+                    '?start_after=%s' % json['page'][-1]['pk']
+            return _Response(), dumps(json)
+        with patch('slumber.connector.ua.Http.request', _request):
+            pks = [pk for pk, _, _ in model.instances(proxies=False)]
+        self.assertEqual(pks, range(29, 0, -1))
+        self.assertEqual(len(requests), 4)
+        self.assertEqual(requests[0], threading.current_thread())
+        self.assertNotIn(threading.current_thread(), requests[1:])
@@ -0,0 +1,76 @@
+from mock import patch
+
+from django.test import TestCase
+
+from slumber import client
+from slumber.connector.identity import INSTANCES
+from slumber.connector.ua import get
+from slumber.operations.instancedata import instance_etag
+
+from slumber_examples.models import Pizza, Shop
+from slumber_examples.tests.configurations import ConfigureUser
+
+
+class TestTemplates(ConfigureUser, TestCase):
+    def setUp(self):
+        super(TestTemplates, self).setUp()
+        self.pizza = Pizza(name='Margarita')
+        self.pizza.save()
+        self.url = '/slumber/slumber_examples/Pizza/data/%s/' % self.pizza.pk
+    def tearDown(self):
+        INSTANCES.clear()
+        super(TestTemplates, self).tearDown()
+
+    def test_model_metadata(self):
+        _, json = get('/slumber/slumber_examples/Pizza/')
+        templates = json['instance_templates']
+        self.assertEqual(templates['data'],
+            '/slumber/slumber_examples/Pizza/data/{pk}/')
+        self.assertEqual(templates['update'],
+            '/slumber/slumber_examples/Pizza/update/{pk}/')
+        self.assertFalse(templates.has_key('create'))
+        _, json = get(self.url)
+        self.assertEqual(json['operations'],
+            dict([(k, t.replace('{pk}', str(self.pizza.pk)))
+                for k, t in templates.items()]))
+
+    def test_custom_mount_points(self):
+        _, json = get('/slumber/slumber_examples/Shop/')
+        self.assertEqual(json['instance_templates']['data'],
+            '/slumber/pizzas/shop/{pk}/')
+
+    def test_operations_can_be_left_out(self):
+        _, json = get(self.url + '?operations=no')
+        self.assertFalse(json.has_key('operations'))
+        self.assertEqual(json['display'], 'Margarita')
+
+    def test_client_builds_operations(self):
+        model = client.slumber_examples.Pizza
+        pizza = model.proxy(self.pizza.pk)
+        self.assertEqual(pizza._url,
+            'http://localhost:8000' + self.url)
+        with patch('slumber.connector.api.get', self.fail):
+            self.assertEqual(pizza._operations['delete'],
+                'http://localhost:8000/slumber/slumber_examples/Pizza/'
+                    'delete/%s/' % self.pizza.pk)
+        shop = Shop(name='Shop', slug='shop')
+        shop.save()
+        self.assertEqual(client.slumber_examples.Shop.proxy(shop.pk)._url,
+            'http://localhost:8000/slumber/pizzas/shop/%s/' % shop.pk)
+
+    def test_client_asks_for_less(self):
+        fetched = []
+        def _get(url, ttl=0):
+            fetched.append(url)
+            return get(url, ttl)
+        pizza = client.slumber_examples.Pizza.proxy(self.pizza.pk)
+        with patch('slumber.connector.api.get', _get):
+            self.assertEqual(unicode(pizza), 'Margarita')
+        self.assertEqual(fetched,
+            ['http://localhost:8000' + self.url + '?operations=no'])
+        _, json = get(self.url)
+        self.assertEqual(pizza._etag, instance_etag(json))
+        pizza.name = 'Changed'
+        pizza.save()
+        self.assertEqual(Pizza.objects.get(pk=self.pizza.pk).name, 'Changed')
+        self.assertEqual(unicode(pizza), 'Changed')
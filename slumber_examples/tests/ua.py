@@ -4,7 +4,10 @@ from mock import Mock, patch
 import socket
 from unittest2 import TestCase
 
-from slumber.connector.ua import for_user, get, post
+from slumber.connector.httpcache import invalidate_response, LOCAL, \
+    response_cache_key, shared_cache_key, statistics
+from slumber.connector.ua import for_user, get, post, flush_negative_cache, \
+    NEGATIVE_CACHE
 from slumber_examples.tests.views import ServiceTests
 
 
@@ -16,6 +19,12 @@ class _response_httplib2(object):
     status = 200
     content = '123'
 
+class _response_404(object):
+    status = 404
+
+class _response_500(object):
+    status = 500
+
 
 class TestPost(TestCase):
     def test_fake(self):
@@ -43,7 +52,7 @@ class TestGet(TestCase):
     def setUp(self):
         self.cache_url = 'http://example.com'
     def tearDown(self):
-        cache.delete('slumber.connector.ua.get.' + self.cache_url)
+        invalidate_response(self.cache_url)
 
     def test_real(self):
         class response:
@@ -138,6 +147,90 @@ class TestGet(TestCase):
             raise e
 
 
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.url = 'http://example.com/slumber/app/Model/data/1/'
+        self.requests = []
+    def tearDown(self):
+        LOCAL.clear()
+        invalidate_response(self.url)
+
+    def _request(self, url, headers={}):
+        self.requests.append(url)
+        response = _response_httplib2()
+        return response, '{"fields": {"name": "test"}}'
+
+    def test_local_tier_hit_does_not_use_django_cache(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            get(self.url, 60)
+        before = statistics()
+        with patch('slumber.connector.httpcache.cache.get', self.fail):
+            response, json = get(self.url, 60)
+        self.assertEqual(json, {"fields": {"name": "test"}})
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(statistics()['l1']['hits'], before['l1']['hits'] + 1)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_shared_tier_is_promoted(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            get(self.url, 60)
+        LOCAL.clear()
+        before = statistics()
+        response, json = get(self.url, 60)
+        self.assertEqual(json, {"fields": {"name": "test"}})
+        after = statistics()
+        self.assertEqual(after['l1']['misses'], before['l1']['misses'] + 1)
+        self.assertEqual(after['l2']['hits'], before['l2']['hits'] + 1)
+        self.assertEqual(len(LOCAL), 1)
+
+    def test_shared_entries_are_compact(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            get(self.url, 60)
+        stored = cache.get(shared_cache_key(
+            response_cache_key(self.url, dict(Accept='application/json')),
+            self.url))
+        url, _, status, headers, content = stored
+        self.assertEqual(url, self.url)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers, {})
+        self.assertTrue(isinstance(content, str))
+
+    def test_key_includes_user(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            get(self.url, 60)
+            for_user('another-user')(get)(self.url, 60)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_key_includes_accept(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            get(self.url, 60)
+            get(self.url, 60, headers=dict(Accept='text/html'))
+        self.assertEqual(len(self.requests), 2)
+
+    def test_key_is_short(self):
+        key = response_cache_key(self.url + '?q=' + 'x' * 500,
+            dict(Accept='application/json'))
+        self.assertTrue(len(key) < 250, key)
+
+    def test_invalidate(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            get(self.url, 60)
+            invalidate_response(self.url)
+            get(self.url, 60)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_invalidate_reaches_other_users(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            for_user('another-user')(get)(self.url, 60)
+            invalidate_response(self.url)
+            for_user('another-user')(get)(self.url, 60)
+            get(self.url + '?other', 60)
+            invalidate_response(self.url)
+            get(self.url + '?other', 60)
+        self.assertEqual(len(self.requests), 3)
+
+
 class TestUsernameDecorator(ServiceTests, TestCase):
     def setUp(self):
         super(TestUsernameDecorator, self).setUp()
@@ -167,3 +260,79 @@ class TestUsernameDecorator(ServiceTests, TestCase):
         do_get()
         self.assertTrue(self.checked)
 
+
+
+class TestNegativeCache(TestCase):
+    def setUp(self):
+        self.url = 'http://example.com/slumber/Model/get/?username=nobody'
+        self.requests = []
+        flush_negative_cache()
+    def tearDown(self):
+        flush_negative_cache()
+
+    def _request(self, url, headers={}):
+        self.requests.append(url)
+        return _response_404(), '{}'
+
+    def test_miss_is_remembered(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            with self.assertRaises(AssertionError):
+                get(self.url)
+            self.assertEqual(len(self.requests), 3)
+            with self.assertRaises(AssertionError):
+                get(self.url)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_allowed_404_is_served_from_negative_cache(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            with self.assertRaises(AssertionError):
+                get(self.url)
+            response, _ = get(self.url, codes=[404])
+        self.assertEqual(response.status, 404)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_flush_by_prefix(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            with self.assertRaises(AssertionError):
+                get(self.url)
+            flush_negative_cache('http://example.com/other/')
+            with self.assertRaises(AssertionError):
+                get(self.url)
+            self.assertEqual(len(self.requests), 3)
+            flush_negative_cache('http://example.com/slumber/Model/')
+            with self.assertRaises(AssertionError):
+                get(self.url)
+        self.assertEqual(len(self.requests), 6)
+
+    def test_ttl_can_be_turned_off(self):
+        with patch('slumber.connector.ua._negative_cache_ttl', lambda: 0):
+            with patch('slumber.connector.ua.Http.request', self._request):
+                with self.assertRaises(AssertionError):
+                    get(self.url)
+                with self.assertRaises(AssertionError):
+                    get(self.url)
+        self.assertEqual(len(self.requests), 6)
+        self.assertEqual(len(NEGATIVE_CACHE), 0)
+
+    def test_misses_are_per_user(self):
+        with patch('slumber.connector.ua.Http.request', self._request):
+            with self.assertRaises(AssertionError):
+                for_user('test-user')(get)(self.url)
+            with self.assertRaises(AssertionError):
+                for_user('another-user')(get)(self.url)
+            self.assertEqual(len(self.requests), 6)
+            with self.assertRaises(AssertionError):
+                for_user('test-user')(get)(self.url)
+        self.assertEqual(len(self.requests), 6)
+
+    def test_server_errors_are_not_remembered(self):
+        def _request(_self, url, headers={}):
+            self.requests.append(url)
+            return _response_500(), ''
+        with patch('slumber.connector.ua.Http.request', _request):
+            with self.assertRaises(AssertionError):
+                get(self.url)
+            with self.assertRaises(AssertionError):
+                get(self.url)
+        self.assertEqual(len(self.requests), 6)
@@ -46,6 +46,8 @@ INSTALLED_APPS = (
     'slumber_examples.no_models',
 
     'slumber_ex_shop',
+    'slumber.changelog',
+    'slumber.replica',
 )
 SLUMBER_CLIENT_APPS = ['slumber_examples']
 